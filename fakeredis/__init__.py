@@ -1,5 +1,5 @@
 from . import _typing
-from ._connection import FakeConnection, FakeRedis, FakeRedisConnection, FakeStrictRedis
+from ._connection import FakeConnection, FakeDirectConnection, FakeRedis, FakeRedisConnection, FakeStrictRedis
 from ._server import FakeServer
 from ._tcp_server import TcpFakeServer
 from .aioredis import FakeAsyncRedisConnection
@@ -19,6 +19,7 @@ __all__ = [
     "FakeAsyncRedis",
     "FakeAsyncRedisConnection",
     "FakeConnection",
+    "FakeDirectConnection",
     "FakeRedis",
     "FakeRedisConnection",
     "FakeServer",
@@ -40,3 +41,17 @@ try:
     )
 except ImportError:
     pass
+
+try:
+    from ._cluster import FakeCluster, FakeRedisCluster  # noqa: F401
+
+    __all__.extend(["FakeCluster", "FakeRedisCluster"])
+except ImportError:  # redis-py without cluster support
+    pass
+
+try:
+    from ._tcp_server import UnixFakeServer  # noqa: F401
+
+    __all__.append("UnixFakeServer")
+except ImportError:  # no Unix domain sockets on this platform
+    pass
@@ -0,0 +1,264 @@
+"""Append-only file of a `FakeServer`, enabled with the `appendonly` config.
+
+Write commands are appended to the file in the redis protocol, like they are fed to replicas. Depending on the
+`appendfsync` config, they are written and synced to disk before the command replies (`always`), or written by a
+thread which syncs the file once per second (`everysec`) or leaves syncing it to the operating system (`no`).
+
+BGREWRITEAOF replaces the file with the commands recreating the current dataset, written on a thread from a snapshot
+of the databases (see `fakeredis._rdb.DatabaseSnapshot`). The commands run meanwhile are kept, and appended to the new
+file once the snapshot is written.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+import weakref
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any
+
+import redis
+
+from fakeredis import _rdb, _value_codec
+from fakeredis._commands import Float, Item
+from fakeredis.model import ExpiringMembersSet, Hash, ZSet
+
+if TYPE_CHECKING:
+    from fakeredis._server import FakeServer
+
+LOGGER = logging.getLogger("fakeredis")
+
+# Elements of a collection per command of a rewritten file, like redis' AOF_REWRITE_ITEMS_PER_CMD
+REWRITE_ITEMS_PER_CMD = 64
+# Bytes of the file read per batch when it is loaded
+LOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def encode_command(fields: Sequence[bytes]) -> bytes:
+    parts = [b"*%d\r\n" % len(fields)]
+    for field in fields:
+        parts.append(b"$%d\r\n" % len(field))
+        parts.append(field)
+        parts.append(b"\r\n")
+    return b"".join(parts)
+
+
+def _chunked_commands(name: bytes, key: bytes, elements: list[bytes], per_element: int) -> bytes:
+    step = REWRITE_ITEMS_PER_CMD * per_element
+    return b"".join(encode_command([name, key, *elements[i : i + step]]) for i in range(0, len(elements), step))
+
+
+def rewrite_entry(key: bytes, item: Item, now: float) -> bytes:
+    """Encode the commands recreating a key, or nothing when it already expired."""
+    if item.expireat is not None and item.expireat < now:
+        return b""
+    value = item.value
+    now_ms = int(now * 1000)
+    if isinstance(value, bytes):
+        data = encode_command([b"SET", key, value])
+    elif isinstance(value, list):
+        data = _chunked_commands(b"RPUSH", key, value, 1)
+    elif isinstance(value, ExpiringMembersSet) and not any(
+        expireat is not None and expireat >= now_ms for expireat in value._values.values()
+    ):
+        members = [m for m, expireat in value._values.items() if expireat is None]
+        data = _chunked_commands(b"SADD", key, members, 1)
+    elif isinstance(value, Hash) and not any(expireat >= now_ms for expireat in value._expirations.values()):
+        fields = [x for k, v in value._values.items() if k not in value._expirations for x in (k, v)]
+        data = _chunked_commands(b"HSET", key, fields, 2)
+    elif isinstance(value, ZSet):
+        scores = [x for member, score in value.items() for x in (Float.encode(score, False), member)]
+        data = _chunked_commands(b"ZADD", key, scores, 2)
+    else:
+        data = encode_command([b"RESTORE", key, b"0", _rdb.dump_value(value), b"REPLACE"])
+    if item.expireat is not None:
+        data += encode_command([b"PEXPIREAT", key, str(int(item.expireat * 1000)).encode()])
+    return data
+
+
+def _writer_loop(aof_ref: weakref.ref[AppendOnlyFile]) -> None:
+    while True:
+        aof = aof_ref()
+        if aof is None or aof.closed:
+            return
+        aof.wait_and_flush(1.0)
+        del aof  # Do not keep the file alive while waiting
+
+
+class AppendOnlyFile:
+    """The append-only file of a server, which commands are appended to while the server lock is held."""
+
+    def __init__(self, server: FakeServer, path: str) -> None:
+        self.path = path
+        self.closed = False
+        self._config = server.config
+        self._file = open(path, "ab")  # noqa: SIM115
+        # Commands not written to the file yet, protected by `_cond`, and the database they are appended in
+        self._buffer: list[bytes] = []
+        self._db = -1
+        self._cond = threading.Condition()
+        # Held while writing to the file, so it is written in order and not replaced meanwhile
+        self._file_lock = threading.Lock()
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+        # Commands appended while BGREWRITEAOF writes the new file, and the database they are appended in
+        self._rewrite_buffer: list[bytes] | None = None
+        self._rewrite_db = -1
+        thread = threading.Thread(
+            target=_writer_loop, args=(weakref.ref(self),), name="fakeredis-aof-writer", daemon=True
+        )
+        thread.start()
+
+    @property
+    def fsync_policy(self) -> bytes:
+        return self._config.get(b"appendfsync", b"everysec").lower()
+
+    def append(self, db: int, fields: list[bytes]) -> None:
+        """Append a write command run on database `db`. This is called with the server lock held."""
+        data = encode_command(fields)
+        if self._rewrite_buffer is not None:
+            if db != self._rewrite_db:
+                self._rewrite_db = db
+                self._rewrite_buffer.append(encode_command([b"SELECT", str(db).encode()]))
+            self._rewrite_buffer.append(data)
+        with self._cond:
+            if db != self._db:
+                self._db = db
+                self._buffer.append(encode_command([b"SELECT", str(db).encode()]))
+            self._buffer.append(data)
+            self._cond.notify()
+        if self.fsync_policy == b"always":
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the appended commands to the file, and sync it unless `appendfsync` is `no`."""
+        with self._file_lock:
+            with self._cond:
+                data, self._buffer = b"".join(self._buffer), []
+            if data:
+                self._file.write(data)
+                self._file.flush()
+                self._unsynced = True
+            policy = self.fsync_policy
+            if self._unsynced and (
+                policy == b"always" or (policy == b"everysec" and time.monotonic() - self._last_fsync >= 1)
+            ):
+                os.fsync(self._file.fileno())
+                self._last_fsync = time.monotonic()
+                self._unsynced = False
+
+    def wait_and_flush(self, timeout: float) -> None:
+        """Wait for commands to be appended, at most `timeout` seconds, then flush them. Run by the writer thread."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._buffer or self.closed, timeout)
+        if self.closed:
+            return
+        try:
+            self.flush()
+        except (OSError, ValueError) as exc:
+            LOGGER.warning("Writing to the append-only file %s failed: %s", self.path, exc)
+
+    def close(self) -> None:
+        """Flush the appended commands and close the file."""
+        self.flush()
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+        with self._file_lock:
+            self._file.close()
+
+    def start_rewrite(self) -> None:
+        """Start keeping the commands appended from now on for the rewritten file. Called with the server lock held."""
+        self._rewrite_buffer = []
+        self._rewrite_db = -1
+
+    def finish_rewrite(self, tmp_path: str) -> None:
+        """Replace the file with the rewritten file `tmp_path`, after appending the commands kept meanwhile to it.
+
+        This is called with the server lock held, so that no command is appended meanwhile.
+        """
+        assert self._rewrite_buffer is not None
+        with open(tmp_path, "ab") as f:
+            f.write(b"".join(self._rewrite_buffer))
+            f.flush()
+            os.fsync(f.fileno())
+        with self._file_lock:
+            os.replace(tmp_path, self.path)
+            self._file.close()
+            self._file = open(self.path, "ab")  # noqa: SIM115
+            with self._cond:
+                # Commands still buffered are in the rewritten file, from the snapshot or from the rewrite buffer
+                self._buffer = []
+                self._db = self._rewrite_db
+        self._rewrite_buffer = None
+
+    def abort_rewrite(self) -> None:
+        self._rewrite_buffer = None
+
+
+def bgrewriteaof(server: FakeServer, aof: AppendOnlyFile | None, path: str) -> threading.Thread:
+    """Rewrite the append-only file `path` of `server` on a thread. This is called with the server lock held.
+
+    Like redis, the file is written even when the append-only file is disabled (`aof` is None), in which case no
+    command is appended to it afterwards.
+    """
+    snapshots = _rdb.take_snapshots(server, rewrite_entry)
+    if aof is not None:
+        aof.start_rewrite()
+    tmp_path = os.path.join(os.path.dirname(path), f"temp-rewriteaof-bg-{os.getpid()}-{threading.get_ident()}.aof")
+
+    def run() -> None:
+        status = "ok"
+        try:
+            with open(tmp_path, "wb") as f:
+                for index, snapshot in sorted(snapshots.items()):
+                    if snapshot.size:
+                        f.write(encode_command([b"SELECT", str(index).encode()]))
+                        f.writelines(snapshot.entries())
+                f.flush()
+                os.fsync(f.fileno())
+            with server.lock:
+                if aof is not None:
+                    aof.finish_rewrite(tmp_path)
+                else:
+                    os.replace(tmp_path, path)
+        except Exception:
+            LOGGER.exception("Background rewriting of the append-only file %s failed", path)
+            status = "err"
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        finally:
+            with server.lock:
+                if aof is not None:
+                    aof.abort_rewrite()
+                _rdb.release_snapshots(server, snapshots)
+                server.aof_rewrite_done(status)
+
+    thread = threading.Thread(target=run, name="fakeredis-bgrewriteaof", daemon=True)
+    thread.start()
+    return thread
+
+
+def load(server: FakeServer, path: str) -> None:
+    """Replay the commands of the append-only file `path` on `server`, in batches like those of a client.
+
+    An incomplete command at the end of the file, e.g. after a crash, is ignored like redis does with
+    `aof-load-truncated yes`.
+    """
+    from fakeredis._fakesocket import FakeSocket
+
+    sock: Any = FakeSocket(server, db=0, client_class=redis.Redis)
+    sock._master_client = True
+    sock._reply_off = True
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(LOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                sock._parser.send(chunk)
+    finally:
+        sock.close()
+    _value_codec.link_time_series_rules(server.dbs.values())
@@ -2,49 +2,121 @@ from __future__ import annotations
 
 import itertools
 import logging
-import queue
-import re
+import os
+import threading
 import time
 import weakref
 from collections.abc import Generator, Iterable, Sequence
-from re import Match
+from functools import lru_cache
 from typing import Any, AnyStr, Callable, ClassVar
 
 import redis
 
-from fakeredis.model import BaseModel, ClientInfo, Hash
+from fakeredis.model import BaseModel, ClientInfo, Hash, get_command_info, is_write_command
 
 from . import _msgs as msgs
 from ._command_args_parsing import extract_args
 from ._commands import COMMANDS_WITH_SUB, SUPPORTED_COMMANDS, CommandItem, Float, Int, Signature
+from ._hash_slot import command_keys
 from ._helpers import (
     QUEUED,
     NoResponse,
+    ResponseQueue,
+    ScanIndex,
     SimpleError,
     SimpleString,
     casematch,
-    compile_pattern,
     decode_command_bytes,
-    valid_response_type,
+    parse_keyspace_events,
+    pattern_matcher,
 )
+from ._replication import replication_command
 from ._typing import ResponseErrorType, ServerType, VersionType
 
 LOGGER = logging.getLogger("fakeredis")
 
 
-def _convert_to_resp2(val: Any) -> Any:
-    if isinstance(val, str):
-        return val.encode()
-    if isinstance(val, float):
-        return Float.encode(val, humanfriendly=False)
-    if isinstance(val, dict):
-        result = list(itertools.chain(*val.items()))
-        return [_convert_to_resp2(item) for item in result]
-    if isinstance(val, (list, tuple)):
-        return [_convert_to_resp2(item) for item in val]
+# Exception covers errors already decoded by a command nested in this one, e.g. by EXEC.
+_VALID_RESPONSE_TYPES_RESP2 = (bytes, SimpleString, SimpleError, Exception, float, int, list)
+_VALID_RESPONSE_TYPES_RESP3 = (bytes, SimpleString, SimpleError, Exception, float, int, list, dict, str)
+
+
+def _encode_response(
+    val: Any,
+    resp2: bool,
+    decode_error: Callable[[SimpleError], Any] | None,
+    allowed_types: tuple[type, ...] | None,
+) -> Any:
+    """Prepare a command result for the client in a single traversal.
+
+    When `resp2` is set, RESP3-only values are converted (str and float to bytes, dict to a flat list). When
+    `decode_error` is given, SimpleString and SimpleError are decoded. When `allowed_types` is given, any value
+    that is not one of them raises AssertionError.
+    """
+    if val is None or isinstance(val, (bytes, int)):
+        return val
+    if isinstance(val, list) or (resp2 and isinstance(val, tuple)):
+        return [_encode_response(item, resp2, decode_error, allowed_types) for item in val]
+    if resp2:
+        if isinstance(val, str):
+            return val.encode()
+        if isinstance(val, float):
+            return Float.encode(val, humanfriendly=False)
+        if isinstance(val, dict):
+            return [
+                _encode_response(item, resp2, decode_error, allowed_types) for item in itertools.chain(*val.items())
+            ]
+    if allowed_types is not None and not isinstance(val, allowed_types):
+        raise AssertionError(f"Invalid response type for {val}")
+    if decode_error is not None:
+        if isinstance(val, SimpleString):
+            return val.value
+        if isinstance(val, SimpleError):
+            return decode_error(val)
     return val
 
 
+# Maps command names as sent by clients to their decoded, lowercased form. Only names of supported commands are
+# cached, and the number of entries is capped since every casing of a name is a distinct key.
+_COMMAND_NAMES: dict[bytes, str] = {}
+_MAX_COMMAND_NAMES = 4096
+
+
+def _decode_command_name(name: bytes) -> str:
+    cmd = _COMMAND_NAMES.get(name)
+    if cmd is None:
+        cmd = decode_command_bytes(name)
+        if (cmd in SUPPORTED_COMMANDS or cmd in COMMANDS_WITH_SUB) and len(_COMMAND_NAMES) < _MAX_COMMAND_NAMES:
+            _COMMAND_NAMES[name] = cmd
+    return cmd
+
+
+# The `notify-keyspace-events` class of the events of a command, by ACL category, in order of precedence
+_KEYSPACE_EVENT_CLASSES = (
+    (b"@string", b"$"),
+    (b"@bitmap", b"$"),
+    (b"@hyperloglog", b"$"),
+    (b"@list", b"l"),
+    (b"@set", b"s"),
+    (b"@sortedset", b"z"),
+    (b"@geo", b"z"),
+    (b"@hash", b"h"),
+    (b"@stream", b"t"),
+    (b"@keyspace", b"g"),
+)
+
+
+@lru_cache(maxsize=1024)
+def _keyspace_event_class(command_name: str) -> bytes:
+    info = get_command_info(command_name.encode())
+    if info is None:
+        return b"g"
+    for category, event_class in _KEYSPACE_EVENT_CLASSES:
+        if category in info[6]:
+            return event_class
+    return b"d"  # Module commands, e.g. JSON.SET
+
+
 def _extract_command(fields: list[bytes]) -> tuple[Any, list[Any]]:
     """Extracts the command and command arguments from a list of `bytes` fields.
 
@@ -58,7 +130,7 @@ def _extract_command(fields: list[bytes]) -> tuple[Any, list[Any]]:
         print(result) # ('GET', ['key1'])
         ```
     """
-    cmd = decode_command_bytes(fields[0])
+    cmd = _decode_command_name(fields[0])
     if cmd in COMMANDS_WITH_SUB and len(fields) >= 2:
         cmd += " " + decode_command_bytes(fields[1])
         cmd_arguments = fields[2:]
@@ -67,14 +139,6 @@ def _extract_command(fields: list[bytes]) -> tuple[Any, list[Any]]:
     return cmd, cmd_arguments
 
 
-def bin_reverse(x: int, bits_count: int) -> int:
-    result = 0
-    for i in range(bits_count):
-        if (x >> i) & 1:
-            result |= 1 << (bits_count - 1 - i)
-    return result
-
-
 _file_no_counter = itertools.count(8)
 
 
@@ -84,6 +148,9 @@ def _get_next_file_no() -> int:
 
 class BaseFakeSocket:
     _clear_watches: Callable[[], None]
+    # Check that every command result is representable in the client's protocol. This costs a full extra check
+    # of each value, so it is off unless FAKEREDIS_STRICT_RESPONSES is set; the test-suite turns it on.
+    strict_responses: ClassVar[bool] = os.getenv("FAKEREDIS_STRICT_RESPONSES", "") not in ("", "0")
     ACCEPTED_COMMANDS_WHILE_PUBSUB: ClassVar[set[str]] = {
         "ping",
         "subscribe",
@@ -95,6 +162,13 @@ class BaseFakeSocket:
         "reset",
     }
     _connection_error_class = redis.ConnectionError
+    # Command name => (unbound method, signature), filled lazily. Each subclass gets its own table (see
+    # __init_subclass__) since the method implementing a command depends on the mixins of the concrete class.
+    _dispatch_table: ClassVar[dict[str, tuple[Callable[..., Any] | None, Signature]]] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._dispatch_table = {}
 
     def __init__(
         self,
@@ -113,7 +187,7 @@ class BaseFakeSocket:
         self._db_num = db
         self._db = server.dbs[self._db_num]
         self._client_class = client_class
-        self.responses: queue.Queue[bytes] | None = queue.Queue()
+        self.responses: ResponseQueue | None = ResponseQueue()
         # Prevents parser from processing commands. Not used in this module,
         # but set by aioredis module to prevent new commands being processed
         # while handling a blocking command.
@@ -132,8 +206,12 @@ class BaseFakeSocket:
         # client is blocked and, if so, how it should be woken.
         self._blocked = False
         self._unblock_reason: bytes | None = None
+        # Set on the client of a replica applying the replication stream of its primary, which may write
+        self._master_client = False
         # Subkey (hash field) events recorded by the currently running command: (event, key, subkeys)
         self._subkey_events: list[tuple[bytes, bytes, list[bytes]]] = []
+        # Name and arguments of the currently running command, which a blocking command served later propagates
+        self._command: tuple[str, list[Any]] = ("", [])
         self._parser = self._parse_commands()
         self._parser.send(None)
         # Assigned elsewhere
@@ -173,6 +251,12 @@ class BaseFakeSocket:
         if responses:
             responses.put(msg)
 
+    def put_responses(self, msgs: Iterable[Any]) -> None:
+        """Put several response messages into the queue of responses at once."""
+        responses = self.responses
+        if responses:
+            responses.put_many(msgs)
+
     def pause(self) -> None:
         self._paused = True
 
@@ -192,10 +276,12 @@ class BaseFakeSocket:
         This is called with the server lock held, but it may be some time after
         self.close.
         """
-        for subs in server.subscribers.values():
-            subs.discard(self)
-        for subs in server.psubscribers.values():
-            subs.discard(self)
+        for subscribers in (server.subscribers, server.psubscribers):
+            for channel, subs in subscribers.items():
+                if self in subs:
+                    subs.discard(self)
+                    server.update_keyspace_listeners(subscribers, channel, -1)
+        server.replicas.discard(self)
         self._clear_watches()
 
     def kill(self) -> None:
@@ -228,48 +314,117 @@ class BaseFakeSocket:
         self.responses = None
 
     @staticmethod
-    def _extract_line(buf: bytes) -> tuple[bytes, bytes]:
-        pos = buf.find(b"\n") + 1
-        if pos <= 0:
-            raise SimpleError(msgs.UNKNOWN_COMMAND_MSG.format(buf.decode().strip()))
-        line = buf[:pos]
-        buf = buf[pos:]
+    def _extract_line(buf: bytearray, pos: int) -> tuple[bytes, int]:
+        """Extract the line starting at `pos` in `buf`, returning it with the position right after it."""
+        end = buf.find(b"\n", pos) + 1
+        if end <= 0:
+            raise SimpleError(msgs.UNKNOWN_COMMAND_MSG.format(buf[pos:].decode().strip()))
+        line = bytes(buf[pos:end])
         if not line.endswith(b"\r\n"):
             parts = line.decode().strip().split(" ", 1)
             command = parts[0]
             args = parts[1] if len(parts) > 1 else ""
             raise SimpleError(msgs.UNKNOWN_COMMAND_MSG.format(command) + f"'{args}' ")
-        return line, buf
+        return line, end
 
     def _parse_commands(self) -> Generator[None, Any, None]:
         """Generator that parses commands.
 
         It is fed pieces of redis protocol data (via `send`) and calls
-        `_process_command` whenever it has a complete one.
+        `_process_command` for every complete command.
+
+        Data is accumulated in a `bytearray` and consumed by moving a read offset, so a large pipeline is not copied
+        again for every command in it. Consumed data is only dropped when more input is needed. The state of a
+        partially received command is kept between calls, so it is never parsed twice.
+
+        All the complete commands of a piece of data (e.g. a pipeline) are run as one batch, under a single
+        acquisition of the server lock. Every command still gets its own response.
         """
-        buf = b""
+        buf = bytearray()
+        pos = 0
+        fields: list[bytes] = []
+        n_fields = -1  # Number of fields of the command being parsed, -1 until its header is read
+        length = -1  # Length of the bulk string being parsed, -1 until its header is read
+
+        def feed(data: bytes) -> None:
+            nonlocal pos
+            if pos:
+                del buf[:pos]
+                pos = 0
+            buf.extend(data)
+
+        def next_command() -> list[bytes] | None:
+            """Parse the next command in the buffer, or return None if it is not complete yet."""
+            nonlocal pos, fields, n_fields, length
+            if n_fields < 0:
+                if buf.find(b"\n", pos) < 0:
+                    return None
+                line, pos = self._extract_line(buf, pos)
+                if not line[:1] == b"*":  # array
+                    raise SimpleError(msgs.UNKNOWN_COMMAND_MSG.format(buf[pos:].decode().strip()))
+                n_fields = int(line[1:-2])
+            while len(fields) < n_fields:
+                if length < 0:
+                    if buf.find(b"\n", pos) < 0:
+                        return None
+                    line, pos = self._extract_line(buf, pos)
+                    if line[:1] != b"$":
+                        raise SimpleError(msgs.UNKNOWN_COMMAND_MSG.format(buf[pos:].decode().strip()))
+                    length = int(line[1:-2])
+                # Wait for the whole payload, then copy it out in one step
+                if len(buf) - pos < length + 2:
+                    return None
+                with memoryview(buf) as view:
+                    fields.append(view[pos : pos + length].tobytes())
+                pos += length + 2  # +2 to skip the CRLF
+                length = -1
+            command, fields, n_fields = fields, [], -1
+            return command
+
         while True:
-            while self._paused or b"\n" not in buf:
-                buf += yield
-            line, buf = self._extract_line(buf)
-            if not line[:1] == b"*":  # array
-                raise SimpleError(msgs.UNKNOWN_COMMAND_MSG.format(buf.decode().strip()))
-            n_fields = int(line[1:-2])
-            fields = []
-            for i in range(n_fields):
-                while b"\n" not in buf:
-                    buf += yield
-                line, buf = self._extract_line(buf)
-                if line[:1] != b"$":
-                    raise SimpleError(msgs.UNKNOWN_COMMAND_MSG.format(buf.decode().strip()))
-                length = int(line[1:-2])
-                while len(buf) < length + 2:
-                    buf += yield
-                fields.append(buf[:length])
-                buf = buf[length + 2 :]  # +2 to skip the CRLF
-            self._process_command(fields)
+            feed((yield))
+            if self._paused:
+                continue
+            lock = self._server.lock
+            locked = False
+            try:
+                while not self._paused:
+                    command = next_command()
+                    if command is None:
+                        break
+                    if not locked:
+                        lock.acquire()
+                        locked = True
+                        self._start_batch()
+                    self._process_command(command)
+            finally:
+                if locked:
+                    lock.release()
+
+    def _start_batch(self) -> None:
+        """Bookkeeping shared by a batch of commands, done before running the first one.
+
+        This is called with the server lock held.
+        """
+        # Clean out old connections
+        while True:
+            try:
+                weak_sock = self._server.closed_sockets.pop()
+            except IndexError:
+                break
+            else:
+                sock = weak_sock()
+                if sock:
+                    sock._cleanup(self._server)
+        self._update_time()
+
+    def _update_time(self) -> None:
+        now = time.time()
+        for db in self._server.dbs.values():
+            db.time = now
 
     def _process_command(self, fields: list[bytes]) -> None:
+        """Run a single command and queue its response. This is called with the server lock held."""
         if not fields:
             return
         result: Any
@@ -278,28 +433,18 @@ class BaseFakeSocket:
         try:
             func, sig = self._name_to_func(cmd)
             # ACL check
-            self._server.acl.validate_command(self._client_info.user, self._client_info.as_bytes(), fields)
-            with self._server.lock:
-                # Clean out old connections
-                while True:
-                    try:
-                        weak_sock = self._server.closed_sockets.pop()
-                    except IndexError:
-                        break
-                    else:
-                        sock = weak_sock()
-                        if sock:
-                            sock._cleanup(self._server)
-                now = time.time()
-                for db in self._server.dbs.values():
-                    db.time = now
-                sig.check_arity(cmd_arguments, self.version)
-                if self._transaction is not None and msgs.FLAG_TRANSACTION not in sig.flags:
-                    self._transaction.append((func, sig, cmd_arguments))
-                    result = QUEUED
-                else:
-                    from_run_command = True
-                    result = self._run_command(func, sig, cmd_arguments, False)
+            self._server.acl.validate_command(self._client_info.user, self._client_info.as_bytes, fields)
+            sig.check_arity(cmd_arguments, self.version)
+            if self._server.cluster_node is not None:
+                self._server.cluster_node.check_keys(command_keys(sig, cmd_arguments, self.version))
+            if self._server.master_link is not None and not self._master_client and is_write_command(sig.name):
+                raise SimpleError(msgs.READONLY_REPLICA_MSG)
+            if self._transaction is not None and msgs.FLAG_TRANSACTION not in sig.flags:
+                self._transaction.append((func, sig, cmd_arguments))
+                result = QUEUED
+            else:
+                from_run_command = True
+                result = self._run_command(func, sig, cmd_arguments, False)
         except SimpleError as exc:
             if self._transaction is not None and not from_run_command:
                 self._transaction_failed = True
@@ -309,7 +454,9 @@ class BaseFakeSocket:
                 self._transaction_failed = False
                 self._clear_watches()
             result = exc
-        result = self._decode_result(result)
+        if isinstance(result, (SimpleString, SimpleError)):
+            # Results of executed commands were already decoded by _run_command.
+            result = self._decode_result(result)
         suppressed = self._reply_off or self._reply_skip
         # Mirror redis' resetClient(): the SKIP armed by CLIENT REPLY SKIP takes effect
         # on the command *after* it, then clears itself.
@@ -323,6 +470,8 @@ class BaseFakeSocket:
     ) -> Any:
         command_items: list[CommandItem] = []
         self._subkey_events = []
+        raw_args = args
+        self._command = (sig.name, raw_args)
         try:
             ret = sig.apply(args, self._db, self.version)
             if from_script and msgs.FLAG_NO_SCRIPT in sig.flags:
@@ -334,49 +483,57 @@ class BaseFakeSocket:
             else:
                 args, command_items = ret
                 result = func(*args)  # type: ignore
-                if self._client_info.protocol_version == 2 and msgs.FLAG_SKIP_CONVERT_TO_RESP2 not in sig.flags:
-                    result = _convert_to_resp2(result)
-                if msgs.FLAG_SKIP_CONVERT_TO_RESP2 not in sig.flags and not valid_response_type(
-                    result, self._client_info.protocol_version
-                ):
-                    raise AssertionError(f"Invalid response type for {result}")
+                if not isinstance(result, NoResponse):
+                    result = self._encode_result(result, msgs.FLAG_SKIP_CONVERT_TO_RESP2 not in sig.flags, from_script)
         except SimpleError as exc:
             result = exc
-        for command_item in command_items:
-            command_item.writeback(remove_empty_val=msgs.FLAG_LEAVE_EMPTY_VAL not in sig.flags)
-        self._keyspace_notifications(command_items, sig.name.encode())
+        if command_items:
+            self._db.writeback_all(command_items, remove_empty_val=msgs.FLAG_LEAVE_EMPTY_VAL not in sig.flags)
+        if self._server.keyspace_listeners:
+            self._keyspace_notifications(command_items, sig.name)
         self._subkey_notifications(command_items)
+        if (self._server.replicas or self._server.aof is not None) and not isinstance(
+            result, (SimpleError, NoResponse)
+        ):
+            self._propagate(sig.name, raw_args, result, command_items)
         return result
 
-    def _publish_to_channel(
-        self, channel: bytes, message: bytes, pattern_regex: dict[bytes, re.Pattern[bytes]]
-    ) -> None:
-        msg = [b"message", channel, message]
-        subs: Iterable[Any] = self._server.subscribers.get(channel, set())
-        for sock in subs:
-            sock.put_response(msg)
-
-        for pattern, regex in pattern_regex.items():
-            if regex.match(channel):
-                pmsg = [b"pmessage", pattern, channel, message]
-                for sock in self._server.psubscribers[pattern]:
-                    sock.put_response(pmsg)
-
-    def _keyspace_notifications(self, command_items: list[CommandItem], event: bytes) -> None:
-        """Send keyspace notifications"""
-        pattern_regex: dict[bytes, re.Pattern[bytes]] = {
-            pattern: compile_pattern(pattern) for pattern in self._server.psubscribers
-        }
+    def _propagate(self, name: str, args: list[Any], result: Any, command_items: list[CommandItem]) -> None:
+        """Feed a command that ran to the replicas and the append-only file, if it is a write command.
+
+        Commands are writes by the `write` flag of their command info, or when they modified a key: commands of the
+        modules have no flags. Expiry times set by the command follow it as PEXPIREAT, so that relative ones are not
+        extended when the command is applied later.
+        """
+        if not is_write_command(name) and not any(item.is_modified for item in command_items):
+            return
+        fields = replication_command(name, args, result)
+        if fields is not None:
+            self._server.propagate(self._db_num, fields)
+        for item in command_items:
+            if item.expireat_modified and item.expireat is not None and item:
+                expireat_ms = str(int(item.expireat * 1000)).encode()
+                self._server.propagate(self._db_num, [b"PEXPIREAT", item.key, expireat_ms])
+
+    def _publish_to_channel(self, channel: bytes, message: bytes) -> None:
+        self._server.publish_to_channel(channel, message)
+
+    def _keyspace_notifications(self, command_items: list[CommandItem], command_name: str) -> None:
+        """Send keyspace notifications, following the `notify-keyspace-events` config"""
+        keyspace, keyevent, classes = parse_keyspace_events(self._server.config.get(b"notify-keyspace-events", b""))
+        if not (keyspace or keyevent) or _keyspace_event_class(command_name) not in classes:
+            return
+        event = command_name.encode()
         keyspace_channel_prefix: bytes = f"__keyspace@{self._db_num}__:".encode()
         keyevent_channel: bytes = f"__keyevent@{self._db_num}__:".encode() + event
         for command_item in command_items:
             if not command_item.is_modified:
                 continue
             try:
-                keyspace_channel = keyspace_channel_prefix + command_item.key
-
-                for channel, message in [(keyspace_channel, event), (keyevent_channel, command_item.key)]:
-                    self._publish_to_channel(channel, message, pattern_regex)
+                if keyspace:
+                    self._publish_to_channel(keyspace_channel_prefix + command_item.key, event)
+                if keyevent:
+                    self._publish_to_channel(keyevent_channel, command_item.key)
             except Exception as e:
                 LOGGER.error(
                     f"Error sending keyspace notification for event `{event.decode()}` on key {command_item.key.decode()}: {e}"
@@ -390,7 +547,7 @@ class BaseFakeSocket:
     def _subkey_notifications(self, command_items: list[CommandItem]) -> None:
         """Send subkey notifications (added in redis 8.8), currently emitted for hash fields only.
 
-        Unlike key-level notifications above, these follow the `notify-keyspace-events` config:
+        Like key-level notifications above, these follow the `notify-keyspace-events` config:
         the `h` class flag must be set, and each of the S/T/I/V flags enables one channel type.
         """
         events, self._subkey_events = self._subkey_events, []
@@ -399,16 +556,15 @@ class BaseFakeSocket:
                 expired_fields = command_item.value.take_expired_fields()
                 if expired_fields:
                     events.insert(0, (b"hexpired", command_item.key, expired_fields))
-        if not events or self.version < (8, 8) or self._server.server_type != "redis":
+        if not events or not self._server.keyspace_listeners:
+            return
+        if self.version < (8, 8) or self._server.server_type != "redis":
             return
         config_flags = self._server.config.get(b"notify-keyspace-events", b"")
-        if b"h" not in config_flags and b"A" not in config_flags:
+        if b"h" not in parse_keyspace_events(config_flags)[2]:
             return
         if not any(flag in config_flags for flag in (b"S", b"T", b"I", b"V")):
             return
-        pattern_regex: dict[bytes, re.Pattern[bytes]] = {
-            pattern: compile_pattern(pattern) for pattern in self._server.psubscribers
-        }
         db_num = str(self._db_num).encode()
         for event, key, subkeys in events:
             try:
@@ -417,18 +573,18 @@ class BaseFakeSocket:
                 # and keys containing `\n` for the channel using `\n` as a delimiter.
                 if b"S" in config_flags and b"|" not in event:
                     channel = b"__subkeyspace@%s__:%s" % (db_num, key)
-                    self._publish_to_channel(channel, event + b"|" + subkeys_payload, pattern_regex)
+                    self._publish_to_channel(channel, event + b"|" + subkeys_payload)
                 if b"T" in config_flags:
                     channel = b"__subkeyevent@%s__:%s" % (db_num, event)
                     message = b"%d:%s|%s" % (len(key), key, subkeys_payload)
-                    self._publish_to_channel(channel, message, pattern_regex)
+                    self._publish_to_channel(channel, message)
                 if b"I" in config_flags and b"\n" not in key:
                     for subkey in subkeys:
                         channel = b"__subkeyspaceitem@%s__:%s\n%s" % (db_num, key, subkey)
-                        self._publish_to_channel(channel, event, pattern_regex)
+                        self._publish_to_channel(channel, event)
                 if b"V" in config_flags and b"|" not in event:
                     channel = b"__subkeyspaceevent@%s__:%s|%s" % (db_num, event, key)
-                    self._publish_to_channel(channel, subkeys_payload, pattern_regex)
+                    self._publish_to_channel(channel, subkeys_payload)
             except Exception as e:
                 LOGGER.error(
                     f"Error sending subkey notification for event `{event.decode()}` on key {key.decode()}: {e}"
@@ -444,6 +600,17 @@ class BaseFakeSocket:
 
             return RedisDefaultParser(socket_read_size=65536).parse_error(error.value)  # type: ignore
 
+    def _encode_result(self, result: Any, convert: bool, from_script: bool) -> Any:
+        """Convert, check and decode a command result in one pass.
+
+        Scripts get SimpleString and SimpleError undecoded, since they translate them to Lua tables themselves.
+        """
+        resp2 = convert and self._client_info.protocol_version == 2
+        allowed_types = None
+        if convert and self.strict_responses:
+            allowed_types = resp2 and _VALID_RESPONSE_TYPES_RESP2 or _VALID_RESPONSE_TYPES_RESP3
+        return _encode_response(result, resp2, None if from_script else self._decode_error, allowed_types)
+
     def _decode_result(self, result: Any) -> Any:
         """Convert SimpleString and SimpleError, recursively"""
         if isinstance(result, list):
@@ -455,36 +622,49 @@ class BaseFakeSocket:
         else:
             return result
 
-    def _blocking(self, timeout: float | None, func: Callable[[bool], Any]) -> Any:
+    def _blocking(
+        self,
+        timeout: float | None,
+        keys: Sequence[bytes],
+        func: Callable[[bool], Any],
+        timeout_result: Callable[[], Any] | None = None,
+    ) -> Any:
         """Run a function until it succeeds or timeout is reached.
 
         The timeout is in seconds, and 0 means infinite. The function
         is called with a boolean to indicate whether this is the first call.
         If it returns None, it is considered to have "failed" and is retried
-        each time the condition variable is notified, until the timeout is
-        reached.
+        each time one of `keys` changes, until the timeout is reached.
 
-        Returns the function return value, or None if the timeout has passed.
+        Returns the function return value, or None if the timeout has passed
+        (the return value of `timeout_result` when given).
         """
         ret = func(True)  # Call with first_pass=True
         if ret is not None or self._in_transaction:
             return ret
         deadline = time.time() + timeout if timeout else None
+        condition = threading.Condition(self._server.lock)
+        wakeup = condition.notify
+        self._db.add_blocked_client(keys, wakeup)
         self._blocked = True
         try:
             while True:
                 timeout = (deadline - time.time()) if deadline is not None else None
                 if timeout is not None and timeout <= 0:
-                    return None
-                if self._db.condition.wait(timeout=timeout) is False:
-                    return None  # Timeout expired
+                    break
+                if condition.wait(timeout=timeout) is False:
+                    break  # Timeout expired
+                # Commands after this one in the same batch must not see the clock of before the wait
+                self._update_time()
                 if self._unblock_reason is not None:
                     self._take_unblock_reason()
-                    return None  # Unblocked with TIMEOUT: same empty result as a timeout
+                    break  # Unblocked with TIMEOUT: same result as a timeout
                 ret = func(False)  # Second pass => first_pass=False
                 if ret is not None:
                     return ret
+            return timeout_result() if timeout_result is not None else None
         finally:
+            self._db.remove_blocked_client(keys, wakeup)
             self._blocked = False
             self._unblock_reason = None
 
@@ -496,16 +676,21 @@ class BaseFakeSocket:
 
     def _name_to_func(self, cmd_name: str) -> tuple[Callable[[Any], Any] | None, Signature]:
         """Get the signature and the method from the command name."""
-        if cmd_name not in SUPPORTED_COMMANDS:
-            # redis remaps \r or \n in an error to ' ' to make it legal protocol
-            clean_name = cmd_name.replace("\r", " ").replace("\n", " ")
-            raise SimpleError(msgs.UNKNOWN_COMMAND_MSG.format(clean_name))
-        sig = SUPPORTED_COMMANDS[cmd_name]
+        entry = self._dispatch_table.get(cmd_name)
+        if entry is None:
+            if cmd_name not in SUPPORTED_COMMANDS:
+                # redis remaps \r or \n in an error to ' ' to make it legal protocol
+                clean_name = cmd_name.replace("\r", " ").replace("\n", " ")
+                raise SimpleError(msgs.UNKNOWN_COMMAND_MSG.format(clean_name))
+            sig = SUPPORTED_COMMANDS[cmd_name]
+            entry = (getattr(type(self), sig.func_name, None), sig)
+            self._dispatch_table[cmd_name] = entry
+        method, sig = entry
         if self._server.server_type not in sig.server_types:
             # redis remaps \r or \n in an error to ' ' to make it legal protocol
             clean_name = cmd_name.replace("\r", " ").replace("\n", " ")
             raise SimpleError(msgs.UNKNOWN_COMMAND_MSG.format(clean_name))
-        func = getattr(self, sig.func_name, None)
+        func = method.__get__(self) if method is not None else None
         return func, sig
 
     def sendall(self, data: AnyStr) -> None:
@@ -515,11 +700,23 @@ class BaseFakeSocket:
             data = data.encode("ascii")  # type: ignore
         self._parser.send(data)
 
-    def _scan(self, keys: Sequence[bytes], cursor: int, *args: bytes) -> list[bytes | list[bytes]]:
+    def run_commands(self, commands: Sequence[list[bytes]]) -> None:
+        """Run commands that are already split into their fields, without going through the RESP parser.
+
+        Like the commands of one `sendall`, they are run as a single batch under the server lock.
+        """
+        if not self._server.connected or self._killed:
+            raise self._connection_error_class(msgs.CONNECTION_ERROR_MSG)
+        with self._server.lock:
+            self._start_batch()
+            for fields in commands:
+                self._process_command(fields)
+
+    def _scan(self, keys: ScanIndex, cursor: int, *args: bytes) -> list[bytes | list[bytes]]:
         """This is the basis of most of the ``scan`` methods.
 
-        This implementation is KNOWN to be un-performant, as it requires grabbing the full set of keys over which
-        we are investigating subsets.
+        `keys` is the `ScanIndex` of the scanned collection, and the cursor is a position in it, so a page only costs
+        the number of elements it visits.
 
         The SCAN command, and the other commands in the SCAN family, are able to provide to the user a set of
         guarantees associated with full iterations.
@@ -549,35 +746,27 @@ class BaseFakeSocket:
         if count is not None and count <= 0:
             raise SimpleError(msgs.SYNTAX_ERROR_MSG)
         count = 10 if count is None else count
-        data = sorted(keys)
-        bits_len = (len(keys) - 1).bit_length()
-        cursor = bin_reverse(cursor, bits_len)
-        if cursor >= len(keys):
-            return [b"0", []]
-        result_cursor = cursor + count
-        result_data = []
+        result_cursor, data = keys.scan(cursor, count)
 
-        regex = compile_pattern(pattern) if pattern is not None else None
+        matcher = pattern_matcher(pattern) if pattern is not None else None
 
-        def match_key(key: bytes) -> bool | Match[bytes] | None:
+        def match_key(key: bytes) -> Any:
             if isinstance(key, str):
                 key = key.encode("utf-8")
-            return regex.match(key) if regex is not None else True
+            return matcher(key) if matcher is not None else True
 
         def match_type(key: bytes) -> bool:
             return _type is None or casematch(BaseFakeSocket._key_value_type(self._db[key]).value, _type)
 
+        result_data = []
         if pattern is not None or _type is not None:
-            for val in itertools.islice(data, cursor, cursor + count):
-                compare_val = val[0] if isinstance(val, tuple) else val
-                if match_key(compare_val) and match_type(compare_val):
+            for val in data:
+                if match_key(val) and match_type(val):
                     result_data.append(val)
         else:
-            result_data = data[cursor : cursor + count]
+            result_data = data
 
-        if result_cursor >= len(data):
-            result_cursor = 0
-        return [str(bin_reverse(result_cursor, bits_len)).encode(), result_data]
+        return [str(result_cursor).encode(), result_data]
 
     def _ttl(self, key: CommandItem, scale: float) -> int:
         if not key:
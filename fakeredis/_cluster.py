@@ -0,0 +1,202 @@
+"""Hash-slot cluster mode: the keyspace is partitioned over several `FakeServer` shards.
+
+Every shard serves a contiguous range of the 16384 hash slots, like a redis cluster without replicas would after
+`redis-cli --cluster create`. Commands whose keys belong to another shard are answered with a MOVED error, and
+commands whose keys hash to different slots with a CROSSSLOT error, so cluster clients work against it unchanged.
+
+The shards either live in the current process (`FakeRedisCluster`), or each in its own process behind a
+`TcpFakeServer`:
+
+    python -m fakeredis._cluster 127.0.0.1:7000 127.0.0.1:7001 127.0.0.1:7002
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import hashlib
+import subprocess
+import sys
+import weakref
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from redis.cluster import RedisCluster
+
+from . import _msgs as msgs
+from ._connection import FakeRedisConnection
+from ._hash_slot import CLUSTER_SLOTS, key_hash_slot
+from ._helpers import SimpleError
+from ._server import FakeServer
+from ._tcp_server import TcpFakeServer
+from ._typing import ServerType, VersionType
+
+DEFAULT_ADDRESSES = (("127.0.0.1", 7000), ("127.0.0.1", 7001), ("127.0.0.1", 7002))
+
+
+@dataclass(eq=False)
+class ClusterNode:
+    """A shard of a `FakeCluster`, serving the hash slots `first_slot` to `last_slot` (inclusive).
+
+    `server` is None for the shards served by other processes.
+    """
+
+    host: str
+    port: int
+    first_slot: int
+    last_slot: int
+    server: FakeServer | None
+    cluster: FakeCluster = field(repr=False)
+
+    @property
+    def node_id(self) -> str:
+        # Derived from the address, so every process launched with the same layout agrees on it
+        return hashlib.sha1(f"{self.host}:{self.port}".encode()).hexdigest()
+
+    def check_keys(self, keys: Sequence[bytes]) -> None:
+        """Raise the error a cluster node replies with when it cannot serve a command on `keys`."""
+        if not keys:
+            return
+        slot = key_hash_slot(keys[0])
+        for key in keys[1:]:
+            if key_hash_slot(key) != slot:
+                raise SimpleError(msgs.CLUSTER_CROSSSLOT_MSG)
+        if not self.first_slot <= slot <= self.last_slot:
+            owner = self.cluster.node_for_slot(slot)
+            raise SimpleError(msgs.CLUSTER_MOVED_MSG.format(slot, owner.host, owner.port))
+
+
+# Nodes of the clusters in this process by address, so connections to a node's address reach its server
+_nodes: weakref.WeakValueDictionary[tuple[str, int], ClusterNode] = weakref.WeakValueDictionary()
+
+
+class FakeCluster:
+    """A cluster of `FakeServer` shards, the hash slots being split evenly between them in order."""
+
+    def __init__(
+        self,
+        addresses: Sequence[tuple[str, int]] = DEFAULT_ADDRESSES,
+        version: VersionType = (8,),
+        server_type: ServerType = "redis",
+        shard: int | None = None,
+    ) -> None:
+        """
+        :param addresses: The (host, port) of every shard, which clients are redirected to.
+        :param version: The version of the servers.
+        :param server_type: The type of the servers (redis, dragonfly, valkey).
+        :param shard: Only create the server of this shard, the others being served by other processes.
+        """
+        if not 0 < len(addresses) <= CLUSTER_SLOTS:
+            raise ValueError(f"A cluster needs between 1 and {CLUSTER_SLOTS} shards")
+        if shard is not None and not 0 <= shard < len(addresses):
+            raise ValueError(f"No shard {shard} in a cluster of {len(addresses)} shards")
+        self.nodes: list[ClusterNode] = []
+        for i, (host, port) in enumerate(addresses):
+            server = FakeServer(version=version, server_type=server_type) if shard in (None, i) else None
+            node = ClusterNode(
+                host,
+                int(port),
+                first_slot=i * CLUSTER_SLOTS // len(addresses),
+                last_slot=(i + 1) * CLUSTER_SLOTS // len(addresses) - 1,
+                server=server,
+                cluster=self,
+            )
+            self.nodes.append(node)
+            if server is not None:
+                server.cluster_node = node
+                _nodes[(node.host, node.port)] = node
+        self._first_slots = [node.first_slot for node in self.nodes]
+
+    def node_for_slot(self, slot: int) -> ClusterNode:
+        return self.nodes[bisect.bisect_right(self._first_slots, slot) - 1]
+
+    def node_for_key(self, key: bytes) -> ClusterNode:
+        return self.node_for_slot(key_hash_slot(key))
+
+    def tcp_server(self, shard: int) -> TcpFakeServer:
+        """Return a `TcpFakeServer` serving a shard on its address."""
+        node = self.nodes[shard]
+        if node.server is None:
+            raise ValueError(f"Shard {shard} is served by another process")
+        return TcpFakeServer((node.host, node.port), fake_server=node.server)
+
+
+class FakeClusterConnection(FakeRedisConnection):
+    """Connection to a node of a `FakeCluster` in this process, found by the address it is created with."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        if kwargs.get("server") is None:
+            node = _nodes.get((kwargs.get("host", "localhost"), int(kwargs.get("port", 6379))))
+            if node is not None:
+                kwargs["server"] = node.server
+                self.server_key = f"{node.host}:{node.port}"
+        super().__init__(*args, **kwargs)
+
+
+class FakeRedisCluster(RedisCluster):
+    """A `redis.cluster.RedisCluster` client connected to a `FakeCluster` in this process."""
+
+    def __init__(self, cluster: FakeCluster | None = None, **kwargs: Any) -> None:
+        """
+        :param cluster: The cluster to connect to, a new 3 shards cluster by default.
+        :param kwargs: Arguments of `RedisCluster`. The startup node is the first shard unless `host` and `port` are
+            given.
+        """
+        self.fake_cluster = cluster if cluster is not None else FakeCluster()
+        host = kwargs.pop("host", self.fake_cluster.nodes[0].host)
+        port = kwargs.pop("port", self.fake_cluster.nodes[0].port)
+        # Nodes are only created with the connection class of the client when it is created from a URL
+        kwargs.setdefault("url", f"redis://{host}:{port}")
+        kwargs.setdefault("connection_class", FakeClusterConnection)
+        super().__init__(**kwargs)
+
+
+def _parse_address(address: str) -> tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def launch_shards(addresses: Sequence[str], *extra_args: str) -> list[subprocess.Popen[bytes]]:
+    """Start one process per shard of the cluster laid out over `addresses` (`host:port` strings)."""
+    return [
+        subprocess.Popen([sys.executable, "-m", "fakeredis._cluster", *addresses, "--shard", str(i), *extra_args])
+        for i in range(len(addresses))
+    ]
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m fakeredis._cluster", description="Serve a fake redis cluster, one process per shard."
+    )
+    parser.add_argument("addresses", nargs="+", help="host:port of every shard, in slot order")
+    parser.add_argument("--shard", type=int, help="only serve this shard in the current process")
+    parser.add_argument("--server-type", default="redis", choices=("redis", "dragonfly", "valkey"))
+    parser.add_argument("--version", default="8", help="version of the servers, e.g. 7.4")
+    args = parser.parse_args(argv)
+
+    if args.shard is None:
+        processes = launch_shards(args.addresses, "--server-type", args.server_type, "--version", args.version)
+        try:
+            for process in processes:
+                process.wait()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+        return
+
+    version = tuple(int(x) for x in args.version.split("."))
+    cluster = FakeCluster(
+        [_parse_address(a) for a in args.addresses], version=version, server_type=args.server_type, shard=args.shard
+    )
+    server = cluster.tcp_server(args.shard)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,7 @@ import functools
 import math
 import re
 from collections.abc import Collection, Sequence
-from typing import Any, Callable
+from typing import Any, Callable, Tuple
 
 from . import _msgs as msgs
 from ._helpers import Database, SimpleError, null_terminate
@@ -37,7 +37,7 @@ class Item:
 
     def __init__(self, value: Any) -> None:
         self.value = value
-        self.expireat = None
+        self.expireat: float | None = None
 
 
 class CommandItem:
@@ -93,6 +93,10 @@ class CommandItem:
     def is_modified(self) -> bool:
         return self._modified or self._expireat_modified
 
+    @property
+    def expireat_modified(self) -> bool:
+        return self._expireat_modified
+
     def writeback(self, remove_empty_val: bool = True) -> None:
         if self._modified:
             self.db.notify_watch(self.key)
@@ -101,11 +105,16 @@ class CommandItem:
                 return
             item = self.db.setdefault(self.key, Item(None))
             item.value = self.value
-            item.expireat = self.expireat
+            if item.expireat != self.expireat:
+                item.expireat = self.expireat
+                self.db.track_expiry(self.key, self.expireat)
             return
 
         if self._expireat_modified and self.key in self.db:
-            self.db[self.key].expireat = self.expireat
+            item = self.db[self.key]
+            if item.expireat != self.expireat:
+                item.expireat = self.expireat
+                self.db.track_expiry(self.key, self.expireat)
 
     def __bool__(self) -> bool:
         return bool(self._value) or isinstance(self._value, bytes)
@@ -276,6 +285,16 @@ class StringTest(RedisType):
             raise SimpleError(msgs.INVALID_MIN_MAX_STR_MSG)
 
 
+# Argument plans are cached for commands called with up to this many arguments. Longer calls (e.g. a huge MSET)
+# are rare enough per length that caching them would only grow memory.
+_MAX_CACHED_PLAN_ARGS = 32
+
+# A plan for a given number of arguments: the first pass (index, decoder, missing key return value) in argument
+# order, and the key positions with their `Key` markers.
+# Evaluated at runtime, so typing aliases are used to remain importable on Python 3.8.
+_ArgsPlan = Tuple[Tuple[Tuple[int, Any, Any], ...], Tuple[Tuple[int, Key], ...]]
+
+
 class Signature:
     def __init__(
         self,
@@ -294,9 +313,12 @@ class Signature:
         self.flags = set(flags)
         self.command_args = args
         self.server_types: set[ServerType] = set(server_types)
+        self._create_missing = msgs.FLAG_DO_NOT_CREATE not in self.flags
+        # Number of arguments => plan, only holding argument counts that passed the arity check
+        self._plans: dict[int, _ArgsPlan] = {}
 
     def check_arity(self, args: Sequence[Any], version: VersionType) -> None:
-        if len(args) == len(self.fixed):
+        if len(args) in self._plans or len(args) == len(self.fixed):
             return
         delta = len(args) - len(self.fixed)
         if delta < 0 or not self.repeat:
@@ -306,6 +328,35 @@ class Signature:
             msg = msgs.WRONG_ARGS_MSG7 if version >= (7,) else msgs.WRONG_ARGS_MSG6.format(self.name)
             raise SimpleError(msg)
 
+    def _compile_plan(self, n_args: int) -> _ArgsPlan:
+        """Resolve the argument types for `n_args` arguments into the work done by `apply`."""
+        types = list(self.fixed)
+        types.extend([self.repeat[i % len(self.repeat)] for i in range(n_args - len(types))])
+        first_pass: list[tuple[int, Any, Any]] = []
+        keys: list[tuple[int, Key]] = []
+        for i, type_ in enumerate(types):
+            if isinstance(type_, Key):
+                keys.append((i, type_))
+                if type_.missing_return is not Key.UNSPECIFIED:
+                    first_pass.append((i, None, type_.missing_return))
+            elif type_ is not bytes:
+                first_pass.append((i, type_.decode, None))
+        return tuple(first_pass), tuple(keys)
+
+    def _get_plan(self, args: Sequence[Any], version: VersionType) -> _ArgsPlan:
+        plan = self._plans.get(len(args))
+        if plan is None:
+            self.check_arity(args, version)
+            plan = self._compile_plan(len(args))
+            if len(args) <= _MAX_CACHED_PLAN_ARGS:
+                self._plans[len(args)] = plan
+        return plan
+
+    def key_positions(self, args: Sequence[Any], version: VersionType) -> tuple[int, ...]:
+        """Return the positions of the arguments declared as keys in the signature."""
+        _, keys = self._get_plan(args, version)
+        return tuple(i for i, _ in keys)
+
     def apply(
         self, args: Sequence[Any], db: Database, version: VersionType
     ) -> tuple[Any] | tuple[list[Any], list[CommandItem]]:
@@ -313,39 +364,29 @@ class Signature:
         - transformed args and a dict of CommandItems; or
         - a single containing a short-circuit return value
         """
-        self.check_arity(args, version)
-
-        types = list(self.fixed)
-        types.extend([self.repeat[i % len(self.repeat)] for i in range(len(args) - len(types))])
+        first_pass, keys = self._get_plan(args, version)
 
         args_list = list(args)
         # First pass: convert/validate non-keys, and short-circuit on missing keys
-        for i, (arg, type_) in enumerate(zip(args_list, types)):
-            if isinstance(type_, Key):
-                if type_.missing_return is not Key.UNSPECIFIED and arg not in db:
-                    return (type_.missing_return,)
-            elif type_ is not bytes:
-                args_list[i] = type_.decode(
-                    args_list[i],
-                )
+        for i, decode, missing_return in first_pass:
+            if decode is None:
+                if args_list[i] not in db:
+                    return (missing_return,)
+            else:
+                args_list[i] = decode(args_list[i])
 
         # Second pass: read keys and check their types
         command_items: list[CommandItem] = []
-        for i, (arg, type_) in enumerate(zip(args_list, types)):
-            if isinstance(type_, Key):
-                item = db.get(arg)
-                default = None
-                if type_.type_ is not None and item is not None and type(item.value) is not type_.type_:
-                    raise SimpleError(msgs.WRONGTYPE_MSG)
-                if (
-                    msgs.FLAG_DO_NOT_CREATE not in self.flags
-                    and type_.type_ is not None
-                    and item is None
-                    and type_.type_ is not bytes
-                ):
-                    default = type_.type_()
-                args_list[i] = CommandItem(arg, db, item, default=default)
-                command_items.append(args_list[i])
+        for i, type_ in keys:
+            arg = args_list[i]
+            item = db.get(arg)
+            default = None
+            if type_.type_ is not None and item is not None and type(item.value) is not type_.type_:
+                raise SimpleError(msgs.WRONGTYPE_MSG)
+            if self._create_missing and type_.type_ is not None and item is None and type_.type_ is not bytes:
+                default = type_.type_()
+            args_list[i] = CommandItem(arg, db, item, default=default)
+            command_items.append(args_list[i])
 
         return args_list, command_items
 
@@ -2,8 +2,8 @@ from __future__ import annotations
 
 import queue
 import warnings
-from collections.abc import Sequence
-from typing import Any
+from collections.abc import Iterable, Sequence
+from typing import Any, List
 
 import redis
 
@@ -85,6 +85,49 @@ class FakeRedisConnection(FakeBaseConnection, redis.Connection):
     _connection_error_class = redis.ConnectionError
 
 
+class _TokenizedCommands(List[List[bytes]]):
+    """Commands "packed" by FakeDirectConnection: the fields of each command, instead of RESP bytes."""
+
+
+class FakeDirectConnection(FakeRedisConnection):
+    """Connection that hands commands straight to the fake server.
+
+    The arguments are only encoded to bytes: the commands are neither serialized to RESP nor parsed back, and the
+    responses are read as the Python objects the server produced. Use it with
+    `FakeRedis(connection_class=FakeDirectConnection)` when the protocol itself is not under test.
+    """
+
+    def _tokenize(self, args: Sequence[Any]) -> list[bytes]:
+        # Like redis-py's packer, split command names such as "CONFIG GET" into their words
+        if isinstance(args[0], str) and " " in args[0]:
+            args = tuple(args[0].encode().split()) + tuple(args[1:])
+        encode = self.encoder.encode
+        return [bytes(encode(arg)) for arg in args]  # type: ignore[no-untyped-call]
+
+    def pack_command(self, *args: Any) -> _TokenizedCommands:
+        return _TokenizedCommands([self._tokenize(args)])
+
+    def pack_commands(self, commands: Iterable[Sequence[Any]]) -> _TokenizedCommands:
+        return _TokenizedCommands(self._tokenize(args) for args in commands)
+
+    def send_command(self, *args: Any, **kwargs: Any) -> None:
+        self.send_packed_command(self.pack_command(*args), check_health=kwargs.get("check_health", True))
+
+    def send_packed_command(self, command: Any, check_health: bool = True) -> None:
+        if not isinstance(command, _TokenizedCommands):
+            super().send_packed_command(command, check_health)  # type: ignore[no-untyped-call]
+            return
+        if not self._sock:
+            self.connect()
+        if check_health:
+            self.check_health()  # type: ignore[no-untyped-call]
+        try:
+            self._sock.run_commands(command)  # type: ignore[attr-defined]
+        except BaseException:
+            self.disconnect()  # type: ignore[no-untyped-call]
+            raise
+
+
 def FakeConnection(*args: Any, **kwargs: Any) -> FakeRedisConnection:
     warnings.warn("FakeConnection is deprecated. Use FakeRedisConnection instead", DeprecationWarning, 2)
     return FakeRedisConnection(*args, **kwargs)
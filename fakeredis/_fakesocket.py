@@ -6,12 +6,14 @@ from fakeredis.commands_mixins import (
     AclCommandsMixin,
     ArrayCommandsMixin,
     BitmapCommandsMixin,
+    ClusterCommandsMixin,
     ConnectionCommandsMixin,
     GenericCommandsMixin,
     GeoCommandsMixin,
     HashCommandsMixin,
     ListCommandsMixin,
     PubSubCommandsMixin,
+    ReplicationCommandsMixin,
     ScriptingCommandsMixin,
     ServerCommandsMixin,
     SetCommandsMixin,
@@ -63,6 +65,8 @@ class FakeSocket(
     DragonflyCommandsMixin,
     AclCommandsMixin,
     VectorSetCommandsMixin,
+    ClusterCommandsMixin,
+    ReplicationCommandsMixin,
 ):
     def __init__(
         self,
@@ -0,0 +1,89 @@
+"""Mapping of keys to the hash slots of a redis cluster."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from ._commands import Int, Signature
+from ._helpers import SimpleError
+from ._typing import VersionType
+
+CLUSTER_SLOTS = 16384
+
+
+def _crc16_table() -> list[int]:
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return table
+
+
+_CRC16_TABLE = _crc16_table()
+
+
+def crc16(data: bytes) -> int:
+    """CRC16-XMODEM, the checksum redis cluster uses to map keys to hash slots."""
+    crc = 0
+    for byte in data:
+        crc = ((crc << 8) & 0xFF00) ^ _CRC16_TABLE[(crc >> 8) ^ byte]
+    return crc
+
+
+def key_hash_slot(key: bytes) -> int:
+    """Return the hash slot of a key. Only the part inside the first non-empty `{...}` hash tag is hashed."""
+    start = key.find(b"{")
+    if start >= 0:
+        end = key.find(b"}", start + 1)
+        if end > start + 1:
+            key = key[start + 1 : end]
+    return crc16(key) & (CLUSTER_SLOTS - 1)
+
+
+# Commands taking their keys after a `numkeys` argument, by position of that argument
+_NUMKEYS_INDEX = {
+    "eval": 1,
+    "evalsha": 1,
+    "eval_ro": 1,
+    "evalsha_ro": 1,
+    "fcall": 1,
+    "fcall_ro": 1,
+    "zunionstore": 1,
+    "zinterstore": 1,
+    "zdiffstore": 1,
+    "zunion": 0,
+    "zinter": 0,
+    "zdiff": 0,
+    "zintercard": 0,
+    "sintercard": 0,
+    "lmpop": 0,
+    "zmpop": 0,
+    "blmpop": 1,
+    "bzmpop": 1,
+}
+# Commands taking a list of keys followed by a timeout
+_BLOCKING_POPS = {"blpop", "brpop", "bzpopmin", "bzpopmax", "brpoplpush"}
+
+
+def command_keys(sig: Signature, args: Sequence[bytes], version: VersionType) -> list[bytes]:
+    """Return the keys of a command, from its signature and from the arguments telling where its keys are."""
+    keys = [args[i] for i in sig.key_positions(args, version)]
+    name = sig.name
+    if name in _NUMKEYS_INDEX:
+        index = _NUMKEYS_INDEX[name]
+        try:
+            numkeys = Int.decode(args[index])
+        except (IndexError, SimpleError):
+            return keys  # The command itself reports the error
+        keys.extend(args[index + 1 : index + 1 + max(numkeys, 0)])
+    elif name in _BLOCKING_POPS:
+        keys.extend(args[:-1])
+    elif name in ("xread", "xreadgroup"):
+        for i, arg in enumerate(args):
+            if arg.upper() == b"STREAMS":
+                streams = args[i + 1 :]
+                keys.extend(streams[: len(streams) // 2])
+                break
+    return keys
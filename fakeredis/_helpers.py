@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import bisect
+import heapq
+import queue
+import random
 import re
 import threading
 import time
-import weakref
-from collections import defaultdict
-from collections.abc import Iterator, MutableMapping
+from collections import defaultdict, deque
+from collections.abc import Iterable, Iterator, MutableMapping
+from functools import lru_cache
 from typing import Any, AnyStr, Callable
 
 
@@ -39,6 +43,9 @@ class NoResponse:
 OK = SimpleString(b"OK")
 QUEUED = SimpleString(b"QUEUED")
 BGSAVE_STARTED = SimpleString(b"Background saving started")
+BGSAVE_SCHEDULED = SimpleString(b"Background saving scheduled")
+BGREWRITEAOF_STARTED = SimpleString(b"Background append only file rewriting started")
+BGREWRITEAOF_SCHEDULED = SimpleString(b"Background append only file rewriting scheduled")
 
 
 def current_time() -> int:
@@ -73,6 +80,10 @@ def asbytes(value: AnyStr) -> bytes:
     return value
 
 
+_GLOB_SPECIAL_CHARS = re.compile(rb"[*?[\\]")
+
+
+@lru_cache(maxsize=1024)
 def compile_pattern(pattern_bytes: bytes) -> re.Pattern:  # type: ignore
     """Compile a glob pattern (e.g., for keys) to a `bytes` regex.
 
@@ -143,23 +154,267 @@ def compile_pattern(pattern_bytes: bytes) -> re.Pattern:  # type: ignore
     return re.compile(regex, flags=re.DOTALL)
 
 
+def glob_literal_prefix(pattern_bytes: bytes) -> bytes:
+    """Return the part of a glob pattern before its first special character, which every match starts with."""
+    special = _GLOB_SPECIAL_CHARS.search(pattern_bytes)
+    return pattern_bytes if special is None else pattern_bytes[: special.start()]
+
+
+@lru_cache(maxsize=1024)
+def pattern_matcher(pattern_bytes: bytes) -> Callable[[bytes], Any]:
+    """Return a function telling whether a key matches a glob pattern.
+
+    Literal patterns and `prefix*` patterns are answered with a comparison or `startswith` instead of a regex.
+    """
+    prefix = glob_literal_prefix(pattern_bytes)
+    rest = pattern_bytes[len(prefix) :]
+    if not rest:
+        return lambda key: key == prefix
+    if rest.strip(b"*") == b"":
+        return lambda key: key.startswith(prefix)
+    return compile_pattern(pattern_bytes).match
+
+
+class PatternIndex:
+    """A set of glob patterns, to find those matching a string without trying each of them.
+
+    Literal patterns are kept in a set, `prefix*` patterns in a trie of their prefixes, and the other patterns with
+    their matcher, compiled when the pattern is added. Matches are returned in the order the patterns were added.
+    """
+
+    __slots__ = ("_added", "_literals", "_order", "_others", "_trie")
+
+    def __init__(self) -> None:
+        self._added = 0
+        self._literals: set[bytes] = set()
+        self._order: dict[bytes, int] = {}  # pattern => value of `_added` when it was added
+        self._others: dict[bytes, Callable[[bytes], Any]] = {}
+        # Each node is [children by byte, patterns whose prefix ends at this node]
+        self._trie: list[Any] = [{}, []]
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, pattern: bytes) -> bool:
+        return pattern in self._order
+
+    def add(self, pattern: bytes) -> None:
+        if pattern in self._order:
+            return
+        self._order[pattern] = self._added
+        self._added += 1
+        prefix = glob_literal_prefix(pattern)
+        rest = pattern[len(prefix) :]
+        if not rest:
+            self._literals.add(pattern)
+        elif rest.strip(b"*") == b"":
+            node = self._trie
+            for char in prefix:
+                node = node[0].setdefault(char, [{}, []])
+            node[1].append(pattern)
+        else:
+            self._others[pattern] = pattern_matcher(pattern)
+
+    def discard(self, pattern: bytes) -> None:
+        if self._order.pop(pattern, None) is None:
+            return
+        prefix = glob_literal_prefix(pattern)
+        rest = pattern[len(prefix) :]
+        if not rest:
+            self._literals.discard(pattern)
+        elif rest.strip(b"*") == b"":
+            path = [self._trie]
+            for char in prefix:
+                path.append(path[-1][0][char])
+            path[-1][1].remove(pattern)
+            for char, parent, node in zip(reversed(prefix), reversed(path[:-1]), reversed(path[1:])):
+                if node[0] or node[1]:
+                    break
+                del parent[0][char]
+        else:
+            del self._others[pattern]
+
+    def match(self, value: bytes) -> list[bytes]:
+        """Return the patterns matching `value`."""
+        matches = [value] if value in self._literals else []
+        node = self._trie
+        matches.extend(node[1])
+        for char in value:
+            node = node[0].get(char)
+            if node is None:
+                break
+            matches.extend(node[1])
+        matches.extend(pattern for pattern, match in self._others.items() if match(value))
+        if len(matches) > 1:
+            matches.sort(key=self._order.__getitem__)
+        return matches
+
+
+# The event classes enabled by the `A` flag of `notify-keyspace-events`
+KEYSPACE_EVENT_CLASSES_ALL = b"g$lshzxetd"
+
+
+@lru_cache(maxsize=64)
+def parse_keyspace_events(flags: bytes) -> tuple[bool, bool, bytes]:
+    """Parse a `notify-keyspace-events` value.
+
+    :return: Whether keyspace (`K`) and keyevent (`E`) notifications are enabled, and the enabled event classes.
+    """
+    return b"K" in flags, b"E" in flags, flags.replace(b"A", KEYSPACE_EVENT_CLASSES_ALL)
+
+
+_TOMBSTONE = object()
+
+
+class ScanIndex:
+    """The keys of a collection in insertion order, to implement SCAN cursors without sorting the collection.
+
+    Each added key gets a position larger than all previous ones, and a cursor is the position to resume from.
+    Removed keys leave a tombstone behind, so positions stay valid while iterating. Tombstones are dropped once they
+    outnumber the keys. This keeps the guarantees of SCAN: a key present during a whole iteration is returned, and a
+    key removed before the iteration reaches it is not.
+    """
+
+    __slots__ = ("_indices", "_keys", "_next_position", "_positions", "_tombstones")
+
+    def __init__(self, keys: Iterable[Any] = ()) -> None:
+        self._indices: dict[Any, int] = {}  # key => index in _keys
+        self._keys: list[Any] = []
+        self._positions: list[int] = []  # Increasing, _positions[i] is the position of _keys[i]
+        self._next_position = 1  # Cursor 0 starts an iteration
+        self._tombstones = 0
+        for key in keys:
+            self.add(key)
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return ScanIndex, (list(self._indices),)
+
+    def add(self, key: Any) -> None:
+        if key in self._indices:
+            return
+        self._indices[key] = len(self._keys)
+        self._keys.append(key)
+        self._positions.append(self._next_position)
+        self._next_position += 1
+
+    def discard(self, key: Any) -> None:
+        index = self._indices.pop(key, None)
+        if index is None:
+            return
+        self._keys[index] = _TOMBSTONE
+        self._tombstones += 1
+        if self._tombstones > len(self._indices) + 32:
+            self._compact()
+
+    def clear(self) -> None:
+        self._indices.clear()
+        self._keys.clear()
+        self._positions.clear()
+        self._tombstones = 0
+
+    def _compact(self) -> None:
+        live = [i for i, key in enumerate(self._keys) if key is not _TOMBSTONE]
+        self._keys = [self._keys[i] for i in live]
+        self._positions = [self._positions[i] for i in live]
+        self._indices = {key: i for i, key in enumerate(self._keys)}
+        self._tombstones = 0
+
+    def scan(self, cursor: int, count: int) -> tuple[int, list[Any]]:
+        """Return the cursor of the next page, 0 when done, and up to `count` keys from position `cursor`."""
+        index = bisect.bisect_left(self._positions, cursor)
+        keys: list[Any] = []
+        while index < len(self._keys) and len(keys) < count:
+            key = self._keys[index]
+            if key is not _TOMBSTONE:
+                keys.append(key)
+            index += 1
+        return (self._positions[index] if index < len(self._keys) else 0), keys
+
+    def random_key(self) -> Any:
+        """Return a random key, or None if there are none."""
+        if not self._indices:
+            return None
+        while True:  # Tombstones are about half of the slots at most (see discard)
+            key = random.choice(self._keys)
+            if key is not _TOMBSTONE:
+                return key
+
+
 class Database(MutableMapping):  # type: ignore
     def __init__(self, lock: threading.Lock | None, *args: Any, **kwargs: Any) -> None:
         self._dict: dict[bytes, Any] = dict(*args, **kwargs)
         self.time = 0.0
-        # key to the set of connections
-        self._watches: dict[bytes, weakref.WeakSet[Any]] = defaultdict(weakref.WeakSet)
+        self.scan_index = ScanIndex(self._dict)
+        # Min-heap of (expireat, key) for the keys with an expiry. Entries are not removed when a key is deleted or
+        # its expiry changes: they are skipped when popped, if they no longer match the key's item.
+        self._expiry_heap: list[tuple[float, bytes]] = []
+        self._rebuild_expiry_index()
+        # Watched key to [modification version, number of watches], so writes to keys nobody watches cost nothing
+        self._watched: dict[bytes, list[int]] = {}
         self.condition = threading.Condition(lock)
-        self._change_callbacks: set[Callable[[], None]] = set()
+        # key to the callbacks waking up the clients blocked on it
+        self._blocked_clients: dict[bytes, set[Callable[[], None]]] = defaultdict(set)
+        # Set during `writeback_all`, to wake each blocked client once all the items are written back
+        self._pending_wakeups: set[Callable[[], None]] | None = None
+        # Called with every key removed because it expired, set by the server to send keyspace notifications
+        self.expire_callback: Callable[[bytes], None] | None = None
+        # Set while a BGSAVE writes the items of this database, see `fakeredis._rdb.DatabaseSnapshot`
+        self.snapshot: Any = None
 
     def swap(self, other: Database) -> None:
         self._dict, other._dict = other._dict, self._dict
+        self.snapshot, other.snapshot = other.snapshot, self.snapshot
+        self._expiry_heap, other._expiry_heap = other._expiry_heap, self._expiry_heap
+        self.scan_index, other.scan_index = other.scan_index, self.scan_index
         self.time, other.time = other.time, self.time
 
+    def track_expiry(self, key: bytes, expireat: float | None) -> None:
+        """Record that the item stored at `key` now expires at `expireat`.
+
+        Must be called whenever the expiry of an item in the database is changed in place.
+        """
+        if expireat is None:
+            return
+        heapq.heappush(self._expiry_heap, (expireat, key))
+        # Keys whose expiry keeps being pushed back leave stale entries behind
+        if len(self._expiry_heap) > 2 * len(self._dict) + 64:
+            self._rebuild_expiry_index()
+
+    def _rebuild_expiry_index(self) -> None:
+        self._expiry_heap = [(item.expireat, key) for key, item in self._dict.items() if item.expireat is not None]
+        heapq.heapify(self._expiry_heap)
+
     def notify_watch(self, key: bytes) -> None:
-        for sock in self._watches.get(key, set()):
-            sock.notify_watch()
-        self.wake_all()
+        watched = self._watched.get(key)
+        if watched is not None:
+            watched[0] += 1
+        callbacks = self._blocked_clients.get(key)
+        if not callbacks:
+            return
+        if self._pending_wakeups is not None:
+            self._pending_wakeups.update(callbacks)
+            return
+        for callback in list(callbacks):
+            callback()
+
+    def writeback_all(self, command_items: Iterable[Any], remove_empty_val: bool = True) -> None:
+        """Write back the items of a command, then wake each client blocked on the changed keys once."""
+        if self._pending_wakeups is not None:  # Already in a batch, which will wake the clients
+            for command_item in command_items:
+                command_item.writeback(remove_empty_val=remove_empty_val)
+            return
+        pending: set[Callable[[], None]] = set()
+        self._pending_wakeups = pending
+        try:
+            for command_item in command_items:
+                command_item.writeback(remove_empty_val=remove_empty_val)
+        finally:
+            self._pending_wakeups = None
+        for callback in pending:
+            callback()
 
     def wake_all(self) -> None:
         """Wake every client blocked on this database, without reporting a key change.
@@ -167,58 +422,98 @@ class Database(MutableMapping):  # type: ignore
         Used by CLIENT UNBLOCK: woken clients re-check their own state and go back to
         sleep unless they were the target.
         """
-        self.condition.notify_all()
-        for callback in self._change_callbacks:
+        for callback in set().union(*self._blocked_clients.values()):
             callback()
 
-    def add_watch(self, key: bytes, sock: Any) -> None:
-        self._watches[key].add(sock)
-
-    def remove_watch(self, key: bytes, sock: Any) -> None:
-        watches = self._watches[key]
-        watches.discard(sock)
-        if not watches:
-            del self._watches[key]
-
-    def add_change_callback(self, callback: Callable[[], None]) -> None:
-        self._change_callbacks.add(callback)
-
-    def remove_change_callback(self, callback: Callable[[], None]) -> None:
-        self._change_callbacks.remove(callback)
+    def add_watch(self, key: bytes) -> int:
+        """Watch `key`, returning its modification version to compare with `watch_version` later."""
+        watched = self._watched.setdefault(key, [0, 0])
+        watched[1] += 1
+        return watched[0]
+
+    def watch_version(self, key: bytes) -> int:
+        """Return the modification version of a watched key."""
+        return self._watched[key][0]
+
+    def remove_watch(self, key: bytes) -> None:
+        watched = self._watched.get(key)
+        if watched is None:
+            return
+        watched[1] -= 1
+        if not watched[1]:
+            del self._watched[key]
+
+    def add_blocked_client(self, keys: Iterable[bytes], callback: Callable[[], None]) -> None:
+        """Register a client blocked on `keys`, so that `callback` is called whenever one of them changes."""
+        for key in keys:
+            self._blocked_clients[key].add(callback)
+
+    def remove_blocked_client(self, keys: Iterable[bytes], callback: Callable[[], None]) -> None:
+        for key in keys:
+            callbacks = self._blocked_clients.get(key)
+            if callbacks is None:
+                continue
+            callbacks.discard(callback)
+            if not callbacks:
+                del self._blocked_clients[key]
 
     def clear(self) -> None:
-        for key in self:
-            self.notify_watch(key)
+        for key, watched in self._watched.items():
+            if key in self:
+                watched[0] += 1
         self._dict.clear()
+        self._expiry_heap.clear()
+        self.scan_index.clear()
 
     def expired(self, item: Any) -> bool:
         return item.expireat is not None and item.expireat < self.time
 
-    def _remove_expired(self) -> None:
-        for key in list(self._dict):
-            item = self._dict[key]
-            if self.expired(item):
-                del self._dict[key]
+    def remove_expired(self, limit: int | None = None) -> int:
+        """Remove expired keys, in time proportional to the number of entries popped from the expiry index.
+
+        :param limit: The maximum number of keys to remove, or None to remove every expired key.
+        :return: The number of keys removed.
+        """
+        heap = self._expiry_heap
+        removed = 0
+        while heap and heap[0][0] < self.time and (limit is None or removed < limit):
+            expireat, key = heapq.heappop(heap)
+            item = self._dict.get(key)
+            if item is not None and item.expireat == expireat:
+                del self[key]
+                removed += 1
+                self._on_expired(key)
+        return removed
+
+    def _on_expired(self, key: bytes) -> None:
+        if self.expire_callback is not None:
+            self.expire_callback(key)
 
     def __getitem__(self, key: bytes) -> Any:
         item = self._dict[key]
+        if self.snapshot is not None:
+            self.snapshot.touch(key)
         if self.expired(item):
-            del self._dict[key]
+            del self[key]
+            self._on_expired(key)
             raise KeyError(key)
         return item
 
     def __setitem__(self, key: bytes, value: Any) -> None:
         self._dict[key] = value
+        self.scan_index.add(key)
+        self.track_expiry(key, value.expireat)
 
     def __delitem__(self, key: bytes) -> None:
         del self._dict[key]
+        self.scan_index.discard(key)
 
     def __iter__(self) -> Iterator[bytes]:
-        self._remove_expired()
+        self.remove_expired()
         return iter(self._dict)
 
     def __len__(self) -> int:
-        self._remove_expired()
+        self.remove_expired()
         return len(self._dict)
 
     # Databases use identity semantics: they are mutable and are keyed by index
@@ -230,19 +525,70 @@ class Database(MutableMapping):  # type: ignore
         return self is other
 
 
-_VALID_RESPONSE_TYPES_RESP2 = (bytes, SimpleString, SimpleError, float, int, list)
-_VALID_RESPONSE_TYPES_RESP3 = (bytes, SimpleString, SimpleError, float, int, list, dict, str)
+class ResponseQueue:
+    """The queue of responses of a fake socket, which readers can wait on without consuming a response.
 
+    Responses are kept in a deque, whose appends and pops are atomic. Readers and writers are usually the same thread,
+    so the condition is only used when a reader is actually waiting for a response.
+    """
 
-def valid_response_type(value: Any, protocol_version: int, nested: bool = False) -> bool:
-    if isinstance(value, NoResponse) and not nested:
-        return True
-    allowed_types = _VALID_RESPONSE_TYPES_RESP2 if protocol_version == 2 else _VALID_RESPONSE_TYPES_RESP3
-    if value is not None and not isinstance(value, allowed_types):
-        return False
-    return not (
-        isinstance(value, list) and any(not valid_response_type(item, protocol_version, True) for item in value)
-    )
+    def __init__(self) -> None:
+        self._items: deque[Any] = deque()
+        self._not_empty = threading.Condition(threading.Lock())
+        self._waiters = 0
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def put(self, item: Any) -> None:
+        self._items.append(item)
+        # A reader registers as a waiter before checking for items, so either it sees this item or it is notified.
+        if self._waiters:
+            with self._not_empty:
+                self._not_empty.notify_all()
+
+    def put_many(self, items: Iterable[Any]) -> None:
+        """Enqueue several responses, waking the waiting readers once."""
+        self._items.extend(items)
+        if self._waiters:
+            with self._not_empty:
+                self._not_empty.notify_all()
+
+    def get_nowait(self) -> Any:
+        try:
+            return self._items.popleft()
+        except IndexError:
+            raise queue.Empty from None
+
+    def get(self, block: bool = True, timeout: float | None = None) -> Any:
+        """Remove and return the oldest response, waiting for one like `queue.Queue.get`."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                return self._items.popleft()
+            except IndexError:
+                if not block:
+                    raise queue.Empty from None
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0 or not self.wait(remaining):
+                raise queue.Empty
+
+    def wait(self, timeout: float | None) -> bool:
+        """Wait up to `timeout` seconds, or forever if it is None, for the queue to be non-empty.
+
+        :return: Whether the queue is non-empty.
+        """
+        if self._items:
+            return True
+        with self._not_empty:
+            self._waiters += 1
+            try:
+                return self._not_empty.wait_for(self._items.__len__, timeout) > 0
+            finally:
+                self._waiters -= 1
 
 
 class FakeSelector:
@@ -250,21 +596,12 @@ class FakeSelector:
         self.sock = sock
 
     def check_can_read(self, timeout: float | None) -> bool:
-        if self.sock.responses.qsize():
+        responses = self.sock.responses
+        if responses.qsize():
             return True
         if timeout is not None and timeout <= 0:
             return False
-
-        # A sleep/poll loop is easier to mock out than messing with condition
-        # variables.
-        start = time.time()
-        while True:
-            if self.sock.responses.qsize():
-                return True
-            time.sleep(0.01)
-            now = time.time()
-            if timeout is not None and now > start + timeout:
-                return False
+        return responses.wait(timeout)  # type: ignore[no-any-return]
 
     @staticmethod
     def check_is_ready_for_command(_: Any) -> bool:
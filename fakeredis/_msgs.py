@@ -72,6 +72,7 @@ LUA_WRONG_NUMBER_ARGS_MSG = "ERR wrong number or type of arguments"
 SCRIPT_ERROR_MSG = "ERR Error running script (call to f_{}): @user_script:?: {}"
 RESTORE_KEY_EXISTS = "BUSYKEY Target key name already exists."
 RESTORE_INVALID_CHECKSUM_MSG = "ERR DUMP payload version or checksum are wrong"
+RESTORE_BAD_DATA_FORMAT_MSG = "ERR Bad data format"
 
 RESTORE_INVALID_TTL_MSG = "ERR Invalid TTL value, must be >= 0"
 JSON_WRONG_REDIS_TYPE = "ERR Existing key has wrong Redis type"
@@ -147,12 +148,38 @@ TIMESERIES_BAD_FILTER_EXPRESSION = "TSDB: failed parsing labels"
 HEXPIRE_NUMFIELDS_DIFFERENT = "The `numfields` parameter must match the number of arguments"
 HEXPIRE_INVALID_TIME_MSG = "ERR invalid expire time, must be >= 0"
 
+CONFIG_SET_INVALID_INT_MSG = (
+    "ERR CONFIG SET failed (possibly related to argument '{}') - argument couldn't be parsed into an integer"
+)
+CONFIG_SET_OUT_OF_RANGE_MSG = (
+    "ERR CONFIG SET failed (possibly related to argument '{}') - argument must be between {} and {} inclusive"
+)
 MISSING_ACLFILE_CONFIG = "ERR This Redis instance is not configured to use an ACL file. You may want to specify users via the ACL SETUSER command and then issue a CONFIG REWRITE (assuming you have a Redis configuration file set) in order to store users in the Redis configuration."
 
 NO_PERMISSION_ERROR = "NOPERM User {} has no permissions to run the '{}' command"
 NO_PERMISSION_KEY_ERROR = "NOPERM No permissions to access a key"
 NO_PERMISSION_CHANNEL_ERROR = "NOPERM No permissions to access a channel"
 
+CLUSTER_DISABLED_MSG = "ERR This instance has cluster support disabled"
+CLUSTER_CROSSSLOT_MSG = "CROSSSLOT Keys in request don't hash to the same slot"
+CLUSTER_MOVED_MSG = "MOVED {} {}:{}"
+CLUSTER_INVALID_SLOT_MSG = "ERR Invalid slot"
+CLUSTER_INVALID_SLOT_OR_COUNT_MSG = "ERR Invalid slot or number of keys"
+
+READONLY_REPLICA_MSG = "READONLY You can't write against a read only replica."
+WAIT_REPLICA_MSG = (
+    "ERR WAIT cannot be used with replica instances. Please also note that since Redis 4.0 if a replica is "
+    "configured to be writable (which is not the default) writes to replicas are just local and are not propagated."
+)
+
+BGSAVE_IN_PROGRESS_MSG = "ERR Background save already in progress"
+BGSAVE_AOF_REWRITE_IN_PROGRESS_MSG = (
+    "ERR Another child process is active (AOF?): can't BGSAVE right now. "
+    "Use BGSAVE SCHEDULE in order to schedule a BGSAVE whenever possible."
+)
+AOF_REWRITE_IN_PROGRESS_MSG = "ERR Background append only file rewriting already in progress"
+SAVE_FAILED_MSG = "ERR Failed saving the RDB file"
+
 # Command flags
 FLAG_NO_SCRIPT = "s"  # Command not allowed in scripts
 FLAG_LEAVE_EMPTY_VAL = "v"
@@ -0,0 +1,632 @@
+"""Persistence of a `FakeServer` to RDB files, as written by SAVE and BGSAVE, and the DUMP payloads of values.
+
+Strings, lists, sets, hashes and sorted sets are written with the RDB types redis itself loads. Other values (streams,
+the types of the stack modules, JSON documents, and sets and hashes with expiring members) are written as values of a
+module named `fakeredis`, encoded by `fakeredis._value_codec`, which only fakeredis can load back. Besides the types
+written here, the compact encodings redis writes small collections with (listpacks, ziplists and intsets) are loaded.
+
+A DUMP payload is a value as it is written in an RDB file, followed by the RDB version and a checksum, like in redis.
+
+BGSAVE does not hold the server lock while it writes: it takes a `DatabaseSnapshot` of every database, which shares
+the items of the database until they are accessed. The first access to an item by a command encodes it before it can
+change, so the worker thread writing the file sees the dataset as it was when BGSAVE ran.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import threading
+import time
+from collections.abc import Iterator, Mapping
+from typing import IO, TYPE_CHECKING, Any, Callable
+
+from fakeredis import _value_codec
+from fakeredis._commands import Item
+from fakeredis._helpers import Database, current_time
+from fakeredis.model import ExpiringMembersSet, Hash, ZSet
+
+if TYPE_CHECKING:
+    from fakeredis._server import FakeServer
+
+LOGGER = logging.getLogger("fakeredis")
+
+RDB_VERSION = 9
+# The newest RDB version of redis, that of the DUMP payloads of redis 7.4
+RDB_MAX_VERSION = 12
+
+# Value types
+RDB_TYPE_STRING = 0
+RDB_TYPE_LIST = 1
+RDB_TYPE_SET = 2
+RDB_TYPE_ZSET = 3
+RDB_TYPE_HASH = 4
+RDB_TYPE_ZSET_2 = 5
+RDB_TYPE_MODULE_2 = 7
+RDB_TYPE_LIST_ZIPLIST = 10
+RDB_TYPE_SET_INTSET = 11
+RDB_TYPE_ZSET_ZIPLIST = 12
+RDB_TYPE_HASH_ZIPLIST = 13
+RDB_TYPE_LIST_QUICKLIST = 14
+RDB_TYPE_HASH_LISTPACK = 16
+RDB_TYPE_ZSET_LISTPACK = 17
+RDB_TYPE_LIST_QUICKLIST_2 = 18
+RDB_TYPE_SET_LISTPACK = 20
+
+# Special opcodes
+RDB_OPCODE_FUNCTION2 = 245
+RDB_OPCODE_MODULE_AUX = 247
+RDB_OPCODE_IDLE = 248
+RDB_OPCODE_FREQ = 249
+RDB_OPCODE_AUX = 250
+RDB_OPCODE_RESIZEDB = 251
+RDB_OPCODE_EXPIRETIME_MS = 252
+RDB_OPCODE_EXPIRETIME = 253
+RDB_OPCODE_SELECTDB = 254
+RDB_OPCODE_EOF = 255
+
+# Opcodes of the values saved by modules
+RDB_MODULE_OPCODE_EOF = 0
+RDB_MODULE_OPCODE_STRING = 5
+
+# Special string encodings, after a length with its two most significant bits set
+RDB_ENC_INT8 = 0
+RDB_ENC_INT16 = 1
+RDB_ENC_INT32 = 2
+RDB_ENC_LZF = 3
+
+# Nodes of quicklists holding a single element rather than a listpack
+QUICKLIST_NODE_CONTAINER_PLAIN = 1
+
+
+def _module_type_id(name: str, encver: int) -> int:
+    """The 64-bit id redis identifies the values of a module type by: its 9 characters name and encoding version."""
+    charset = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+    type_id = 0
+    for char in name:
+        type_id = (type_id << 6) | charset.index(char)
+    return (type_id << 10) | encver
+
+
+FAKEREDIS_MODULE_ID = _module_type_id("fakeredis", _value_codec.VERSION)
+
+
+def _crc64_tables() -> list[list[int]]:
+    # crc-64-jones, the checksum of RDB files: reflected polynomial 0xad93d23594c935a9. tables[k][i] is the checksum
+    # of the byte i followed by k zero bytes, to process eight bytes per step ("slicing-by-8")
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x95AC9329AC4BC9B5 if crc & 1 else crc >> 1
+        table.append(crc)
+    tables = [table]
+    for _ in range(7):
+        tables.append([(crc >> 8) ^ table[crc & 0xFF] for crc in tables[-1]])
+    return tables
+
+
+_CRC64_TABLES = _crc64_tables()
+
+
+def crc64(data: bytes | memoryview, crc: int = 0) -> int:
+    """Update the checksum `crc` of the previous bytes of a file with `data`."""
+    t0, t1, t2, t3, t4, t5, t6, t7 = _CRC64_TABLES
+    view = memoryview(data)
+    end = len(view) & ~7
+    for (word,) in struct.iter_unpack("<Q", view[:end]):
+        crc ^= word
+        crc = (
+            t7[crc & 0xFF]
+            ^ t6[crc >> 8 & 0xFF]
+            ^ t5[crc >> 16 & 0xFF]
+            ^ t4[crc >> 24 & 0xFF]
+            ^ t3[crc >> 32 & 0xFF]
+            ^ t2[crc >> 40 & 0xFF]
+            ^ t1[crc >> 48 & 0xFF]
+            ^ t0[crc >> 56]
+        )
+    for byte in view[end:]:
+        crc = t0[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return crc
+
+
+def _encode_length(length: int) -> bytes:
+    if length < 1 << 6:
+        return bytes((length,))
+    if length < 1 << 14:
+        return bytes((0x40 | length >> 8, length & 0xFF))
+    if length < 1 << 32:
+        return b"\x80" + struct.pack(">I", length)
+    return b"\x81" + struct.pack(">Q", length)
+
+
+def _encode_string(value: bytes) -> bytes:
+    return _encode_length(len(value)) + value
+
+
+def _encode_value(value: Any, now_ms: int) -> tuple[int, bytes]:
+    """Return the RDB type and payload of a value."""
+    if isinstance(value, bytes):
+        return RDB_TYPE_STRING, _encode_string(value)
+    if isinstance(value, list) and all(type(v) is bytes for v in value):  # Not a JSON array
+        return RDB_TYPE_LIST, _encode_length(len(value)) + b"".join(_encode_string(v) for v in value)
+    if isinstance(value, ExpiringMembersSet) and not any(
+        expireat is not None and expireat >= now_ms for expireat in value._values.values()
+    ):
+        members = [m for m, expireat in value._values.items() if expireat is None]
+        return RDB_TYPE_SET, _encode_length(len(members)) + b"".join(_encode_string(m) for m in members)
+    if isinstance(value, Hash) and not any(expireat >= now_ms for expireat in value._expirations.values()):
+        fields = [(k, v) for k, v in value._values.items() if k not in value._expirations]
+        return RDB_TYPE_HASH, _encode_length(len(fields)) + b"".join(
+            _encode_string(k) + _encode_string(v) for k, v in fields
+        )
+    if isinstance(value, ZSet):
+        scores = list(value.items())
+        return RDB_TYPE_ZSET_2, _encode_length(len(scores)) + b"".join(
+            _encode_string(member) + struct.pack("<d", score) for member, score in scores
+        )
+    return RDB_TYPE_MODULE_2, b"".join(
+        (
+            _encode_length(FAKEREDIS_MODULE_ID),
+            _encode_length(RDB_MODULE_OPCODE_STRING),
+            _encode_string(_value_codec.encode(value)),
+            _encode_length(RDB_MODULE_OPCODE_EOF),
+        )
+    )
+
+
+def encode_entry(key: bytes, item: Item, now: float) -> bytes:
+    """Encode a key of a database with its value and expiry, or return nothing when it already expired."""
+    if item.expireat is not None and item.expireat < now:
+        return b""
+    rdb_type, payload = _encode_value(item.value, int(now * 1000))
+    expiry = b""
+    if item.expireat is not None:
+        expiry = bytes((RDB_OPCODE_EXPIRETIME_MS,)) + struct.pack("<Q", int(item.expireat * 1000))
+    return expiry + bytes((rdb_type,)) + _encode_string(key) + payload
+
+
+def dump_value(value: Any) -> bytes:
+    """Serialize a value to a DUMP payload: its RDB type and encoding, the RDB version, and a checksum."""
+    rdb_type, payload = _encode_value(value, current_time())
+    data = b"".join((bytes((rdb_type,)), payload, struct.pack("<H", RDB_VERSION)))
+    return data + struct.pack("<Q", crc64(data))
+
+
+def check_dump_payload(payload: bytes) -> bool:
+    """Whether a DUMP payload has an RDB version that can be loaded, and the checksum of its content."""
+    if len(payload) < 10:
+        return False
+    version, checksum = struct.unpack_from("<HQ", payload, len(payload) - 10)
+    return bool(version <= RDB_MAX_VERSION and checksum == crc64(memoryview(payload)[:-8]))
+
+
+def restore_value(payload: bytes, db: Database) -> Any:
+    """Deserialize the value of a DUMP payload accepted by `check_dump_payload`, to be stored in `db`.
+
+    Raise `ValueError` if the payload is malformed.
+    """
+    reader = _RdbReader(payload[:-10])
+    try:
+        value = reader.read_value(reader.read_byte(), db)
+    except (IndexError, struct.error) as exc:
+        raise ValueError("Malformed DUMP payload") from exc
+    if reader.pos != len(payload) - 10:
+        raise ValueError("Unexpected data after the value of the DUMP payload")
+    return value
+
+
+class DatabaseSnapshot:
+    """The items of a database at the time of a BGSAVE or BGREWRITEAOF, kept until they are written.
+
+    The items are shared with the database until either the thread writing them, or a command accessing them, takes
+    them (see `Database.__getitem__`). Commands accessing them encode them first, so they are written as they were.
+    """
+
+    def __init__(self, db: Database, now: float, encode: Callable[[bytes, Item, float], bytes] = encode_entry) -> None:
+        self.now = now
+        self._encode = encode
+        self.size = len(db._dict)
+        self._items: dict[bytes, Item] = dict(db._dict)
+        self._encoded: list[bytes] = []
+        self._lock = threading.Lock()
+
+    def touch(self, key: bytes) -> None:
+        """Called before an item of the database is accessed, and may be modified, while the snapshot is written.
+
+        This waits for the thread writing the snapshot if it is encoding the item, which it has already taken.
+        """
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is not None:
+                self._encoded.append(self._encode(key, item, self.now))
+
+    def entries(self) -> Iterator[bytes]:
+        """Encode the entries of the snapshot, to be called once by the thread writing it."""
+        with self._lock:
+            keys = list(self._items)
+        for key in keys:
+            with self._lock:
+                item = self._items.pop(key, None)
+                if item is None:  # Encoded by `touch`
+                    continue
+                entry = self._encode(key, item, self.now)
+            yield entry
+        # Nothing is added to `_encoded` once `_items` is empty
+        yield from self._encoded
+
+
+class _RdbWriter:
+    def __init__(self, f: IO[bytes]) -> None:
+        self._f = f
+        self.checksum = 0
+
+    def write(self, data: bytes) -> None:
+        self._f.write(data)
+        self.checksum = crc64(data, self.checksum)
+
+
+def write_rdb(f: IO[bytes], server: FakeServer, snapshots: Mapping[int, DatabaseSnapshot]) -> None:
+    """Write the RDB file of the snapshots of the databases of `server`."""
+    writer = _RdbWriter(f)
+    writer.write(b"REDIS%04d" % RDB_VERSION)
+    aux = {
+        b"redis-ver": ".".join(str(v) for v in server.version).encode(),
+        b"redis-bits": b"64",
+        b"ctime": str(int(time.time())).encode(),
+        b"used-mem": b"0",
+        b"aof-base": b"0",
+    }
+    for name, value in aux.items():
+        writer.write(bytes((RDB_OPCODE_AUX,)) + _encode_string(name) + _encode_string(value))
+    for index, snapshot in sorted(snapshots.items()):
+        if not snapshot.size:
+            continue
+        writer.write(bytes((RDB_OPCODE_SELECTDB,)) + _encode_length(index))
+        writer.write(bytes((RDB_OPCODE_RESIZEDB,)) + _encode_length(snapshot.size) + _encode_length(0))
+        for entry in snapshot.entries():
+            writer.write(entry)
+    writer.write(bytes((RDB_OPCODE_EOF,)))
+    f.write(struct.pack("<Q", writer.checksum))
+
+
+def save(server: FakeServer, path: str) -> None:
+    """Write the dataset of `server` to the RDB file `path`, to be called with the server lock held."""
+    now = time.time()
+    snapshots = {index: DatabaseSnapshot(db, now) for index, db in server.dbs.items()}
+    _write_file(server, path, snapshots)
+
+
+def _write_file(server: FakeServer, path: str, snapshots: Mapping[int, DatabaseSnapshot]) -> None:
+    # Like redis, write a temporary file that replaces the previous one once complete
+    tmp_path = os.path.join(os.path.dirname(path), f"temp-{os.getpid()}-{threading.get_ident()}.rdb")
+    try:
+        with open(tmp_path, "wb") as f:
+            write_rdb(f, server, snapshots)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def take_snapshots(
+    server: FakeServer, encode: Callable[[bytes, Item, float], bytes] = encode_entry
+) -> dict[int, DatabaseSnapshot]:
+    """Snapshot the databases of `server` for a thread to write them. This is called with the server lock held, and
+    only one thread may write snapshots at a time."""
+    now = time.time()
+    snapshots = {}
+    for index, db in server.dbs.items():
+        snapshots[index] = db.snapshot = DatabaseSnapshot(db, now, encode)
+    return snapshots
+
+
+def release_snapshots(server: FakeServer, snapshots: Mapping[int, DatabaseSnapshot]) -> None:
+    """Stop maintaining snapshots once written. This is called with the server lock held."""
+    for db in server.dbs.values():
+        if db.snapshot is not None and db.snapshot in snapshots.values():
+            db.snapshot = None
+
+
+def bgsave(server: FakeServer, path: str) -> threading.Thread:
+    """Write the dataset of `server` to the RDB file `path` on a thread. This is called with the server lock held,
+    which the thread does not need."""
+    snapshots = take_snapshots(server)
+
+    def run() -> None:
+        status = "ok"
+        try:
+            _write_file(server, path, snapshots)
+        except Exception:
+            LOGGER.exception("Background saving to %s failed", path)
+            status = "err"
+        finally:
+            with server.lock:
+                release_snapshots(server, snapshots)
+                server.bgsave_done(status)
+
+    thread = threading.Thread(target=run, name="fakeredis-bgsave", daemon=True)
+    thread.start()
+    return thread
+
+
+def _listpack_backlen_size(size: int) -> int:
+    # Listpack entries end with their size, stored backwards in 7 bits per byte
+    if size <= 127:
+        return 1
+    if size < 16383:
+        return 2
+    if size < 2097151:
+        return 3
+    return 4 if size < 268435455 else 5
+
+
+# The bytes of the integers of listpacks and ziplists, by encoding
+_LISTPACK_INT_SIZES = {0xF1: 2, 0xF2: 3, 0xF3: 4, 0xF4: 8}
+_ZIPLIST_INT_SIZES = {0xC0: 2, 0xD0: 4, 0xE0: 8, 0xF0: 3, 0xFE: 1}
+# The struct formats of the integers of intsets, by their size
+_INTSET_FORMATS = {2: "h", 4: "i", 8: "q"}
+
+
+def _listpack_entries(data: bytes) -> list[bytes]:
+    """The elements of a listpack, with integers as their decimal representation."""
+    entries = []
+    pos = 6  # After the size of the listpack and its number of elements
+    while data[pos] != 0xFF:
+        enc = data[pos]
+        if enc < 0x80:  # 7 bits unsigned integer
+            entries.append(b"%d" % enc)
+            size = 1
+        elif enc < 0xC0:  # String of up to 63 bytes
+            size = 1 + (enc & 0x3F)
+            entries.append(data[pos + 1 : pos + size])
+        elif enc < 0xE0:  # 13 bits integer
+            n = ((enc & 0x1F) << 8) | data[pos + 1]
+            entries.append(b"%d" % (n - (1 << 13) if n >= 1 << 12 else n))
+            size = 2
+        elif enc < 0xF0:  # String of up to 4095 bytes
+            size = 2 + (((enc & 0x0F) << 8) | data[pos + 1])
+            entries.append(data[pos + 2 : pos + size])
+        elif enc == 0xF0:  # String with a 32 bits length
+            size = 5 + struct.unpack_from("<I", data, pos + 1)[0]
+            entries.append(data[pos + 5 : pos + size])
+        elif enc in _LISTPACK_INT_SIZES:
+            size = 1 + _LISTPACK_INT_SIZES[enc]
+            entries.append(b"%d" % int.from_bytes(data[pos + 1 : pos + size], "little", signed=True))
+        else:
+            raise ValueError(f"Unknown listpack encoding {enc}")
+        pos += size + _listpack_backlen_size(size)
+    return entries
+
+
+def _ziplist_entries(data: bytes) -> list[bytes]:
+    """The elements of a ziplist, the encoding of small collections before listpacks."""
+    entries = []
+    pos = 10  # After the size of the ziplist, the offset of its last entry and its number of entries
+    while data[pos] != 0xFF:
+        pos += 1 if data[pos] < 0xFE else 5  # The size of the previous entry
+        enc = data[pos]
+        if enc < 0x40:  # String of up to 63 bytes
+            length, pos = enc, pos + 1
+        elif enc < 0x80:  # String of up to 16383 bytes
+            length, pos = ((enc & 0x3F) << 8) | data[pos + 1], pos + 2
+        elif enc == 0x80:  # String with a 32 bits length
+            length, pos = struct.unpack_from(">I", data, pos + 1)[0], pos + 5
+        elif 0xF1 <= enc <= 0xFD:  # Integer between 0 and 12 in the encoding
+            entries.append(b"%d" % ((enc & 0x0F) - 1))
+            pos += 1
+            continue
+        elif enc in _ZIPLIST_INT_SIZES:
+            size = _ZIPLIST_INT_SIZES[enc]
+            entries.append(b"%d" % int.from_bytes(data[pos + 1 : pos + 1 + size], "little", signed=True))
+            pos += 1 + size
+            continue
+        else:
+            raise ValueError(f"Unknown ziplist encoding {enc}")
+        entries.append(data[pos : pos + length])
+        pos += length
+    return entries
+
+
+def _intset_entries(data: bytes) -> list[bytes]:
+    size, length = struct.unpack_from("<II", data)
+    if size not in _INTSET_FORMATS:
+        raise ValueError(f"Unknown intset encoding {size}")
+    return [b"%d" % n for n in struct.unpack_from(f"<{length}{_INTSET_FORMATS[size]}", data, 8)]
+
+
+# The types of collections written as a single string, and how their elements are encoded in it
+_PACKED_ENCODINGS: dict[int, Callable[[bytes], list[bytes]]] = {
+    RDB_TYPE_LIST_ZIPLIST: _ziplist_entries,
+    RDB_TYPE_SET_INTSET: _intset_entries,
+    RDB_TYPE_ZSET_ZIPLIST: _ziplist_entries,
+    RDB_TYPE_HASH_ZIPLIST: _ziplist_entries,
+    RDB_TYPE_HASH_LISTPACK: _listpack_entries,
+    RDB_TYPE_ZSET_LISTPACK: _listpack_entries,
+    RDB_TYPE_SET_LISTPACK: _listpack_entries,
+}
+
+
+def _collection(rdb_type: int, elements: list[Any]) -> Any:
+    """The value of a list, set, hash or sorted set from its elements, or its fields and values or members and scores."""
+    if rdb_type in (RDB_TYPE_LIST, RDB_TYPE_LIST_ZIPLIST, RDB_TYPE_LIST_QUICKLIST, RDB_TYPE_LIST_QUICKLIST_2):
+        return elements
+    if rdb_type in (RDB_TYPE_SET, RDB_TYPE_SET_INTSET, RDB_TYPE_SET_LISTPACK):
+        return ExpiringMembersSet(dict.fromkeys(elements))
+    if len(elements) % 2:
+        raise ValueError("Odd number of elements in an RDB hash or sorted set")
+    pairs = zip(elements[::2], elements[1::2])
+    if rdb_type in (RDB_TYPE_HASH, RDB_TYPE_HASH_ZIPLIST, RDB_TYPE_HASH_LISTPACK):
+        hash_value = Hash()
+        for field, value in pairs:
+            hash_value[field] = value
+        return hash_value
+    zset = ZSet()
+    for member, score in pairs:
+        zset[member] = float(score)
+    return zset
+
+
+class _RdbReader:
+    def __init__(self, data: bytes) -> None:
+        self._data = data
+        self.pos = 0
+
+    def read(self, n: int) -> bytes:
+        if self.pos + n > len(self._data):
+            raise ValueError("Unexpected end of the RDB file")
+        res = self._data[self.pos : self.pos + n]
+        self.pos += n
+        return res
+
+    def read_byte(self) -> int:
+        return self.read(1)[0]
+
+    def read_length(self) -> tuple[int, bool]:
+        """Read a length, and whether it is the special encoding of a string rather than a length."""
+        first = self.read_byte()
+        kind = first >> 6
+        if kind == 0:
+            return first & 0x3F, False
+        if kind == 1:
+            return ((first & 0x3F) << 8) | self.read_byte(), False
+        if kind == 3:
+            return first & 0x3F, True
+        if first == 0x80:
+            return struct.unpack(">I", self.read(4))[0], False
+        if first == 0x81:
+            return struct.unpack(">Q", self.read(8))[0], False
+        raise ValueError(f"Unknown RDB length encoding {first}")
+
+    def read_len(self) -> int:
+        return self.read_length()[0]
+
+    def read_string(self) -> bytes:
+        length, encoded = self.read_length()
+        if not encoded:
+            return self.read(length)
+        if length == RDB_ENC_INT8:
+            return str(struct.unpack("<b", self.read(1))[0]).encode()
+        if length == RDB_ENC_INT16:
+            return str(struct.unpack("<h", self.read(2))[0]).encode()
+        if length == RDB_ENC_INT32:
+            return str(struct.unpack("<i", self.read(4))[0]).encode()
+        if length == RDB_ENC_LZF:
+            compressed_len = self.read_len()
+            uncompressed_len = self.read_len()
+            return _lzf_decompress(self.read(compressed_len), uncompressed_len)
+        raise ValueError(f"Unknown RDB string encoding {length}")
+
+    def read_value(self, rdb_type: int, db: Database) -> Any:
+        """Read a value of an RDB type, to be stored in `db`."""
+        if rdb_type == RDB_TYPE_STRING:
+            return self.read_string()
+        if rdb_type == RDB_TYPE_MODULE_2:
+            module_id = self.read_len()
+            if module_id != FAKEREDIS_MODULE_ID:
+                raise ValueError(f"Unknown RDB module type {module_id}")
+            if self.read_len() != RDB_MODULE_OPCODE_STRING:
+                raise ValueError("Unexpected RDB module value")
+            value = _value_codec.decode(self.read_string(), db)
+            if not _value_codec.is_key_value(value):
+                raise ValueError("Unexpected RDB module value")
+            if self.read_len() != RDB_MODULE_OPCODE_EOF:
+                raise ValueError("Unexpected RDB module value")
+            return value
+        elements: list[Any] = []
+        if rdb_type in _PACKED_ENCODINGS:
+            elements = _PACKED_ENCODINGS[rdb_type](self.read_string())
+        elif rdb_type in (RDB_TYPE_LIST_QUICKLIST, RDB_TYPE_LIST_QUICKLIST_2):
+            for _ in range(self.read_len()):
+                if rdb_type == RDB_TYPE_LIST_QUICKLIST:
+                    elements += _ziplist_entries(self.read_string())
+                elif self.read_len() == QUICKLIST_NODE_CONTAINER_PLAIN:
+                    elements.append(self.read_string())
+                else:
+                    elements += _listpack_entries(self.read_string())
+        elif rdb_type in (RDB_TYPE_LIST, RDB_TYPE_SET):
+            elements = [self.read_string() for _ in range(self.read_len())]
+        elif rdb_type in (RDB_TYPE_HASH, RDB_TYPE_ZSET, RDB_TYPE_ZSET_2):
+            for _ in range(self.read_len()):
+                elements.append(self.read_string())
+                if rdb_type == RDB_TYPE_HASH:
+                    elements.append(self.read_string())
+                elif rdb_type == RDB_TYPE_ZSET_2:
+                    elements.append(struct.unpack("<d", self.read(8))[0])
+                else:
+                    elements.append(float(self.read(self.read_byte())))
+        else:
+            raise ValueError(f"Unsupported RDB value type {rdb_type}")
+        return _collection(rdb_type, elements)
+
+
+def _lzf_decompress(data: bytes, length: int) -> bytes:
+    out = bytearray()
+    i = 0
+    while i < len(data):
+        ctrl = data[i]
+        i += 1
+        if ctrl < 32:  # Literal run of ctrl + 1 bytes
+            out += data[i : i + ctrl + 1]
+            i += ctrl + 1
+            continue
+        ref_len = ctrl >> 5
+        if ref_len == 7:
+            ref_len += data[i]
+            i += 1
+        ref = len(out) - ((ctrl & 0x1F) << 8) - data[i] - 1
+        i += 1
+        for j in range(ref_len + 2):  # The back reference may overlap the bytes it produces
+            out.append(out[ref + j])
+    if len(out) != length:
+        raise ValueError("Invalid LZF compressed string in the RDB file")
+    return bytes(out)
+
+
+def load(server: FakeServer, path: str) -> None:
+    """Load the RDB file `path` into the databases of `server`, skipping the keys that expired."""
+    with open(path, "rb") as f:
+        data = f.read()
+    reader = _RdbReader(data)
+    magic = reader.read(9)
+    if magic[:5] != b"REDIS" or not magic[5:].isdigit():
+        raise ValueError(f"{path} is not an RDB file")
+    now = time.time()
+    db = server.dbs[0]
+    expireat: float | None = None
+    while True:
+        opcode = reader.read_byte()
+        if opcode == RDB_OPCODE_EOF:
+            break
+        if opcode == RDB_OPCODE_AUX:
+            reader.read_string()
+            reader.read_string()
+        elif opcode == RDB_OPCODE_SELECTDB:
+            db = server.dbs[reader.read_len()]
+        elif opcode == RDB_OPCODE_RESIZEDB:
+            reader.read_len()
+            reader.read_len()
+        elif opcode == RDB_OPCODE_EXPIRETIME_MS:
+            expireat = struct.unpack("<Q", reader.read(8))[0] / 1000
+        elif opcode == RDB_OPCODE_EXPIRETIME:
+            expireat = float(struct.unpack("<I", reader.read(4))[0])
+        elif opcode == RDB_OPCODE_FREQ:
+            reader.read_byte()
+        elif opcode == RDB_OPCODE_IDLE:
+            reader.read_len()
+        else:
+            key = reader.read_string()
+            value = reader.read_value(opcode, db)
+            if expireat is None or expireat >= now:
+                item = Item(value)
+                item.expireat = expireat
+                db[key] = item
+            expireat = None
+    if int(magic[5:]) >= 5:
+        checksum = struct.unpack("<Q", reader.read(8))[0]
+        if checksum != 0 and checksum != crc64(data[: reader.pos - 8]):
+            raise ValueError(f"Wrong RDB checksum in {path}")
+    _value_codec.link_time_series_rules(server.dbs.values())
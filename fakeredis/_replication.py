@@ -0,0 +1,218 @@
+"""Replication of a `FakeServer` to replica servers.
+
+A primary feeds its replicas the stream of the write commands it runs, like redis' replication stream. A replica
+connects to its primary like a client, either in process or over TCP, and asks for it with `PSYNC`. The reply holds a
+snapshot of the primary's dataset, as `RESTORE` commands, after which the primary's write commands follow. The replica
+applies them on a thread, and acknowledges the offset it applied with `REPLCONF ACK`, which `WAIT` relies on.
+
+Only fakeredis servers speak this protocol: the snapshot is not an RDB payload.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any
+
+import redis
+
+from fakeredis import _value_codec
+
+if TYPE_CHECKING:
+    from fakeredis._server import FakeServer
+
+LOGGER = logging.getLogger("fakeredis")
+
+# Clients running WAIT block on this pseudo-key, which is notified when a replica acknowledges an offset. A client
+# using it as an actual key only causes spurious wakeups, after which WAIT checks the offsets again.
+REPLICA_ACK_KEY = b"\x00replica-ack"
+# Seconds between two acknowledgements of a replica with nothing new to apply, like redis' replica cron
+ACK_INTERVAL = 1.0
+# Seconds a replica waits for the stream of its primary before checking whether it was stopped
+POLL_INTERVAL = 0.1
+# Seconds between two attempts of a replica to connect to its primary
+RECONNECT_INTERVAL = 0.5
+
+
+def resp_size(fields: Sequence[bytes]) -> int:
+    """Size of a command encoded to the redis protocol, by which replication offsets advance."""
+    size = len(b"*%d\r\n" % len(fields))
+    for field in fields:
+        size += len(b"$%d\r\n" % len(field)) + len(field) + 2
+    return size
+
+
+# Blocking commands popping from one of their keys, replicated as the non-blocking command popping from the key served
+_BLOCKING_POPS = {"blpop": b"lpop", "brpop": b"rpop", "bzpopmin": b"zpopmin", "bzpopmax": b"zpopmax"}
+# Blocking commands with a single source key, replicated as their non-blocking form
+_BLOCKING_MOVES = {"brpoplpush": b"rpoplpush", "blmove": b"lmove"}
+# Commands popping from the first non-empty of their keys, replicated as the pop of the key served, by direction
+_MPOPS = {
+    "lmpop": {b"left": b"lpop", b"right": b"rpop"},
+    "blmpop": {b"left": b"lpop", b"right": b"rpop"},
+    "zmpop": {b"min": b"zpopmin", b"max": b"zpopmax"},
+    "bzmpop": {b"min": b"zpopmin", b"max": b"zpopmax"},
+}
+# Options of XADD before the ID, by the number of arguments following them
+_XADD_OPTIONS = {b"nomkstream": 0, b"maxlen": 1, b"minid": 1, b"limit": 1, b"idmpauto": 1, b"idmp": 2}
+
+
+def replication_command(name: str, args: Sequence[bytes], result: Any) -> list[bytes] | None:
+    """Return the command to replicate for a write command that ran, or None when it has no effect to replicate.
+
+    Commands whose effect is not determined by their arguments are rewritten to the effect they had on the primary.
+    Like redis, blocking commands are rewritten to their non-blocking forms, so that a replica never blocks on them;
+    those which timed out have no effect.
+    """
+    if name == "spop":
+        if not result:
+            return None
+        return [b"srem", args[0], *(result if isinstance(result, list) else [result])]
+    if name in _BLOCKING_POPS:
+        return None if result is None else [_BLOCKING_POPS[name], result[0]]
+    if name in _BLOCKING_MOVES:
+        return None if result is None else [_BLOCKING_MOVES[name], *args[:-1]]
+    if name in _MPOPS:
+        if result is None:
+            return None
+        # The direction follows the keys, after the timeout of the blocking forms
+        numkeys_index = 1 if name.startswith("b") else 0
+        direction = args[numkeys_index + 1 + int(args[numkeys_index])].lower()
+        key, popped = result
+        return [_MPOPS[name][direction], key, str(len(popped)).encode()]
+    if name == "xreadgroup":
+        return _without_block_option(args) if result else None
+    if name == "xadd" and isinstance(result, bytes):
+        id_index = _xadd_id_index(args)
+        if args[id_index] == b"*":
+            args = list(args)
+            args[id_index] = result
+    return [*name.encode().split(), *args]
+
+
+def _xadd_id_index(args: Sequence[bytes]) -> int:
+    """The index of the ID in the arguments of XADD, after the key and the options."""
+    i = 1
+    while args[i].lower() in _XADD_OPTIONS:
+        option = args[i].lower()
+        i += 1 + _XADD_OPTIONS[option]
+        if option in (b"maxlen", b"minid") and args[i - 1] in (b"~", b"="):
+            i += 1
+    return i
+
+
+def _without_block_option(args: Sequence[bytes]) -> list[bytes]:
+    """The arguments of XREADGROUP without its BLOCK option, which comes before STREAMS."""
+    fields = [b"xreadgroup"]
+    i = 0
+    while i < len(args):
+        if i >= 3 and args[i].lower() == b"streams":
+            break
+        if i >= 3 and args[i].lower() == b"block":
+            i += 2
+            continue
+        fields.append(args[i])
+        i += 1
+    fields.extend(args[i:])
+    return fields
+
+
+class ReplicationLink:
+    """The link of a replica to its primary, applying the replication stream of the primary on a thread."""
+
+    def __init__(self, replica: FakeServer, primary: FakeServer | None, host: str, port: int) -> None:
+        """
+        :param replica: The server the stream is applied to.
+        :param primary: The primary in this process, or None to connect to it over TCP.
+        :param host: The host of the primary.
+        :param port: The port of the primary.
+        """
+        self.replica = replica
+        self.primary = primary
+        self.host = host
+        self.port = port
+        # connect, connecting, sync or connected, as reported by ROLE
+        self.state = "connect"
+        # Replication offset of the last command applied
+        self.offset = -1
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"fakeredis-replica-of-{host}:{port}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop applying the stream of the primary. This does not wait for the thread, which may wait for the lock
+        of the replica."""
+        self._stop.set()
+
+    def _connect(self) -> redis.Connection:
+        if self.primary is not None:
+            from fakeredis._connection import FakeRedisConnection
+
+            return FakeRedisConnection(server=self.primary)
+        return redis.Connection(host=self.host, port=self.port)  # type: ignore[no-untyped-call]
+
+    def _run(self) -> None:
+        from fakeredis._fakesocket import FakeSocket
+
+        # The replica applies the stream like a client whose replies are discarded, and which may write
+        sock = FakeSocket(self.replica, db=0, client_class=redis.Redis)
+        sock._master_client = True
+        sock._reply_off = True
+        try:
+            while not self._stop.is_set():
+                try:
+                    self._sync(sock)
+                except (redis.RedisError, OSError) as exc:
+                    LOGGER.debug("Replication link to %s:%s failed: %s", self.host, self.port, exc)
+                    self.state = "connect"
+                    self._stop.wait(RECONNECT_INTERVAL)
+        finally:
+            sock.close()
+
+    def _sync(self, sock: Any) -> None:
+        conn = self._connect()
+        self.state = "connecting"
+        try:
+            conn.connect()  # type: ignore[no-untyped-call]
+            conn.send_command("PSYNC", "?", "-1")  # type: ignore[no-untyped-call]
+            _, _replid, offset, snapshot = conn.read_response(disable_decoding=True)
+            self.state = "sync"
+            if not self._apply(sock, [[b"FLUSHALL"], *snapshot]):
+                return
+            with self.replica.lock:
+                _value_codec.link_time_series_rules(self.replica.dbs.values())
+            self.offset = int(offset)
+            self.state = "connected"
+            last_ack = 0.0
+            ack = True
+            while not self._stop.is_set():
+                commands = []
+                timeout = POLL_INTERVAL
+                while conn.can_read(timeout=timeout):
+                    fields = conn.read_response(disable_decoding=True)
+                    self.offset += resp_size(fields)
+                    if fields[0].lower() == b"replconf":  # REPLCONF GETACK
+                        ack = True
+                    else:
+                        commands.append(fields)
+                    timeout = 0
+                if commands and not self._apply(sock, commands):
+                    return
+                if ack or time.monotonic() - last_ack >= ACK_INTERVAL:
+                    conn.send_command("REPLCONF", "ACK", self.offset)  # type: ignore[no-untyped-call]
+                    last_ack = time.monotonic()
+                    ack = False
+        finally:
+            conn.disconnect()  # type: ignore[no-untyped-call]
+
+    def _apply(self, sock: Any, commands: list[list[bytes]]) -> bool:
+        """Apply commands to the replica, unless the link was stopped meanwhile. Return whether they were applied."""
+        with self.replica.lock:
+            if self._stop.is_set():
+                return False
+            sock._start_batch()
+            for fields in commands:
+                sock._process_command(fields)
+        return True
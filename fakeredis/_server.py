@@ -1,19 +1,28 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
+import os
+import secrets
 import threading
 import time
 import weakref
 from collections import defaultdict
-from collections.abc import Sequence
-from typing import Any, ClassVar
+from collections.abc import Iterable, Sequence
+from typing import TYPE_CHECKING, Any, ClassVar, Dict
 
 import redis
 
-from fakeredis._helpers import Database, FakeSelector
+from fakeredis import _aof, _rdb
+from fakeredis._helpers import Database, FakeSelector, PatternIndex, parse_keyspace_events
+from fakeredis._replication import ReplicationLink, resp_size
 from fakeredis._typing import ServerType, VersionType
 from fakeredis.model import AccessControlList, ClientInfo
 
+if TYPE_CHECKING:
+    from fakeredis._cluster import ClusterNode
+
 LOGGER = logging.getLogger("fakeredis")
 
 
@@ -34,6 +43,66 @@ def _version_to_str(v: VersionType) -> str:
     return str(v)
 
 
+# Mirrors redis' activeExpireCycle(): keys are expired in loops of this many keys, for at most this percentage of
+# the time between two cycles.
+ACTIVE_EXPIRE_CYCLE_KEYS_PER_LOOP = 20
+ACTIVE_EXPIRE_CYCLE_SLOW_TIME_PERC = 25
+DEFAULT_HZ = 10
+MIN_HZ = 1
+MAX_HZ = 500
+
+
+class _Databases(Dict[int, Database]):
+    """Databases of a server, created on first access."""
+
+    def __init__(self, server: FakeServer) -> None:
+        super().__init__()
+        self._server = server
+
+    def __missing__(self, index: int) -> Database:
+        db = Database(self._server.lock)
+        db.expire_callback = functools.partial(self._server._notify_expired, index)
+        self[index] = db
+        return db
+
+
+class _PatternSubscribers(Dict[bytes, "weakref.WeakSet[Any]"]):
+    """Pattern subscribers of a server by pattern, with an index of the patterns to find those matching a channel."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.index = PatternIndex()
+
+    def __missing__(self, pattern: bytes) -> weakref.WeakSet[Any]:
+        subs: weakref.WeakSet[Any] = weakref.WeakSet()
+        self[pattern] = subs
+        return subs
+
+    def __setitem__(self, pattern: bytes, subs: weakref.WeakSet[Any]) -> None:
+        super().__setitem__(pattern, subs)
+        self.index.add(pattern)
+
+    def __delitem__(self, pattern: bytes) -> None:
+        super().__delitem__(pattern)
+        self.index.discard(pattern)
+
+    def matching(self, channel: bytes) -> list[tuple[bytes, weakref.WeakSet[Any]]]:
+        """Return the patterns matching `channel` with their subscribers."""
+        return [(pattern, self[pattern]) for pattern in self.index.match(channel)]
+
+
+def _active_expire_loop(server_ref: weakref.ref[FakeServer], stop: threading.Event) -> None:
+    while True:
+        server = server_ref()
+        if server is None:
+            return
+        interval = 1.0 / server.hz
+        server.active_expire_cycle()
+        del server  # Do not keep the server alive while sleeping
+        if stop.wait(interval):
+            return
+
+
 class FakeServer:
     _servers_map: ClassVar[dict[str, FakeServer]] = {}
 
@@ -42,24 +111,45 @@ class FakeServer:
         version: VersionType = (8,),
         server_type: ServerType = "redis",
         config: dict[bytes, bytes] | None = None,
+        active_expire: bool = False,
     ) -> None:
         """Initialize a new FakeServer instance.
         :param version: The version of the server (e.g. 6, 7.4, "7.4.1", can also be a tuple)
         :param server_type: The type of server (redis, dragonfly, valkey)
         :param config: A dictionary of configuration options.
+        :param active_expire: Whether to expire keys in a background thread, like redis does, rather than only when
+            they are accessed. See `start_active_expire`.
 
         Configuration options:
         - `requirepass`: The password required to authenticate to the server.
         - `aclfile`: The path to the ACL file.
+        - `hz`: The number of active expiration cycles per second.
+        - `notify-keyspace-events`: The classes of keyspace events to send.
+        - `dir` and `dbfilename`: The RDB file SAVE and BGSAVE write, which is loaded when the server is created.
+        - `appendonly`, `appendfilename` and `appendfsync`: Whether write commands are appended to an append-only file
+          (in `dir`), which is loaded instead of the RDB file when the server is created, and how often it is synced.
         """
         self.lock = threading.Lock()
-        self.dbs: dict[int, Database] = defaultdict(lambda: Database(self.lock))
+        self.dbs: dict[int, Database] = _Databases(self)
         # Maps channel/pattern to a weak set of sockets
         self.script_cache: dict[bytes, bytes] = {}  # Maps SHA1 to the script source
         self.subscribers: dict[bytes, weakref.WeakSet[Any]] = defaultdict(weakref.WeakSet)
-        self.psubscribers: dict[bytes, weakref.WeakSet[Any]] = defaultdict(weakref.WeakSet)
+        self.psubscribers = _PatternSubscribers()
         self.ssubscribers: dict[bytes, weakref.WeakSet[Any]] = defaultdict(weakref.WeakSet)
+        # Whether a keyspace notification may have a receiver, and the count of the subscriptions which may receive
+        # them, see `update_keyspace_listeners`
+        self.keyspace_listeners = False
+        self._keyspace_subscriptions = 0
         self.lastsave: int = int(time.time())
+        # The thread of the running BGSAVE, whether another BGSAVE is scheduled after it, and the status of the last one
+        self.bgsave_thread: threading.Thread | None = None
+        self.bgsave_scheduled = False
+        self.rdb_last_bgsave_status = "ok"
+        # The append-only file, when enabled, and the BGREWRITEAOF state, like the BGSAVE state
+        self.aof: _aof.AppendOnlyFile | None = None
+        self.aof_rewrite_thread: threading.Thread | None = None
+        self.aof_rewrite_scheduled = False
+        self.aof_last_bgrewrite_status = "ok"
         self.connected = True
         # List of weakrefs to sockets that are being closed lazily
         self.sockets: list[Any] = []
@@ -76,6 +166,212 @@ class FakeServer:
         # but command processing is never actually suspended (see CLIENT PAUSE docs).
         self.pause_until: float = 0.0
         self.pause_mode: bytes = b"all"
+        # The shard of a `FakeCluster` this server is, None when cluster mode is disabled
+        self.cluster_node: ClusterNode | None = None
+        # Replication: the sockets of the replicas fed by this server, the offset of its replication stream and the
+        # database its last command was selected in. `master_link` is set when this server is a replica.
+        self.replid = secrets.token_hex(20)
+        self.replicas: weakref.WeakSet[Any] = weakref.WeakSet()
+        self.repl_offset = 0
+        self.repl_db = -1
+        self.master_link: ReplicationLink | None = None
+        self._active_expire_stop: threading.Event | None = None
+        rdb_path = self.rdb_path
+        if self.config.get(b"appendonly", b"no").lower() == b"yes":
+            aof_path = self.aof_path
+            if os.path.exists(aof_path):
+                _aof.load(self, aof_path)
+            self.aof = _aof.AppendOnlyFile(self, aof_path)
+        elif rdb_path is not None and os.path.exists(rdb_path):
+            _rdb.load(self, rdb_path)
+        if active_expire:
+            self.start_active_expire()
+
+    @property
+    def hz(self) -> int:
+        """The number of active expiration cycles per second, from the `hz` config, clamped like redis does."""
+        try:
+            hz = int(self.config.get(b"hz", DEFAULT_HZ))
+        except ValueError:
+            hz = DEFAULT_HZ
+        return min(max(hz, MIN_HZ), MAX_HZ)
+
+    @property
+    def rdb_path(self) -> str | None:
+        """The RDB file, from the `dir` and `dbfilename` configs, or None when `dbfilename` is not configured."""
+        filename = self.config.get(b"dbfilename")
+        if not filename:
+            return None
+        return os.path.join(os.fsdecode(self.config.get(b"dir", b".")), os.fsdecode(filename))
+
+    @property
+    def aof_path(self) -> str:
+        """The append-only file, from the `dir` and `appendfilename` configs."""
+        filename = self.config.get(b"appendfilename", b"appendonly.aof")
+        return os.path.join(os.fsdecode(self.config.get(b"dir", b".")), os.fsdecode(filename))
+
+    def save(self) -> None:
+        """Write the dataset to the RDB file, if configured. This is called with the server lock held."""
+        rdb_path = self.rdb_path
+        if rdb_path is not None:
+            _rdb.save(self, rdb_path)
+        self.lastsave = int(time.time())
+
+    def bgsave(self) -> None:
+        """Write the dataset to the RDB file, if configured, on a thread. This is called with the server lock held,
+        and must not be called while `bgsave_thread` runs."""
+        rdb_path = self.rdb_path
+        if rdb_path is None:
+            self.lastsave = int(time.time())
+            return
+        self.bgsave_thread = _rdb.bgsave(self, rdb_path)
+
+    def bgsave_done(self, status: str) -> None:
+        """Called by the BGSAVE thread once done, with the server lock held."""
+        self.bgsave_thread = None
+        self.rdb_last_bgsave_status = status
+        if status == "ok":
+            self.lastsave = int(time.time())
+        self._start_scheduled()
+
+    def bgrewriteaof(self) -> None:
+        """Rewrite the append-only file on a thread, even when it is disabled. This is called with the server lock
+        held, and must not be called while `bgsave_thread` or `aof_rewrite_thread` runs."""
+        self.aof_rewrite_thread = _aof.bgrewriteaof(self, self.aof, self.aof_path)
+
+    def aof_rewrite_done(self, status: str) -> None:
+        """Called by the BGREWRITEAOF thread once done, with the server lock held."""
+        self.aof_rewrite_thread = None
+        self.aof_last_bgrewrite_status = status
+        self._start_scheduled()
+
+    def _start_scheduled(self) -> None:
+        # Like redis, only one of BGSAVE and BGREWRITEAOF runs at a time
+        if self.bgsave_scheduled:
+            self.bgsave_scheduled = False
+            self.bgsave()
+        elif self.aof_rewrite_scheduled:
+            self.aof_rewrite_scheduled = False
+            self.bgrewriteaof()
+
+    def publish_to_channel(self, channel: bytes, message: bytes) -> None:
+        """Send a message to the subscribers of a channel and of the patterns matching it."""
+        msg = [b"message", channel, message]
+        subs: Iterable[Any] = self.subscribers.get(channel, set())
+        for sock in subs:
+            sock.put_response(msg)
+
+        for pattern, socks in self.psubscribers.matching(channel):
+            pmsg = [b"pmessage", pattern, channel, message]
+            for sock in socks:
+                sock.put_response(pmsg)
+
+    def update_keyspace_listeners(self, subscribers: Any, channel: bytes, delta: int) -> None:
+        """Update `keyspace_listeners` after a connection subscribed to (`delta` is 1) or unsubscribed from (-1)
+        `channel` of `subscribers`.
+
+        Keyspace notifications are only published to pattern subscribers and to channels starting with `__`, so
+        commands skip building them entirely when there are neither. A connection garbage collected without
+        unsubscribing is still counted, which only costs building notifications nobody receives.
+        """
+        if subscribers is self.psubscribers or (subscribers is self.subscribers and channel.startswith(b"__")):
+            self._keyspace_subscriptions += delta
+            self.keyspace_listeners = self._keyspace_subscriptions > 0
+
+    def _notify_expired(self, db_num: int, key: bytes) -> None:
+        """Send the keyspace notifications of an expired key, following `notify-keyspace-events`."""
+        if not self.keyspace_listeners:
+            return
+        keyspace, keyevent, classes = parse_keyspace_events(self.config.get(b"notify-keyspace-events", b""))
+        if b"x" not in classes:
+            return
+        if keyspace:
+            self.publish_to_channel(b"__keyspace@%d__:%s" % (db_num, key), b"expired")
+        if keyevent:
+            self.publish_to_channel(b"__keyevent@%d__:expired" % db_num, key)
+
+    def active_expire_cycle(self) -> int:
+        """Run one active expiration cycle: remove expired keys from every database, within a time budget.
+
+        :return: The number of keys removed.
+        """
+        deadline = time.monotonic() + ACTIVE_EXPIRE_CYCLE_SLOW_TIME_PERC / 100 / self.hz
+        removed = 0
+        with self.lock:
+            now = time.time()
+            for db in list(self.dbs.values()):
+                db.time = now
+                while True:
+                    count = db.remove_expired(ACTIVE_EXPIRE_CYCLE_KEYS_PER_LOOP)
+                    removed += count
+                    if count < ACTIVE_EXPIRE_CYCLE_KEYS_PER_LOOP or time.monotonic() > deadline:
+                        break
+        return removed
+
+    def start_active_expire(self) -> None:
+        """Run `active_expire_cycle` `hz` times per second in a daemon thread, until `stop_active_expire`."""
+        if self._active_expire_stop is not None:
+            return
+        self._active_expire_stop = threading.Event()
+        thread = threading.Thread(
+            target=_active_expire_loop,
+            args=(weakref.ref(self), self._active_expire_stop),
+            name="fakeredis-active-expire",
+            daemon=True,
+        )
+        thread.start()
+
+    def stop_active_expire(self) -> None:
+        if self._active_expire_stop is not None:
+            self._active_expire_stop.set()
+            self._active_expire_stop = None
+
+    async def active_expire_task(self) -> None:
+        """Run `active_expire_cycle` `hz` times per second on the running event loop, until cancelled.
+
+        This is the asyncio alternative to `start_active_expire`, e.g.
+        `task = asyncio.create_task(server.active_expire_task())`.
+        """
+        while True:
+            self.active_expire_cycle()
+            await asyncio.sleep(1.0 / self.hz)
+
+    def propagate(self, db: int, fields: list[bytes]) -> None:
+        """Feed a write command run on database `db` to the replicas and the append-only file. This is called with the
+        server lock held."""
+        if self.replicas:
+            if db != self.repl_db:
+                self.repl_db = db
+                self.feed_replicas([b"SELECT", str(db).encode()])
+            self.feed_replicas(fields)
+        if self.aof is not None:
+            self.aof.append(db, fields)
+
+    def feed_replicas(self, fields: list[bytes]) -> None:
+        """Append a command to the replication stream. This is called with the server lock held."""
+        self.repl_offset += resp_size(fields)
+        for sock in self.replicas:
+            sock.put_response(fields)
+
+    def replicaof(self, primary: FakeServer | tuple[str, int] | None) -> None:
+        """Make this server a replica of `primary`, or a primary again when it is None.
+
+        :param primary: A server in this process, or the (host, port) of a server. The address is looked up in the
+            servers of `FakeRedis(host=..., port=...)` clients first, and connected to over TCP otherwise, e.g. for
+            a `TcpFakeServer` in another process.
+        """
+        if self.master_link is not None:
+            self.master_link.stop()
+            self.master_link = None
+        if primary is None:
+            return
+        if isinstance(primary, FakeServer):
+            self.master_link = ReplicationLink(self, primary, "127.0.0.1", 0)
+            return
+        host, port = primary
+        prefix = f"{host}:{port}:"
+        server = next((s for key, s in self._servers_map.items() if key.startswith(prefix)), None)
+        self.master_link = ReplicationLink(self, server, host, port)
 
     def get_next_client_id(self) -> int:
         with self.lock:
@@ -160,6 +456,8 @@ class FakeBaseConnectionMixin:
         self._client_info = ClientInfo(**client_info)
 
     def _decode(self, response: Any) -> Any:
+        if not self.encoder.decode_responses:  # type: ignore[attr-defined]
+            return response
         if isinstance(response, list):
             return [self._decode(item) for item in response]
         elif isinstance(response, dict):
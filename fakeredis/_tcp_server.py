@@ -1,27 +1,22 @@
 from __future__ import annotations
 
-from fakeredis._helpers import SimpleError
-
-try:
-    import fcntl
-
-    HAS_FCNTL = True
-except ImportError:
-    HAS_FCNTL = False
+import asyncio
 import logging
 import os
+import socket
+import stat
 import threading
-import time
-from dataclasses import dataclass
-from io import BufferedIOBase
+from dataclasses import dataclass, field
 from itertools import count
-from socketserver import StreamRequestHandler, ThreadingTCPServer
 from typing import Any
 
+import redis
 from redis.connection import DefaultParser
 
-from fakeredis import FakeRedisConnection, FakeServer
-from fakeredis._typing import ServerType, VersionType
+from fakeredis import FakeServer
+from fakeredis._helpers import SimpleError
+from fakeredis._typing import Self, ServerType, VersionType
+from fakeredis.aioredis import AsyncFakeSocket
 
 LOGGER = logging.getLogger("fakeredis")
 # LOGGER.setLevel(logging.DEBUG)
@@ -35,6 +30,11 @@ try:
 except ImportError:
     lua_scripts_supported = False
 
+# Size of the reads from a client connection. All the commands in a read (e.g. a pipeline) are parsed in one go.
+READ_SIZE = 65536
+# Size above which the serialized part of a response is handed to the transport, so large responses are streamed
+WRITE_CHUNK_SIZE = 65536
+
 
 def to_bytes(value: Any) -> bytes:
     if isinstance(value, bytes):
@@ -56,13 +56,33 @@ def _get_exception_prefix(e: Exception) -> str:
 
 @dataclass
 class Writer:
+    """Serializes responses for a client.
+
+    The serialized fragments are buffered, and only handed to the transport by `flush`, in one `writelines` call (a
+    scatter-gather send where the event loop supports it). A large response is flushed in chunks of about
+    `WRITE_CHUNK_SIZE` bytes as it is serialized.
+    """
+
     client_address: tuple[str, int]
-    writer: BufferedIOBase
+    writer: asyncio.StreamWriter
     request_handler: TCPFakeRequestHandler
+    _pieces: list[bytes] = field(default_factory=list, init=False)
+    _size: int = field(default=0, init=False)
 
     def write(self, value: bytes) -> None:
-        LOGGER.debug(f"<<< {self.client_address}: {value!r}")
-        self.writer.write(value)
+        self._pieces.append(value)
+        self._size += len(value)
+        if self._size >= WRITE_CHUNK_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pieces:
+            return
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug(f"<<< {self.client_address}: {b''.join(self._pieces)!r}")
+        self.writer.writelines(self._pieces)
+        self._pieces.clear()
+        self._size = 0
 
     def dump(self, value: Any, dump_bulk: bool = False) -> None:
         raise NotImplementedError
@@ -77,7 +97,7 @@ class Resp2Writer(Writer):
             if value.upper() == b"SHUTDOWN":
                 self.request_handler.shutdown_request = True
             if dump_bulk or b"\r" in value or b"\n" in value:
-                self.write(b"$" + str(len(value)).encode() + b"\r\n" + value + b"\r\n")
+                self.write(b"$%d\r\n%b\r\n" % (len(value), value))
             else:
                 self.write(b"+" + value + b"\r\n")
         elif isinstance(value, (list, set)):
@@ -92,7 +112,6 @@ class Resp2Writer(Writer):
             else:
                 prefix = _get_exception_prefix(value)
                 self.write(f"-{prefix} {value.args[0]}\r\n".encode())
-        self.writer.flush()
 
 
 class Resp3Writer(Writer):
@@ -105,7 +124,7 @@ class Resp3Writer(Writer):
             if value.upper() == b"SHUTDOWN":
                 self.request_handler.shutdown_request = True
             if dump_bulk or b"\r" in value or b"\n" in value:
-                self.write(b"$" + str(len(value)).encode() + b"\r\n" + value + b"\r\n")
+                self.write(b"$%d\r\n%b\r\n" % (len(value), value))
             else:
                 self.write(b"+" + value + b"\r\n")
         elif value_type is int:
@@ -136,85 +155,245 @@ class Resp3Writer(Writer):
             else:
                 prefix = _get_exception_prefix(value)
                 self.write(f"-{prefix} {value.args[0]}\r\n".encode())
-        self.writer.flush()
-
-
-class TCPFakeRequestHandler(StreamRequestHandler):
-    server: TcpFakeServer
-    shutdown_request: bool = False
-
-    def setup(self) -> None:
-        super().setup()
-        fd = self.rfile.fileno()
-        if HAS_FCNTL:
-            fl = fcntl.fcntl(fd, fcntl.F_GETFL)
-            fcntl.fcntl(fd, fcntl.F_SETFL, fl | os.O_NONBLOCK)
-        if self.client_address in self.server.clients:
-            self.current_client = self.server.clients[self.client_address]
-        else:
-            self.writer = Resp3Writer(self.client_address, self.wfile, self)
-            self.current_client = FakeRedisConnection(
-                server=self.server.fake_server,
-                writer=self.writer,
-                client_info={
-                    "laddr": self.connection.getsockname(),
-                    "addr": self.connection.getpeername(),
-                    "fd": self.connection.fileno(),
-                },
-            )
 
-            self.server.clients[self.client_address] = self.current_client
 
-    def handle(self) -> None:
-        LOGGER.debug(f"+++ {self.client_address[0]} connected")
-        while not self.server._shutdown_event.is_set():
-            try:
-                if self.shutdown_request:
+def _format_address(address: Any, server_address: Any) -> str:
+    if isinstance(address, tuple):
+        return f"{address[0]}:{address[1]}"
+    # Unix socket peers are unnamed; redis reports the path of the socket instead
+    return f"{address or server_address}:0"
+
+
+class TCPFakeRequestHandler:
+    """Serves one client connection of a `TcpFakeServer`, on the event loop of the server."""
+
+    def __init__(self, server: TcpFakeServer, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.server = server
+        self.reader = reader
+        self.stream = writer
+        self.client_address = writer.get_extra_info("peername")
+        self.client_id = next(server.client_ids)
+        self.shutdown_request = False
+        self.writer = Resp3Writer(self.client_address, writer, self)
+        connection = writer.get_extra_info("socket")
+        self.sock = AsyncFakeSocket(
+            server.fake_server,
+            0,
+            client_class=redis.Redis,
+            client_info={
+                "laddr": _format_address(connection.getsockname(), server.server_address),
+                "addr": _format_address(self.client_address, server.server_address),
+                "fd": connection.fileno(),
+            },
+        )
+
+    async def handle(self) -> None:
+        LOGGER.debug(f"+++ {self.client_address} connected")
+        sender = asyncio.ensure_future(self._send_responses())
+        try:
+            while not self.shutdown_request:
+                data = await self.reader.read(READ_SIZE)
+                if not data:
                     break
-                if self.current_client.can_read():
-                    response = self.current_client.read_response()
-                    self.writer.dump(response)
-                    continue
-
-                data = self.rfile.readline()
-                if data == b"":
-                    time.sleep(0)
-                else:
-                    self.current_client.get_socket().sendall(data)
-
-            except Exception as e:
-                LOGGER.debug(f"!!! {self.client_address[0]}: {e}")
-                self.writer.dump(e)
-                break
-
-    def finish(self) -> None:
-        self.current_client.disconnect()  # type: ignore[no-untyped-call]
-        LOGGER.debug(f"--- {self.client_address[0]} disconnected")
-        self.rfile.close()
-        self.wfile.close()
-        del self.server.clients[self.client_address]
-        super().finish()
-
-
-class TcpFakeServer(ThreadingTCPServer):
+                self.sock.sendall(data)
+        except Exception as e:
+            LOGGER.debug(f"!!! {self.client_address}: {e}")
+            # Responses to the commands before the failing one still go out, followed by the error
+            self._write_ready_responses()
+            self.writer.dump(e)
+            self.writer.flush()
+        finally:
+            sender.cancel()
+            try:
+                await sender
+            except (asyncio.CancelledError, ConnectionError):
+                pass
+            await self.finish()
+
+    def _write_ready_responses(self) -> None:
+        responses = self.sock.responses
+        while responses and not responses.empty():
+            self.writer.dump(responses.get_nowait())
+
+    async def _send_responses(self) -> None:
+        """Write responses as they are queued: replies, published messages and results of blocking commands."""
+        responses = self.sock.responses
+        while responses is not None:
+            self.writer.dump(await responses.get())
+            self._write_ready_responses()
+            self.writer.flush()
+            await self.stream.drain()
+            if self.shutdown_request:
+                self.stream.close()
+                return
+
+    async def finish(self) -> None:
+        self.sock.close()
+        self.stream.close()
+        self.server.clients.pop(self.client_id, None)
+        LOGGER.debug(f"--- {self.client_address} disconnected")
+
+
+class TcpFakeServer:
+    """A redis server listening on a TCP address, whose state is kept by a `FakeServer`.
+
+    All the connections are multiplexed on a single asyncio event loop, run by `serve_forever`, so idle connections
+    cost no CPU. The interface follows `socketserver.TCPServer`: `serve_forever`, `shutdown` from another thread, then
+    `server_close`.
+    """
+
+    address_family = socket.AF_INET
+    allow_reuse_address = True
+    request_queue_size = 128
+
     def __init__(
         self,
         server_address: tuple[str | bytes | bytearray, int],
         bind_and_activate: bool = True,
         server_type: ServerType = "redis",
         server_version: VersionType = (8, 0),
+        fake_server: FakeServer | None = None,
     ):
-        self.allow_reuse_address = True
-        self.daemon_threads = False
-        self._shutdown_event = threading.Event()
-        super().__init__(server_address, TCPFakeRequestHandler, bind_and_activate)
-        self.fake_server = FakeServer(server_type=server_type, version=server_version)
+        """
+        :param server_address: The address to listen on.
+        :param bind_and_activate: Whether to bind and listen right away, rather than with `server_bind` and
+            `server_activate`.
+        :param server_type: The type of server to emulate, when no `fake_server` is given.
+        :param server_version: The version of the server to emulate, when no `fake_server` is given.
+        :param fake_server: The FakeServer holding the state, to share it with other clients or listeners.
+        """
+        self.server_address: Any = server_address
+        if fake_server is None:
+            fake_server = FakeServer(server_type=server_type, version=server_version)
+        self.fake_server = fake_server
         self.client_ids = count(0)
-        self.clients: dict[int, FakeRedisConnection] = {}
+        self.clients: dict[int, TCPFakeRequestHandler] = {}
+        self.socket = socket.socket(self.address_family, socket.SOCK_STREAM)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stop: asyncio.Event | None = None
+        self._shutdown_request = False
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._is_shut_down = threading.Event()
+        self._is_shut_down.set()
+        if bind_and_activate:
+            try:
+                self.server_bind()
+                self.server_activate()
+            except BaseException:
+                self.server_close()
+                raise
+
+    def server_bind(self) -> None:
+        if self.allow_reuse_address and hasattr(socket, "SO_REUSEADDR"):
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind(self.server_address)
+        self.server_address = self.socket.getsockname()
+
+    def server_activate(self) -> None:
+        self.socket.listen(self.request_queue_size)
+
+    def server_close(self) -> None:
+        self.socket.close()
+
+    def fileno(self) -> int:
+        return self.socket.fileno()
+
+    def serve_forever(self) -> None:
+        """Serve the connections until `shutdown` is called."""
+        self._is_shut_down.clear()
+        try:
+            asyncio.run(self._serve())
+        finally:
+            self._shutdown_request = False
+            self._loop = self._stop = None
+            self._is_shut_down.set()
 
     def shutdown(self) -> None:
-        self._shutdown_event.set()
-        super().shutdown()
+        """Stop `serve_forever` and wait until it returns. Must be called from another thread."""
+        self._shutdown_request = True
+        loop, stop = self._loop, self._stop
+        if loop is not None and stop is not None:
+            try:
+                loop.call_soon_threadsafe(stop.set)
+            except RuntimeError:  # the loop is already closed
+                pass
+        self._is_shut_down.wait()
+
+    async def _serve(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        # Checked after publishing the loop: a concurrent shutdown() either sees the loop or set the flag before
+        if self._shutdown_request:
+            return
+        server = await asyncio.start_server(self._handle_client, sock=self.socket, limit=READ_SIZE)
+        try:
+            await self._stop.wait()
+        finally:
+            server.close()
+            # Closing the connections ends their handlers, as if the clients had disconnected
+            for handler in list(self.clients.values()):
+                handler.stream.close()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            await server.wait_closed()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task: Any = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            handler = TCPFakeRequestHandler(self, reader, writer)
+            self.clients[handler.client_id] = handler
+            await handler.handle()
+        finally:
+            self._tasks.discard(task)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.server_close()
+
+
+if hasattr(socket, "AF_UNIX"):
+
+    class UnixFakeServer(TcpFakeServer):
+        """A redis server listening on a Unix domain socket, for `redis.Redis(unix_socket_path=...)` clients.
+
+        The socket file is created by `server_bind`, replacing a stale one, and removed by `server_close`.
+        """
+
+        address_family = socket.AF_UNIX
+
+        def __init__(
+            self,
+            server_address: str,
+            bind_and_activate: bool = True,
+            server_type: ServerType = "redis",
+            server_version: VersionType = (8, 0),
+            fake_server: FakeServer | None = None,
+        ):
+            super().__init__(
+                server_address,  # type: ignore[arg-type]
+                bind_and_activate=bind_and_activate,
+                server_type=server_type,
+                server_version=server_version,
+                fake_server=fake_server,
+            )
+
+        def server_bind(self) -> None:
+            path = os.fspath(self.server_address)
+            if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+                os.unlink(path)
+            self.socket.bind(path)
+            self._bound = True
+
+        def server_close(self) -> None:
+            super().server_close()
+            if getattr(self, "_bound", False):
+                self._bound = False
+                try:
+                    os.unlink(self.server_address)
+                except FileNotFoundError:
+                    pass
 
 
 TCP_SERVER_TEST_PORT = 19000
@@ -0,0 +1,556 @@
+"""Binary encoding of the values without an RDB type of their own: streams, the types of the stack modules, JSON
+documents, and sets and hashes with expiring members.
+
+A value is encoded as a tree of basic Python values (None, bools, ints, floats, bytes, strings, lists, tuples, sets
+and dicts), each starting with a tag byte, and of instances of the classes registered below, encoded by their code
+and the state their adapter returns. Decoding only creates basic values and instances of the registered classes, so
+unlike `pickle`, decoding untrusted data cannot run arbitrary code.
+"""
+
+from __future__ import annotations
+
+import io
+import math
+import struct
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple
+
+from fakeredis.model import (
+    Array,
+    ExpiringMembersSet,
+    Hash,
+    HeavyKeeper,
+    StreamEntryKey,
+    StreamGroup,
+    TDigest,
+    TimeSeries,
+    TimeSeriesRule,
+    XStream,
+)
+from fakeredis.model._base_type import BaseModel
+from fakeredis.model._stream import PelEntry, StreamConsumerInfo
+from fakeredis.model._timeseries_model import AGGREGATORS
+from fakeredis.model._topk import Bucket, HashArray
+
+if TYPE_CHECKING:
+    from fakeredis._helpers import Database
+
+# The version of the encoding, to be increased when the state of a registered class changes
+VERSION = 1
+
+_NONE = 0
+_FALSE = 1
+_TRUE = 2
+_INT = 3
+_FLOAT = 4
+_BYTES = 5
+_STR = 6
+_LIST = 7
+_TUPLE = 8
+_SET = 9
+_DICT = 10
+_OBJECT = 11
+
+_SEQUENCE_TAGS: dict[type, int] = {list: _LIST, tuple: _TUPLE, set: _SET}
+
+
+class _Adapter(NamedTuple):
+    cls: type
+    encode: Callable[[Any], Any]
+    decode: Callable[[Any, Database], Any]
+
+
+_ADAPTERS: dict[int, _Adapter] = {}
+_CODES: dict[type, int] = {}
+
+
+def _register(code: int, cls: type, encode: Callable[[Any], Any], decode: Callable[[Any, Database], Any]) -> None:
+    _ADAPTERS[code] = _Adapter(cls, encode, decode)
+    _CODES[cls] = code
+
+
+def _write_uint(out: bytearray, n: int) -> None:
+    while n >= 0x80:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _write(out: bytearray, value: Any) -> None:
+    value_type = type(value)
+    if value is None:
+        out.append(_NONE)
+    elif value_type is bool:
+        out.append(_TRUE if value else _FALSE)
+    elif value_type is int:
+        out.append(_INT)
+        _write_uint(out, value << 1 if value >= 0 else (~value << 1) | 1)
+    elif value_type is float:
+        out.append(_FLOAT)
+        out += struct.pack("<d", value)
+    elif value_type is bytes or value_type is str:
+        data = value if value_type is bytes else value.encode("utf-8", "surrogatepass")
+        out.append(_BYTES if value_type is bytes else _STR)
+        _write_uint(out, len(data))
+        out += data
+    elif value_type in _SEQUENCE_TAGS:
+        out.append(_SEQUENCE_TAGS[value_type])
+        _write_uint(out, len(value))
+        for element in value:
+            _write(out, element)
+    elif value_type is dict:
+        out.append(_DICT)
+        _write_uint(out, len(value))
+        for k, v in value.items():
+            _write(out, k)
+            _write(out, v)
+    else:
+        code = _CODES.get(value_type)
+        if code is None:
+            raise TypeError(f"Values of type {value_type.__name__} cannot be encoded")
+        out.append(_OBJECT)
+        _write_uint(out, code)
+        _write(out, _ADAPTERS[code].encode(value))
+
+
+def encode(value: Any) -> bytes:
+    out = bytearray()
+    _write(out, value)
+    return bytes(out)
+
+
+class _Reader:
+    def __init__(self, data: bytes, db: Database) -> None:
+        self._data = data
+        self._db = db
+        self.pos = 0
+
+    def read_uint(self) -> int:
+        n = shift = 0
+        while True:
+            byte = self._data[self.pos]
+            self.pos += 1
+            n |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return n
+            shift += 7
+
+    def read_bytes(self) -> bytes:
+        length = self.read_uint()
+        if self.pos + length > len(self._data):
+            raise ValueError("Unexpected end of the encoded value")
+        res = self._data[self.pos : self.pos + length]
+        self.pos += length
+        return res
+
+    def read(self) -> Any:
+        tag = self._data[self.pos]
+        self.pos += 1
+        if tag == _NONE:
+            return None
+        if tag == _FALSE or tag == _TRUE:
+            return tag == _TRUE
+        if tag == _INT:
+            n = self.read_uint()
+            return ~(n >> 1) if n & 1 else n >> 1
+        if tag == _FLOAT:
+            self.pos += 8
+            return struct.unpack_from("<d", self._data, self.pos - 8)[0]
+        if tag == _BYTES:
+            return self.read_bytes()
+        if tag == _STR:
+            return self.read_bytes().decode("utf-8", "surrogatepass")
+        if tag == _LIST:
+            return [self.read() for _ in range(self.read_uint())]
+        if tag == _TUPLE:
+            return tuple(self.read() for _ in range(self.read_uint()))
+        if tag == _SET:
+            return {self.read() for _ in range(self.read_uint())}
+        if tag == _DICT:
+            res = {}
+            for _ in range(self.read_uint()):
+                k = self.read()
+                res[k] = self.read()
+            return res
+        if tag == _OBJECT:
+            adapter = _ADAPTERS.get(self.read_uint())
+            if adapter is None:
+                raise ValueError("Unknown class of encoded value")
+            return adapter.decode(self.read(), self._db)
+        raise ValueError(f"Unknown tag {tag} of encoded value")
+
+
+def decode(data: bytes, db: Database) -> Any:
+    """Decode a value encoded by `encode`, to be stored in `db`. Raise `ValueError` if the data is malformed."""
+    reader = _Reader(data, db)
+    try:
+        value = reader.read()
+    except (IndexError, KeyError, TypeError, AttributeError, struct.error, RecursionError) as exc:
+        raise ValueError("Malformed encoded value") from exc
+    if reader.pos != len(data):
+        raise ValueError("Unexpected data after the encoded value")
+    return value
+
+
+def link_time_series_rules(dbs: Iterable[Database]) -> None:
+    """Point the compaction rules of the time series of `dbs` to the series of their destination keys.
+
+    A rule decoded before its destination key points to a detached series: this is called once a whole dataset is
+    loaded, where keys are decoded in no particular order.
+    """
+    for db in dbs:
+        for item in db._dict.values():
+            if isinstance(item.value, TimeSeries):
+                for rule in item.value.rules:
+                    rule.dest_key = _rule_destination(db, rule.dest_key.name, rule.dest_key)
+
+
+def _rule_destination(db: Database, name: bytes, default: TimeSeries) -> TimeSeries:
+    item = db._dict.get(name)
+    return item.value if item is not None and isinstance(item.value, TimeSeries) else default
+
+
+_Check = Callable[[Any], bool]
+
+
+def _check(valid: bool, cls: type) -> None:
+    if not valid:
+        raise ValueError(f"Invalid encoded state of {cls.__name__}")
+
+
+def _of(*types: type) -> _Check:
+    return lambda value: isinstance(value, types)
+
+
+def _optional(check: _Check) -> _Check:
+    return lambda value: value is None or check(value)
+
+
+def _list_of(check: _Check) -> _Check:
+    return lambda value: type(value) is list and all(map(check, value))
+
+
+def _tuple_of(*checks: _Check) -> _Check:
+    return lambda value: (
+        type(value) is tuple and len(value) == len(checks) and all(check(v) for check, v in zip(checks, value))
+    )
+
+
+def _dict_of(key_check: _Check, value_check: _Check) -> _Check:
+    return lambda value: type(value) is dict and all(key_check(k) and value_check(v) for k, v in value.items())
+
+
+_is_bytes = _of(bytes)
+_is_int = _of(int)
+_is_number = _of(int, float)
+_is_sample = _tuple_of(_is_int, _is_number)
+
+
+def _is_json(value: Any, depth: int = 0) -> bool:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return True
+    if depth >= 1000:
+        return False
+    if type(value) is list:
+        return all(_is_json(v, depth + 1) for v in value)
+    return type(value) is dict and all(type(k) is str and _is_json(v, depth + 1) for k, v in value.items())
+
+
+def is_key_value(value: Any) -> bool:
+    """Whether a decoded value can be the value of a key, rather than only a part of one: a model, or a JSON document."""
+    return isinstance(value, BaseModel) or _is_json(value)
+
+
+def _attributes(value: Any, *excluded: str) -> dict[str, Any]:
+    return {name: v for name, v in vars(value).items() if name not in excluded}
+
+
+def _from_attributes(cls: type, state: Any, checks: dict[str, _Check]) -> Any:
+    """An instance of `cls` with the attributes of `state`, which must have the names and pass the checks of `checks`."""
+    _check(type(state) is dict and state.keys() == checks.keys(), cls)
+    _check(all(checks[name](v) for name, v in state.items()), cls)
+    value: Any = object.__new__(cls)
+    vars(value).update(state)
+    return value
+
+
+def _decode_hash(state: Any, db: Database) -> Hash:
+    _check(_tuple_of(_dict_of(_is_bytes, _is_bytes), _dict_of(_is_bytes, _is_int))(state), Hash)
+    values, expirations = state
+    _check(expirations.keys() <= values.keys(), Hash)
+    value = Hash()
+    value._values, value._expirations = values, expirations
+    return value
+
+
+def _decode_expiring_members_set(state: Any, db: Database) -> ExpiringMembersSet:
+    _check(_dict_of(_is_bytes, _optional(_is_int))(state), ExpiringMembersSet)
+    return ExpiringMembersSet(state)
+
+
+_is_stream_entry_key = _of(StreamEntryKey)
+
+
+def _decode_stream_consumer_info(state: Any, db: Database) -> StreamConsumerInfo:
+    checks = {"name": _is_bytes, "pending": _is_int, "last_attempt": _is_int, "last_success": _is_int}
+    value: StreamConsumerInfo = _from_attributes(StreamConsumerInfo, state, checks)
+    return value
+
+
+def _decode_stream_group(state: Any, db: Database) -> StreamGroup:
+    checks = {
+        "name": _is_bytes,
+        "start_key": _is_stream_entry_key,
+        "entries_read": _optional(_is_int),
+        "consumers": _dict_of(_is_bytes, _of(StreamConsumerInfo)),
+        "last_delivered_key": _is_stream_entry_key,
+        "last_ack_key": _is_stream_entry_key,
+        "pel": _dict_of(_is_stream_entry_key, _of(PelEntry)),
+    }
+    group: StreamGroup = _from_attributes(StreamGroup, state, checks)
+    _check(all(name == consumer.name for name, consumer in group.consumers.items()), StreamGroup)
+    return group
+
+
+def _decode_stream(state: Any, db: Database) -> XStream:
+    checks = {
+        "_ids": _list_of(_is_stream_entry_key),
+        "_values_dict": _dict_of(_is_stream_entry_key, _list_of(_is_bytes)),
+        "_groups": _dict_of(_is_bytes, _of(StreamGroup)),
+        "_max_deleted_id": _is_stream_entry_key,
+        "_entries_added": _is_int,
+        "_last_generated_id": _optional(_is_bytes),
+        "_idmp_duration": _is_int,
+        "_idmp_max_size": _is_int,
+        "_idmp_map": _dict_of(_is_bytes, _dict_of(_is_bytes, _is_stream_entry_key)),
+        "_iids_added": _is_int,
+        "_iids_duplicates": _is_int,
+    }
+    stream: XStream = _from_attributes(XStream, state, checks)
+    # The entries are sorted by their keys, and hold pairs of fields and values
+    _check(all(a < b for a, b in zip(stream._ids, stream._ids[1:])), XStream)
+    _check(stream._values_dict.keys() == set(stream._ids), XStream)
+    _check(all(len(fields) % 2 == 0 for fields in stream._values_dict.values()), XStream)
+    _check(all(name == group.name for name, group in stream._groups.items()), XStream)
+    for group in stream._groups.values():
+        group.stream = stream
+    return stream
+
+
+def _encode_time_series_rule(rule: TimeSeriesRule) -> dict[str, Any]:
+    # The source is the series the rule belongs to, and the destination is referred to by its key
+    state = _attributes(rule, "source_key")
+    state["dest_key"] = rule.dest_key.name
+    return state
+
+
+def _decode_time_series_rule(state: Any, db: Database) -> TimeSeriesRule:
+    checks = {
+        "dest_key": _is_bytes,
+        "aggregator": lambda value: _is_bytes(value) and value in AGGREGATORS,
+        "bucket_duration": lambda value: _is_int(value) and value > 0,
+        "align_timestamp": _is_int,
+        "current_bucket_start_ts": _is_int,
+        "current_bucket": _list_of(_is_sample),
+    }
+    rule: TimeSeriesRule = _from_attributes(TimeSeriesRule, state, checks)
+    name = state["dest_key"]
+    rule.dest_key = _rule_destination(db, name, TimeSeries(name, db))
+    return rule
+
+
+def _decode_time_series(state: Any, db: Database) -> TimeSeries:
+    checks = {
+        "name": _is_bytes,
+        "retention": lambda value: _is_int(value) and value >= 0,
+        "encoding": _is_bytes,
+        "chunk_size": lambda value: _is_int(value) and value > 0,
+        "duplicate_policy": _optional(_is_bytes),
+        "ts_ind_map": _dict_of(_is_int, _is_int),
+        "sorted_list": _list_of(_is_sample),
+        "max_timestamp": _is_int,
+        "labels": _dict_of(_is_bytes, _is_bytes),
+        "source_key": _optional(_is_bytes),
+        "ignore_max_time_diff": _optional(_is_number),
+        "ignore_max_val_diff": _optional(_is_number),
+        "rules": _list_of(_of(TimeSeriesRule)),
+    }
+    series: TimeSeries = _from_attributes(TimeSeries, state, checks)
+    series._db = db
+    for rule in series.rules:
+        rule.source_key = series
+    return series
+
+
+def _decode_bucket(state: Any, db: Database) -> Bucket:
+    _check(_tuple_of(_is_int, _is_int)(state), Bucket)
+    return Bucket(*state)
+
+
+def _decode_hash_array(state: Any, db: Database) -> HashArray:
+    checks = {"width": _is_int, "decay": _is_number, "array": _list_of(_of(Bucket)), "_seed": _is_int}
+    value: HashArray = _from_attributes(HashArray, state, checks)
+    _check(len(value.array) == value.width, HashArray)
+    return value
+
+
+def _decode_heavy_keeper(state: Any, db: Database) -> HeavyKeeper:
+    checks = {
+        "k": _is_int,
+        "width": _is_int,
+        "depth": _is_int,
+        "decay": _is_number,
+        "hash_arrays": _list_of(_of(HashArray)),
+        "min_heap": _list_of(_tuple_of(_is_int, _is_bytes)),
+    }
+    value: HeavyKeeper = _from_attributes(HeavyKeeper, state, checks)
+    _check(len(value.hash_arrays) == value.depth and len(value.min_heap) <= value.k, HeavyKeeper)
+    _check(all(array.width == value.width for array in value.hash_arrays), HeavyKeeper)
+    return value
+
+
+def _decode_tdigest(state: Any, db: Database) -> TDigest:
+    _check(_tuple_of(_is_int, _list_of(_is_number))(state), TDigest)
+    compression, values = state
+    value = TDigest(compression)
+    value.update(values)
+    return value
+
+
+def _decode_array(state: Any, db: Database) -> Array:
+    checks = {
+        "_data": _dict_of(_is_int, _is_bytes),
+        "_cursor": _is_int,
+        "_insertion_order": _dict_of(_is_int, _of(type(None))),
+    }
+    value: Array = _from_attributes(Array, state, checks)
+    return value
+
+
+def _decode_tuple(cls: type, *checks: _Check) -> Callable[[Any, Database], Any]:
+    """The decoder of a named tuple, whose fields must pass `checks`."""
+
+    def decode(state: Any, db: Database) -> Any:
+        _check(_tuple_of(*checks)(state), cls)
+        return cls(*state)
+
+    return decode
+
+
+_register(1, Hash, lambda value: (value._values, value._expirations), _decode_hash)
+_register(2, ExpiringMembersSet, lambda value: value._values, _decode_expiring_members_set)
+_register(3, StreamEntryKey, tuple, _decode_tuple(StreamEntryKey, _is_int, _is_int))
+_register(4, PelEntry, tuple, _decode_tuple(PelEntry, _is_bytes, _is_int, _is_int))
+_register(5, StreamConsumerInfo, _attributes, _decode_stream_consumer_info)
+_register(6, StreamGroup, lambda value: _attributes(value, "stream"), _decode_stream_group)
+_register(7, XStream, _attributes, _decode_stream)
+_register(8, TimeSeriesRule, _encode_time_series_rule, _decode_time_series_rule)
+_register(9, TimeSeries, lambda value: _attributes(value, "_db"), _decode_time_series)
+_register(10, Bucket, lambda value: (value.counter, value.fingerprint), _decode_bucket)
+_register(11, HashArray, _attributes, _decode_hash_array)
+_register(12, HeavyKeeper, _attributes, _decode_heavy_keeper)
+_register(13, TDigest, lambda value: (value.compression, list(value)), _decode_tdigest)
+_register(14, Array, _attributes, _decode_array)
+
+try:
+    from probables.exceptions import ProbablesBaseException
+
+    from fakeredis.model import CountMinSketch, ScalableBloomFilter, ScalableCuckooFilter
+except ImportError:  # pyprobables is not installed
+    pass
+else:
+    # Errors of pyprobables when loading malformed filters
+    _PROBABLES_ERRORS = (ProbablesBaseException, ArithmeticError, ValueError, struct.error)
+    # The footers of the exported filters
+    _BLOOM_FILTER_FOOTER = struct.Struct("<QQQf")
+
+    def _decode_bloom_filter(state: Any, db: Database) -> ScalableBloomFilter:
+        _check(_tuple_of(_is_bytes, _is_int)(state), ScalableBloomFilter)
+        data, scale = state
+        _check(len(data) >= _BLOOM_FILTER_FOOTER.size, ScalableBloomFilter)
+        size, capacity, _, error_rate = _BLOOM_FILTER_FOOTER.unpack_from(data, len(data) - _BLOOM_FILTER_FOOTER.size)
+        # Each filter of the data takes at least the bytes of the bits it is created with
+        _check(0 < error_rate < 1 and capacity > 0 and scale >= 0, ScalableBloomFilter)
+        bits = -capacity * math.log(error_rate) / math.log(2) ** 2
+        _check(size > 0 and size * bits / 8 <= len(data), ScalableBloomFilter)
+        try:
+            value = ScalableBloomFilter.bf_frombytes(data)
+        except _PROBABLES_ERRORS as exc:
+            raise ValueError("Invalid encoded state of ScalableBloomFilter") from exc
+        _check(bytes(value) == data, ScalableBloomFilter)
+        value.scale = scale
+        return value
+
+    def _encode_cuckoo_filter(value: ScalableCuckooFilter) -> tuple[bytes, int, int, int]:
+        f = io.BytesIO()
+        value.export(f)
+        return f.getvalue(), value.initial_capacity, value.inserted, value.deleted
+
+    def _decode_cuckoo_filter(state: Any, db: Database) -> ScalableCuckooFilter:
+        _check(_tuple_of(_is_bytes, _is_int, _is_int, _is_int)(state), ScalableCuckooFilter)
+        data, initial_capacity, inserted, deleted = state
+        try:
+            value = ScalableCuckooFilter.frombytes(data)
+        except _PROBABLES_ERRORS as exc:
+            raise ValueError("Invalid encoded state of ScalableCuckooFilter") from exc
+        _check(value.bucket_size > 0 and value.capacity > 0 and initial_capacity > 0, ScalableCuckooFilter)
+        value.initial_capacity, value.inserted, value.deleted = initial_capacity, inserted, deleted
+        return value
+
+    def _decode_count_min_sketch(state: Any, db: Database) -> CountMinSketch:
+        _check(_tuple_of(_is_int, _is_int, _is_bytes)(state), CountMinSketch)
+        width, depth, data = state
+        # The counters of the sketch, then its footer
+        _check(width > 0 and depth > 0 and len(data) == 4 * width * depth + 16, CountMinSketch)
+        value = CountMinSketch(width=width, depth=depth)
+        try:
+            value._parse_bytes(data)
+        except _PROBABLES_ERRORS as exc:
+            raise ValueError("Invalid encoded state of CountMinSketch") from exc
+        _check(value.width == width and value.depth == depth, CountMinSketch)
+        return value
+
+    _register(15, ScalableBloomFilter, lambda value: (bytes(value), value.scale), _decode_bloom_filter)
+    _register(16, ScalableCuckooFilter, _encode_cuckoo_filter, _decode_cuckoo_filter)
+    _register(17, CountMinSketch, lambda value: (value.width, value.depth, bytes(value)), _decode_count_min_sketch)
+
+try:
+    from fakeredis.model import Vector, VectorSet
+except ImportError:  # numpy is not installed
+    pass
+else:
+    _QUANTIZATIONS = ("noquant", "bin", "int8")
+
+    def _decode_vector(state: Any, db: Database) -> Vector:
+        checks = (_is_bytes, _list_of(_is_number), _optional(_is_bytes), lambda v: v in _QUANTIZATIONS, _is_number)
+        _check(_tuple_of(*checks)(state), Vector)
+        name, values, attributes, quantization, l2_norm = state
+        # The norm of binary quantized vectors is the one of their values before quantization
+        value = Vector(name, values, attributes, quantization, 0)
+        value.l2_norm = l2_norm
+        return value
+
+    def _decode_vector_set(state: Any, db: Database) -> VectorSet:
+        checks = {
+            "_dimensions": _is_int,
+            "_vectors": _dict_of(_is_bytes, _of(Vector)),
+            "_links": _dict_of(_is_bytes, _is_int),
+            "_quant_type": _optional(lambda v: v in _QUANTIZATIONS),
+            "_node_uid_counter": _is_int,
+            "_max_level": _is_int,
+            "_node_levels": _dict_of(_is_bytes, _is_int),
+            "_node_links": _dict_of(_is_bytes, _dict_of(_is_int, _of(set))),
+        }
+        value: VectorSet = _from_attributes(VectorSet, state, checks)
+        _check(
+            all(name == v.name and len(v.values) == value._dimensions for name, v in value._vectors.items()), VectorSet
+        )
+        return value
+
+    _register(
+        18,
+        Vector,
+        lambda value: (value.name, value.values, value.attributes, value.quantization, value.l2_norm),
+        _decode_vector,
+    )
+    _register(19, VectorSet, _attributes, _decode_vector_set)
@@ -50,14 +50,22 @@ class AsyncFakeSocket(_fakesocket.FakeSocket):
             except RuntimeError:  # the loop is already closed
                 pass
 
+    def put_responses(self, msgs: Iterable[Any]) -> None:
+        for msg in msgs:
+            self.put_response(msg)
+
     async def _async_blocking(
         self,
         timeout: float | None,
+        keys: Sequence[bytes],
         func: Callable[[bool], Any],
         event: asyncio.Event,
         callback: Callable[[], None],
+        timeout_result: Callable[[], Any] | None,
+        command: tuple[str, list[Any]],
     ) -> None:
         result = None
+        done = False
         try:
             async with async_timeout(timeout if timeout else None):
                 while True:
@@ -71,39 +79,49 @@ class AsyncFakeSocket(_fakesocket.FakeSocket):
                                 self._take_unblock_reason()
                             except SimpleError as exc:
                                 result = self._decode_result(exc)
+                                done = True
                             break
                         ret = func(False)
                         if ret is not None:
+                            if self._server.replicas or self._server.aof is not None:
+                                self._propagate(*command, ret, [])
                             result = self._decode_result(ret)
+                            done = True
                             break
         except asyncio.TimeoutError:
             pass
         finally:
             with self._server.lock:
-                self._db.remove_change_callback(callback)
+                self._db.remove_blocked_client(keys, callback)
                 self._blocked = False
                 self._unblock_reason = None
+                if not done and timeout_result is not None:
+                    result = self._decode_result(timeout_result())
             self.put_response(result)
             self.resume()
 
     def _blocking(
         self,
         timeout: float | None,
+        keys: Sequence[bytes],
         func: Callable[[bool], None],
+        timeout_result: Callable[[], Any] | None = None,
     ) -> Any:
         loop = asyncio.get_event_loop()
         ret = func(True)
         if ret is not None or self._in_transaction:
             return ret
+        # The command is propagated once served, with its name and arguments
+        command = self._command
         event = asyncio.Event()
 
         def callback() -> None:
             loop.call_soon_threadsafe(event.set)
 
-        self._db.add_change_callback(callback)
+        self._db.add_blocked_client(keys, callback)
         self._blocked = True
         self.pause()
-        loop.create_task(self._async_blocking(timeout, func, event, callback))
+        loop.create_task(self._async_blocking(timeout, keys, func, event, callback, timeout_result, command))
         return _helpers.NoResponse()
 
 
@@ -3,12 +3,14 @@ from typing import Any
 from .acl_mixin import AclCommandsMixin
 from .array_mixin import ArrayCommandsMixin
 from .bitmap_mixin import BitmapCommandsMixin
+from .cluster_mixin import ClusterCommandsMixin
 from .connection_mixin import ConnectionCommandsMixin
 from .generic_mixin import GenericCommandsMixin
 from .geo_mixin import GeoCommandsMixin
 from .hash_mixin import HashCommandsMixin
 from .list_mixin import ListCommandsMixin
 from .pubsub_mixin import PubSubCommandsMixin
+from .replication_mixin import ReplicationCommandsMixin
 from .server_mixin import ServerCommandsMixin
 from .set_mixin import SetCommandsMixin
 from .streams_mixin import StreamsCommandsMixin
@@ -30,12 +32,14 @@ __all__ = [
     "AclCommandsMixin",
     "ArrayCommandsMixin",
     "BitmapCommandsMixin",
+    "ClusterCommandsMixin",
     "ConnectionCommandsMixin",
     "GenericCommandsMixin",
     "GeoCommandsMixin",
     "HashCommandsMixin",
     "ListCommandsMixin",
     "PubSubCommandsMixin",
+    "ReplicationCommandsMixin",
     "ScriptingCommandsMixin",
     "ServerCommandsMixin",
     "SetCommandsMixin",
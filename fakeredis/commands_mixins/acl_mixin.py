@@ -74,8 +74,12 @@ class AclCommandsMixin(CommandsMixinBase):
     def config_set(self, *args: bytes) -> SimpleString:
         if len(args) % 2 != 0:
             raise SimpleError(msgs.WRONG_ARGS_MSG6.format("CONFIG SET"))
-        for i in range(0, len(args), 2):
-            self._server_config[args[i]] = args[i + 1]
+        params = {(b"hz" if casematch(args[i], b"hz") else args[i]): args[i + 1] for i in range(0, len(args), 2)}
+        if b"hz" in params:
+            hz = Int.decode(params[b"hz"], decode_error=msgs.CONFIG_SET_INVALID_INT_MSG.format("hz"))
+            if not 0 <= hz <= 2**31 - 1:
+                raise SimpleError(msgs.CONFIG_SET_OUT_OF_RANGE_MSG.format("hz", 0, 2**31 - 1))
+        self._server_config.update(params)
         return OK
 
     @command(name="AUTH", fixed=(), repeat=(bytes,))
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from fakeredis import _msgs as msgs
+from fakeredis._commands import Int, command
+from fakeredis._hash_slot import CLUSTER_SLOTS, key_hash_slot
+from fakeredis._helpers import SimpleError
+from fakeredis.commands_mixins._mixin_base import CommandsMixinBase
+
+if TYPE_CHECKING:
+    from fakeredis._cluster import ClusterNode
+
+
+class ClusterCommandsMixin(CommandsMixinBase):
+    def _cluster_node(self) -> ClusterNode:
+        node = self._server.cluster_node
+        if node is None:
+            raise SimpleError(msgs.CLUSTER_DISABLED_MSG)
+        return node
+
+    @staticmethod
+    def _check_slot(slot: int, msg: str = msgs.CLUSTER_INVALID_SLOT_MSG) -> None:
+        if not 0 <= slot < CLUSTER_SLOTS:
+            raise SimpleError(msg)
+
+    @command(name="CLUSTER KEYSLOT", fixed=(bytes,), repeat=())
+    def cluster_keyslot(self, key: bytes) -> int:
+        self._cluster_node()
+        return key_hash_slot(key)
+
+    @command(name="CLUSTER MYID", fixed=(), repeat=())
+    def cluster_myid(self) -> bytes:
+        return self._cluster_node().node_id.encode()
+
+    @command(name="CLUSTER SLOTS", fixed=(), repeat=())
+    def cluster_slots(self) -> list[Any]:
+        nodes = self._cluster_node().cluster.nodes
+        return [
+            [node.first_slot, node.last_slot, [node.host.encode(), node.port, node.node_id.encode(), []]]
+            for node in nodes
+        ]
+
+    @command(name="CLUSTER SHARDS", fixed=(), repeat=())
+    def cluster_shards(self) -> list[Any]:
+        nodes = self._cluster_node().cluster.nodes
+        return [
+            {
+                b"slots": [node.first_slot, node.last_slot],
+                b"nodes": [
+                    {
+                        b"id": node.node_id.encode(),
+                        b"port": node.port,
+                        b"ip": node.host.encode(),
+                        b"endpoint": node.host.encode(),
+                        b"role": b"master",
+                        b"replication-offset": 0,
+                        b"health": b"online",
+                    }
+                ],
+            }
+            for node in nodes
+        ]
+
+    @command(name="CLUSTER NODES", fixed=(), repeat=())
+    def cluster_nodes(self) -> bytes:
+        myself = self._cluster_node()
+        lines = []
+        for epoch, node in enumerate(myself.cluster.nodes, start=1):
+            flags = "myself,master" if node is myself else "master"
+            lines.append(
+                f"{node.node_id} {node.host}:{node.port}@{node.port + 10000} {flags} - 0 0 {epoch} connected "
+                f"{node.first_slot}-{node.last_slot}\n"
+            )
+        return "".join(lines).encode()
+
+    @command(name="CLUSTER INFO", fixed=(), repeat=())
+    def cluster_info(self) -> bytes:
+        myself = self._cluster_node()
+        nodes = myself.cluster.nodes
+        info = {
+            "cluster_state": "ok",
+            "cluster_slots_assigned": CLUSTER_SLOTS,
+            "cluster_slots_ok": CLUSTER_SLOTS,
+            "cluster_slots_pfail": 0,
+            "cluster_slots_fail": 0,
+            "cluster_known_nodes": len(nodes),
+            "cluster_size": len(nodes),
+            "cluster_current_epoch": len(nodes),
+            "cluster_my_epoch": nodes.index(myself) + 1,
+            "cluster_stats_messages_sent": 0,
+            "cluster_stats_messages_received": 0,
+            "total_cluster_links_buffer_limit_exceeded": 0,
+        }
+        return "".join(f"{k}:{v}\r\n" for k, v in info.items()).encode()
+
+    @command(name="CLUSTER COUNTKEYSINSLOT", fixed=(Int,), repeat=())
+    def cluster_countkeysinslot(self, slot: int) -> int:
+        self._cluster_node()
+        self._check_slot(slot)
+        return sum(1 for key in self._db if key_hash_slot(key) == slot)
+
+    @command(name="CLUSTER GETKEYSINSLOT", fixed=(Int, Int), repeat=())
+    def cluster_getkeysinslot(self, slot: int, count: int) -> list[bytes]:
+        self._cluster_node()
+        self._check_slot(slot, msgs.CLUSTER_INVALID_SLOT_OR_COUNT_MSG)
+        if count < 0:
+            raise SimpleError(msgs.CLUSTER_INVALID_SLOT_OR_COUNT_MSG)
+        keys = [key for key in self._db if key_hash_slot(key) == slot]
+        return keys[:count]
@@ -320,7 +320,9 @@ class ConnectionCommandsMixin(CommandsMixinBase):
         for subscribers in subscriber_maps:
             for channel in list(subscribers.keys()):
                 subs: set[Any] = subscribers[channel]
-                subs.discard(self)
+                if self in subs:
+                    subs.discard(self)
+                    self._server.update_keyspace_listeners(subscribers, channel, -1)
                 if not subs:
                     del subscribers[channel]
         self._pubsub = 0
@@ -1,15 +1,12 @@
 from __future__ import annotations
 
-import hashlib
-import pickle
-import random
-from collections.abc import Sequence
 from typing import Any, Callable
 
 from fakeredis import _msgs as msgs
+from fakeredis import _rdb
 from fakeredis._command_args_parsing import extract_args
 from fakeredis._commands import BeforeAny, CommandItem, DbIndex, Float, Int, Key, command, delete_keys
-from fakeredis._helpers import OK, SimpleError, SimpleString, casematch, compile_pattern
+from fakeredis._helpers import OK, ScanIndex, SimpleError, SimpleString, casematch, glob_literal_prefix, pattern_matcher
 from fakeredis.commands_mixins._mixin_base import CommandsMixinBase
 from fakeredis.model import ExpiringMembersSet, Hash, ZSet
 
@@ -32,7 +29,7 @@ class SortFloat(Float):
 
 class GenericCommandsMixin(CommandsMixinBase):
     _ttl: Callable[[CommandItem, float], int]
-    _scan: Callable[[Sequence[bytes], int, bytes], list[bytes | list[bytes]]]
+    _scan: Callable[[ScanIndex, int, bytes], list[bytes | list[bytes]]]
     _key_value_type: Callable[[CommandItem], SimpleString]
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
@@ -93,9 +90,7 @@ class GenericCommandsMixin(CommandsMixinBase):
 
     @command(name="DUMP", fixed=(Key(missing_return=None),))
     def dump(self, key: CommandItem) -> bytes | None:
-        value = pickle.dumps(key.value)
-        checksum = hashlib.sha1(value).digest()
-        return checksum + value
+        return _rdb.dump_value(key.value)
 
     @command(name="EXISTS", fixed=(Key(),), repeat=(Key(),))
     def exists(self, *keys: CommandItem) -> int:
@@ -118,9 +113,10 @@ class GenericCommandsMixin(CommandsMixinBase):
     def keys(self, pattern: bytes) -> list[bytes]:
         if pattern == b"*":
             return list(self._db)
-        else:
-            regex = compile_pattern(pattern)
-            return [key for key in self._db if regex.match(key)]
+        if glob_literal_prefix(pattern) == pattern:
+            return [pattern] if pattern in self._db else []
+        match = pattern_matcher(pattern)
+        return [key for key in self._db if match(key)]
 
     @command(name="MOVE", fixed=(Key(), DbIndex))
     def move(self, key: CommandItem, db: int) -> int:
@@ -170,10 +166,8 @@ class GenericCommandsMixin(CommandsMixinBase):
 
     @command(name="RANDOMKEY", fixed=())
     def randomkey(self) -> bytes | None:
-        keys: list[bytes] = list(self._db.keys())
-        if not keys:
-            return None
-        return random.choice(keys)
+        self._db.remove_expired()
+        return self._db.scan_index.random_key()  # type: ignore[no-any-return]
 
     @command(name="RENAME", fixed=(Key(), Key()))
     def rename(self, key: CommandItem, newkey: CommandItem) -> SimpleString:
@@ -200,8 +194,7 @@ class GenericCommandsMixin(CommandsMixinBase):
         (replace,), _ = extract_args(args, ("replace",))
         if key and not replace:
             raise SimpleError(msgs.RESTORE_KEY_EXISTS)
-        checksum, value = value[:20], value[20:]
-        if hashlib.sha1(value).digest() != checksum:
+        if not _rdb.check_dump_payload(value):
             raise SimpleError(msgs.RESTORE_INVALID_CHECKSUM_MSG)
         if ttl < 0:
             raise SimpleError(msgs.RESTORE_INVALID_TTL_MSG)
@@ -209,13 +202,17 @@ class GenericCommandsMixin(CommandsMixinBase):
             expireat = None
         else:
             expireat = self._db.time + ttl / 1000.0
-        key.value = pickle.loads(value)
+        try:
+            key.value = _rdb.restore_value(value, self._db)
+        except ValueError:
+            raise SimpleError(msgs.RESTORE_BAD_DATA_FORMAT_MSG)
         key.expireat = expireat
         return OK
 
     @command(name="SCAN", fixed=(Int,), repeat=(bytes, bytes))
     def scan(self, cursor: int, *args: bytes) -> list[bytes | list[bytes]]:
-        return self._scan(list(self._db), cursor, *args)
+        self._db.remove_expired()
+        return self._scan(self._db.scan_index, cursor, *args)
 
     @command(name="SORT", fixed=(Key(),), repeat=(bytes,))
     def sort(self, key: CommandItem, *args: bytes) -> int | list[Any]:
@@ -8,7 +8,7 @@ from typing import Any, Callable, List, cast
 from fakeredis import _msgs as msgs
 from fakeredis._command_args_parsing import extract_args
 from fakeredis._commands import CommandItem, Float, Int, Key, command
-from fakeredis._helpers import OK, SimpleError, SimpleString, casematch, current_time
+from fakeredis._helpers import OK, ScanIndex, SimpleError, SimpleString, casematch, current_time
 from fakeredis.commands_mixins._mixin_base import CommandsMixinBase
 from fakeredis.model import Hash
 
@@ -21,7 +21,7 @@ class HashCommandsMixin(CommandsMixinBase):
         bytes,
     ]
     _encodefloat: Callable[[float, bool], bytes]
-    _scan: Callable[[Sequence[bytes], int, bytes], list[bytes | list[bytes]]]
+    _scan: Callable[[ScanIndex, int, bytes], list[bytes | list[bytes]]]
     add_subkey_event: Callable[[bytes, bytes, Sequence[bytes]], None]
 
     def _hset(self, key: CommandItem, *args: bytes) -> int:
@@ -101,7 +101,7 @@ class HashCommandsMixin(CommandsMixinBase):
     def hscan(self, key: CommandItem, cursor: int, *args: bytes) -> list[Any]:
         no_values = any(casematch(arg, b"novalues") for arg in args)
         scan_args = tuple(arg for arg in args if not casematch(arg, b"novalues")) if no_values else args
-        scan_result = self._scan(key.value, cursor, *scan_args)
+        scan_result = self._scan(key.value.scan_index(), cursor, *scan_args)
         result_cursor = scan_result[0]
         keys: list[bytes] = cast(List[bytes], scan_result[1])
         if no_values:
@@ -44,7 +44,7 @@ def _list_pop(get_slice: Callable[[int], slice], key: CommandItem, *args: bytes)
 
 
 class ListCommandsMixin(CommandsMixinBase):
-    _blocking: Callable[[float | int | None, Callable[[bool], Any]], Any]
+    _blocking: Callable[[float | int | None, Sequence[bytes], Callable[[bool], Any]], Any]
 
     def _bpop_pass(self, keys: list[bytes], op: Callable[[list[bytes]], bytes], first_pass: bool) -> list[bytes] | None:
         for key in keys:
@@ -64,7 +64,7 @@ class ListCommandsMixin(CommandsMixinBase):
     def _bpop(self, args: Any, op: Callable[[list[bytes]], bytes]) -> Any:
         keys = args[:-1]
         timeout = Timeout.decode(args[-1])
-        return self._blocking(timeout, functools.partial(self._bpop_pass, keys, op))
+        return self._blocking(timeout, keys, functools.partial(self._bpop_pass, keys, op))
 
     @command((bytes, bytes), (bytes,), flags=msgs.FLAG_NO_SCRIPT)
     def blpop(self, *args: bytes) -> Any:
@@ -98,7 +98,7 @@ class ListCommandsMixin(CommandsMixinBase):
 
     @command(name="BRPOPLPUSH", fixed=(bytes, bytes, Timeout), flags=msgs.FLAG_NO_SCRIPT)
     def brpoplpush(self, source: bytes, destination: bytes, timeout: float) -> Any:
-        return self._blocking(timeout, functools.partial(self._brpoplpush_pass, source, destination))
+        return self._blocking(timeout, (source,), functools.partial(self._brpoplpush_pass, source, destination))
 
     @command((Key(list, None), Int))
     def lindex(self, key: CommandItem, index: int) -> Any:
@@ -158,7 +158,9 @@ class ListCommandsMixin(CommandsMixinBase):
         dst: bytes,
         timeout: float,
     ) -> Any:
-        return self._blocking(timeout, functools.partial(self._lmove, first_list, second_list, src, dst))
+        return self._blocking(
+            timeout, (first_list.key,), functools.partial(self._lmove, first_list, second_list, src, dst)
+        )
 
     @command(fixed=(Key(),), repeat=(bytes,))
     def lpop(self, key: CommandItem, *args: bytes) -> bytes | list[bytes] | None:
@@ -187,6 +189,7 @@ class ListCommandsMixin(CommandsMixinBase):
         keys, count, left = parse_mpop_args("blmpop", numkeys, args, ("left", "right"))
         return self._blocking(
             timeout,
+            keys,
             functools.partial(self._lmpop, keys, count, left),
         )
 
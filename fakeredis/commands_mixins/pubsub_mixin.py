@@ -5,25 +5,28 @@ from typing import Any, Callable
 
 from fakeredis import _msgs as msgs
 from fakeredis._commands import command
-from fakeredis._helpers import NoResponse, SimpleError, compile_pattern
+from fakeredis._helpers import NoResponse, SimpleError, pattern_matcher
 from fakeredis.commands_mixins._mixin_base import CommandsMixinBase
 
 
 class PubSubCommandsMixin(CommandsMixinBase):
     put_response: Callable[[Any], None]
+    put_responses: Callable[[Iterable[Any]], None]
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
         self._pubsub = 0  # Count of subscriptions
 
     def _subscribe(self, channels: Iterable[bytes], subscribers: dict[bytes, Any], mtype: bytes) -> NoResponse:
+        replies = []
         for channel in channels:
             subs = subscribers[channel]
             if self not in subs:
                 subs.add(self)
                 self._pubsub += 1
-            msg = [mtype, channel, self._pubsub]
-            self.put_response(msg)
+                self._server.update_keyspace_listeners(subscribers, channel, 1)
+            replies.append([mtype, channel, self._pubsub])
+        self.put_responses(replies)
         return NoResponse()
 
     def _unsubscribe(self, channels: Iterable[bytes], subscribers: dict[bytes, Any], mtype: bytes) -> NoResponse:
@@ -32,6 +35,7 @@ class PubSubCommandsMixin(CommandsMixinBase):
             for channel, subs in subscribers.items():
                 if self in subs:
                     channels.append(channel)
+        replies = []
         for channel in channels:
             subs = subscribers.get(channel, set())
             if self in subs:
@@ -39,8 +43,9 @@ class PubSubCommandsMixin(CommandsMixinBase):
                 if not subs:
                     del subscribers[channel]
                 self._pubsub -= 1
-            msg = [mtype, channel, self._pubsub]
-            self.put_response(msg)
+                self._server.update_keyspace_listeners(subscribers, channel, -1)
+            replies.append([mtype, channel, self._pubsub])
+        self.put_responses(replies)
         return NoResponse()
 
     def _numsub(self, subscribers: dict[bytes, Any], *channels: bytes) -> list[Any]:
@@ -79,13 +84,11 @@ class PubSubCommandsMixin(CommandsMixinBase):
         for sock in subs:
             sock.put_response(msg)
             receivers += 1
-        for pattern, socks in self._server.psubscribers.items():
-            regex = compile_pattern(pattern)
-            if regex.match(channel):
-                msg = [b"pmessage", pattern, channel, message]
-                for sock in socks:
-                    sock.put_response(msg)
-                    receivers += 1
+        for pattern, socks in self._server.psubscribers.matching(channel):
+            msg = [b"pmessage", pattern, channel, message]
+            for sock in socks:
+                sock.put_response(msg)
+                receivers += 1
         return receivers
 
     @command((bytes, bytes))
@@ -96,13 +99,11 @@ class PubSubCommandsMixin(CommandsMixinBase):
         for sock in subs:
             sock.put_response(msg)
             receivers += 1
-        for pattern, socks in self._server.psubscribers.items():
-            regex = compile_pattern(pattern)
-            if regex.match(channel):
-                msg = [b"pmessage", pattern, channel, message]
-                for sock in socks:
-                    sock.put_response(msg)
-                    receivers += 1
+        for pattern, socks in self._server.psubscribers.matching(channel):
+            msg = [b"pmessage", pattern, channel, message]
+            for sock in socks:
+                sock.put_response(msg)
+                receivers += 1
         return receivers
 
     @command(name="PUBSUB NUMPAT", fixed=(), repeat=())
@@ -112,8 +113,8 @@ class PubSubCommandsMixin(CommandsMixinBase):
     def _channels(self, subscribers_dict: dict[bytes, Any], *patterns: bytes) -> list[bytes]:
         channels = list(subscribers_dict.keys())
         if len(patterns) > 0:
-            regex = compile_pattern(patterns[0])
-            channels = [ch for ch in channels if regex.match(ch)]
+            match = pattern_matcher(patterns[0])
+            channels = [ch for ch in channels if match(ch)]
         return channels
 
     @command(name="PUBSUB CHANNELS", fixed=(), repeat=(bytes,))
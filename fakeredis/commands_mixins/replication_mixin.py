@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any, Callable
+
+from fakeredis import _msgs as msgs
+from fakeredis import _rdb
+from fakeredis._commands import Int, command
+from fakeredis._helpers import OK, NoResponse, SimpleError, SimpleString, casematch
+from fakeredis._replication import REPLICA_ACK_KEY
+from fakeredis.commands_mixins._mixin_base import CommandsMixinBase
+
+
+class ReplicationCommandsMixin(CommandsMixinBase):
+    _blocking: Callable[[float | int | None, Sequence[bytes], Callable[[bool], Any], Callable[[], Any] | None], Any]
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # Set on the clients of the replicas: the replication offset they acknowledged, and the port they listen on
+        self._repl_ack_offset = -1
+        self._repl_listening_port: int | None = None
+
+    @command(name=["REPLICAOF", "SLAVEOF"], fixed=(bytes, bytes), flags=msgs.FLAG_NO_SCRIPT)
+    def replicaof(self, host: bytes, port: bytes) -> SimpleString:
+        if casematch(host, b"no") and casematch(port, b"one"):
+            self._server.replicaof(None)
+        else:
+            self._server.replicaof((host.decode(), Int.decode(port)))
+        return OK
+
+    @command(name="ROLE", fixed=())
+    def role(self) -> list[Any]:
+        link = self._server.master_link
+        if link is not None:
+            return [b"slave", link.host.encode(), link.port, link.state.encode(), link.offset]
+        replicas = []
+        for sock in self._server.replicas:
+            host, _, port = str(sock._client_info.get("addr", "")).rpartition(":")
+            if sock._repl_listening_port is not None:
+                port = str(sock._repl_listening_port)
+            replicas.append([host.encode(), port.encode(), str(sock._repl_ack_offset).encode()])
+        return [b"master", self._server.repl_offset, replicas]
+
+    @command(name="PSYNC", fixed=(bytes, bytes), flags=msgs.FLAG_NO_SCRIPT)
+    def psync(self, replid: bytes, offset: bytes) -> list[Any]:
+        """Start feeding the replication stream to this client, a replica.
+
+        The reply holds a snapshot of the dataset as commands recreating it, up to the current offset of the
+        stream, instead of the RDB payload redis sends after +FULLRESYNC.
+        """
+        server = self._server
+        snapshot: list[list[bytes]] = []
+        for db_num, db in sorted(server.dbs.items()):
+            items = list(db.items())
+            if not items:
+                continue
+            snapshot.append([b"SELECT", str(db_num).encode()])
+            for key, item in items:
+                snapshot.append([b"RESTORE", key, b"0", _rdb.dump_value(item.value), b"REPLACE"])
+                if item.expireat is not None:
+                    snapshot.append([b"PEXPIREAT", key, str(int(item.expireat * 1000)).encode()])
+        if server.repl_db >= 0:
+            snapshot.append([b"SELECT", str(server.repl_db).encode()])
+        server.replicas.add(self)
+        self._repl_ack_offset = server.repl_offset
+        return [b"FULLRESYNC", server.replid.encode(), server.repl_offset, snapshot]
+
+    @command(name="REPLCONF", fixed=(), repeat=(bytes, bytes), flags=msgs.FLAG_NO_SCRIPT)
+    def replconf(self, *args: bytes) -> SimpleString | NoResponse:
+        for option, value in zip(args[::2], args[1::2]):
+            if casematch(option, b"ack"):
+                self._repl_ack_offset = Int.decode(value)
+                for db in self._server.dbs.values():
+                    db.notify_watch(REPLICA_ACK_KEY)
+                return NoResponse()  # Acknowledgements are not replied to
+            if casematch(option, b"listening-port"):
+                self._repl_listening_port = Int.decode(value)
+        return OK
+
+    @command(name="WAIT", fixed=(Int, Int))
+    def wait(self, numreplicas: int, timeout: int) -> int:
+        server = self._server
+        if timeout < 0:
+            raise SimpleError(msgs.TIMEOUT_NEGATIVE_MSG)
+        if server.master_link is not None:
+            raise SimpleError(msgs.WAIT_REPLICA_MSG)
+        offset = server.repl_offset
+
+        def acknowledged() -> int:
+            return sum(1 for sock in server.replicas if sock._repl_ack_offset >= offset)
+
+        def enough_acknowledged(first_pass: bool) -> int | None:
+            count = acknowledged()
+            if count >= numreplicas:
+                return count
+            if first_pass and server.replicas:
+                server.feed_replicas([b"REPLCONF", b"GETACK", b"*"])
+            return None
+
+        res = self._blocking(timeout / 1000, (REPLICA_ACK_KEY,), enough_acknowledged, acknowledged)
+        return acknowledged() if res is None else res
@@ -1,23 +1,52 @@
 from __future__ import annotations
 
+import logging
 import time
 from typing import Any
 
 from fakeredis import _msgs as msgs
 from fakeredis._commands import DbIndex, command
-from fakeredis._helpers import BGSAVE_STARTED, OK, SimpleError, SimpleString, casematch
+from fakeredis._helpers import (
+    BGREWRITEAOF_SCHEDULED,
+    BGREWRITEAOF_STARTED,
+    BGSAVE_SCHEDULED,
+    BGSAVE_STARTED,
+    OK,
+    SimpleError,
+    SimpleString,
+    casematch,
+)
 from fakeredis.commands_mixins._mixin_base import CommandsMixinBase
 from fakeredis.model import get_all_commands_info, get_command_info
 
+LOGGER = logging.getLogger("fakeredis")
+
 
 class ServerCommandsMixin(CommandsMixinBase):
     @command((), (bytes,), flags=msgs.FLAG_NO_SCRIPT)
     def bgsave(self, *args: bytes) -> SimpleString:
         if len(args) > 1 or (len(args) == 1 and not casematch(args[0], b"schedule")):
             raise SimpleError(msgs.SYNTAX_ERROR_MSG)
-        self._server.lastsave = int(time.time())
+        if self._server.bgsave_thread is not None:
+            raise SimpleError(msgs.BGSAVE_IN_PROGRESS_MSG)
+        if self._server.aof_rewrite_thread is not None:
+            if not args:
+                raise SimpleError(msgs.BGSAVE_AOF_REWRITE_IN_PROGRESS_MSG)
+            self._server.bgsave_scheduled = True
+            return BGSAVE_SCHEDULED
+        self._server.bgsave()
         return BGSAVE_STARTED
 
+    @command((), flags=msgs.FLAG_NO_SCRIPT)
+    def bgrewriteaof(self) -> SimpleString:
+        if self._server.aof_rewrite_thread is not None:
+            raise SimpleError(msgs.AOF_REWRITE_IN_PROGRESS_MSG)
+        if self._server.bgsave_thread is not None:
+            self._server.aof_rewrite_scheduled = True
+            return BGREWRITEAOF_SCHEDULED
+        self._server.bgrewriteaof()
+        return BGREWRITEAOF_STARTED
+
     @command(())
     def dbsize(self) -> int:
         return len(self._db)
@@ -44,7 +73,13 @@ class ServerCommandsMixin(CommandsMixinBase):
 
     @command((), flags=msgs.FLAG_NO_SCRIPT)
     def save(self) -> SimpleString:
-        self._server.lastsave = int(time.time())
+        if self._server.bgsave_thread is not None:
+            raise SimpleError(msgs.BGSAVE_IN_PROGRESS_MSG)
+        try:
+            self._server.save()
+        except OSError as exc:
+            LOGGER.warning("Saving to %s failed: %s", self._server.rdb_path, exc)
+            raise SimpleError(msgs.SAVE_FAILED_MSG)
         return OK
 
     @command(())
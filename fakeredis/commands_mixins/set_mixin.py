@@ -1,12 +1,11 @@
 from __future__ import annotations
 
 import random
-from collections.abc import Sequence
 from typing import Any, Callable
 
 from fakeredis import _msgs as msgs
 from fakeredis._commands import CommandItem, Int, Key, command
-from fakeredis._helpers import OK, SimpleError, SimpleString, casematch
+from fakeredis._helpers import OK, ScanIndex, SimpleError, SimpleString, casematch
 from fakeredis.commands_mixins._mixin_base import CommandsMixinBase
 from fakeredis.model import ExpiringMembersSet
 
@@ -46,7 +45,7 @@ def _setop(
 
 
 class SetCommandsMixin(CommandsMixinBase):
-    _scan: Callable[[Sequence[bytes], int, bytes], list[bytes | list[bytes]]]
+    _scan: Callable[[ScanIndex, int, bytes], list[bytes | list[bytes]]]
 
     @command((Key(ExpiringMembersSet), bytes), (bytes,))
     def sadd(self, key: CommandItem, *members: bytes) -> int:
@@ -165,7 +164,7 @@ class SetCommandsMixin(CommandsMixinBase):
 
     @command((Key(ExpiringMembersSet), Int), (bytes, bytes))
     def sscan(self, key: CommandItem, cursor: int, *args: bytes) -> Any:
-        return self._scan(key.value, cursor, *args)
+        return self._scan(key.value.scan_index(), cursor, *args)
 
     @command((Key(ExpiringMembersSet),), (Key(ExpiringMembersSet),))
     def sunion(self, *keys: CommandItem) -> Any:
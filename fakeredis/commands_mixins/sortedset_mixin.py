@@ -82,7 +82,7 @@ class ScoreTest(RedisType):
 
 
 class SortedSetCommandsMixin(CommandsMixinBase):
-    _blocking: Callable[[float | int | None, Callable[[bool], Any]], Any]
+    _blocking: Callable[[float | int | None, Sequence[bytes], Callable[[bool], Any]], Any]
     _scan: Callable[..., Any]
     _encodefloat: Callable[[float, bool], bytes]
 
@@ -132,13 +132,13 @@ class SortedSetCommandsMixin(CommandsMixinBase):
     def bzpopmin(self, *args: bytes) -> list[list[bytes]] | None:
         keys = args[:-1]
         timeout = Timeout.decode(args[-1])
-        return self._blocking(timeout, functools.partial(self._bzpop, keys, False))  # type:ignore
+        return self._blocking(timeout, keys, functools.partial(self._bzpop, keys, False))  # type:ignore
 
     @command((bytes, bytes), (bytes,), flags=msgs.FLAG_NO_SCRIPT)
     def bzpopmax(self, *args: bytes) -> list[list[bytes]] | None:
         keys = args[:-1]
         timeout = Timeout.decode(args[-1])
-        return self._blocking(timeout, functools.partial(self._bzpop, keys, True))  # type:ignore
+        return self._blocking(timeout, keys, functools.partial(self._bzpop, keys, True))  # type:ignore
 
     @staticmethod
     def _limit_items(items: list[_T], offset: int, count: int) -> list[_T]:
@@ -430,11 +430,11 @@ class SortedSetCommandsMixin(CommandsMixinBase):
 
     @command((Key(ZSet), Int), (bytes, bytes))
     def zscan(self, key: CommandItem, cursor: int, *args: bytes) -> list[Any]:
-        new_cursor, ans = self._scan(key.value.items(), cursor, *args)
+        new_cursor, ans = self._scan(key.value.scan_index(), cursor, *args)
         flat = []
-        for member, score in ans:
+        for member in ans:
             flat.append(member)
-            flat.append(self._encodefloat(score, False))
+            flat.append(self._encodefloat(key.value[member], False))
         return [new_cursor, flat]
 
     @command((Key(ZSet), bytes))
@@ -658,5 +658,6 @@ class SortedSetCommandsMixin(CommandsMixinBase):
         keys, count, reverse = parse_mpop_args("bzmpop", numkeys, args, ("max", "min"))
         return self._blocking(  # type: ignore[no-any-return]
             timeout,
+            keys,
             functools.partial(self._zmpop, keys, count, reverse),
         )
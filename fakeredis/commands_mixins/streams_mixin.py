@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import functools
+from collections.abc import Sequence
 from typing import Any, Callable
 
 import fakeredis._msgs as msgs
@@ -12,7 +13,7 @@ from fakeredis.model import StreamEntryKey, StreamGroup, StreamRangeTest, XStrea
 
 
 class StreamsCommandsMixin(CommandsMixinBase):
-    _blocking: Callable[[float | int | None, Callable[[bool], Any]], Any]
+    _blocking: Callable[[float | int | None, Sequence[bytes], Callable[[bool], Any]], Any]
 
     @command(name="XADD", fixed=(Key(),), repeat=(bytes,))
     def xadd(self, key: CommandItem, *args: bytes) -> bytes | None:
@@ -89,6 +90,7 @@ class StreamsCommandsMixin(CommandsMixinBase):
         else:
             return self._blocking(  # type: ignore
                 timeout / 1000.0,
+                [key for key, _ in stream_start_id_list],
                 functools.partial(self._xread, stream_start_id_list, count, True),
             )
 
@@ -125,6 +127,7 @@ class StreamsCommandsMixin(CommandsMixinBase):
         else:
             res = self._blocking(
                 timeout / 1000.0,
+                [stream for _, stream, _ in group_params],
                 functools.partial(self._xreadgroup, consumer_name, group_params, count, noack, min_idle_time),
             )
         if self._client_info.protocol_version == 2:
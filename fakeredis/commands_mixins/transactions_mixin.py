@@ -13,19 +13,21 @@ class TransactionsCommandsMixin(CommandsMixinBase):
 
     def __init__(self, *args, **kwargs) -> None:  # type: ignore
         super().__init__(*args, **kwargs)
-        self._watches: set[Any] = set()
+        # (key, database) => modification version of the key when it was watched
+        self._watches: dict[tuple[bytes, Any], int] = {}
         # When in a MULTI, set to a list of function calls
         self._transaction: list[Any] | None = None
         self._transaction_failed = False
         # Set when executing the commands from EXEC
         self._in_transaction = False
-        self._watch_notified = False
 
     def _clear_watches(self) -> None:
-        self._watch_notified = False
         while self._watches:
-            (key, db) = self._watches.pop()
-            db.remove_watch(key, self)
+            (key, db), _ = self._watches.popitem()
+            db.remove_watch(key)
+
+    def _watched_keys_modified(self) -> bool:
+        return any(db.watch_version(key) != version for (key, db), version in self._watches.items())
 
     # Transaction commands
     @command((), flags=[msgs.FLAG_NO_SCRIPT, msgs.FLAG_TRANSACTION])
@@ -48,9 +50,9 @@ class TransactionsCommandsMixin(CommandsMixinBase):
         transaction = self._transaction
         self._transaction = None
         self._transaction_failed = False
-        watch_notified = self._watch_notified
+        watched_keys_modified = self._watched_keys_modified()
         self._clear_watches()
-        if watch_notified:
+        if watched_keys_modified:
             return None
         result = []
         for func, sig, args in transaction:
@@ -82,10 +84,6 @@ class TransactionsCommandsMixin(CommandsMixinBase):
         if self._transaction is not None:
             raise SimpleError(msgs.WATCH_INSIDE_MULTI_MSG)
         for key in keys:
-            if key not in self._watches:
-                self._watches.add((key.key, self._db))
-                self._db.add_watch(key.key, self)
+            if (key.key, self._db) not in self._watches:
+                self._watches[(key.key, self._db)] = self._db.add_watch(key.key)
         return OK
-
-    def notify_watch(self) -> None:
-        self._watch_notified = True
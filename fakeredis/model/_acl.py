@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import fnmatch
 import hashlib
-from typing import Any
+from typing import Any, Callable
 
 from fakeredis import _msgs as msgs
 
@@ -346,7 +346,8 @@ class AccessControlList:
         )
         self._log.append(entry)
 
-    def validate_command(self, username: bytes, client_info: bytes, fields: list[bytes]) -> None:
+    def validate_command(self, username: bytes, client_info: Callable[[], bytes], fields: list[bytes]) -> None:
+        # client_info is only called to log a denied command, so allowed commands don't pay for formatting it
         if username not in self._user_acl:
             return
         if fields and fields[0].lower() == b"auth":
@@ -359,14 +360,14 @@ class AccessControlList:
         if command_info is None:
             return
         if not user_acl.command_allowed(command_info, fields):
-            self.add_log_record(b"command", b"toplevel", fields[0], username, client_info)
+            self.add_log_record(b"command", b"toplevel", fields[0], username, client_info())
             raise SimpleError(msgs.NO_PERMISSION_ERROR.format(username.decode(), fields[0].lower().decode()))
         keys_not_allowed = user_acl.keys_not_allowed(command_info, fields)
         if len(keys_not_allowed) > 0:
-            self.add_log_record(b"key", b"toplevel", keys_not_allowed[0], username, client_info)
+            self.add_log_record(b"key", b"toplevel", keys_not_allowed[0], username, client_info())
             raise SimpleError(msgs.NO_PERMISSION_KEY_ERROR)
         if b"@pubsub" in command_info[6]:
             channels_not_allowed = user_acl.channels_not_allowed(command_info, fields)
             if len(channels_not_allowed) > 0:
-                self.add_log_record(b"channel", b"toplevel", channels_not_allowed[0], username, client_info)
+                self.add_log_record(b"channel", b"toplevel", channels_not_allowed[0], username, client_info())
                 raise SimpleError(msgs.NO_PERMISSION_CHANNEL_ERROR)
@@ -7,6 +7,7 @@ from typing import Any, AnyStr
 from fakeredis._helpers import asbytes
 
 _COMMAND_INFO: dict[bytes, list[Any]] | None = None
+_WRITE_COMMANDS: frozenset[str] | None = None
 
 
 def _encode_obj(obj: Any) -> Any:
@@ -38,6 +39,16 @@ def get_command_info(cmd: bytes) -> list[Any] | None:
     return _COMMAND_INFO.get(cmd, None)
 
 
+def is_write_command(cmd: str) -> bool:
+    """Whether a command (e.g. `set` or `client setname`) may modify the dataset, from its `write` flag."""
+    global _WRITE_COMMANDS
+    if _WRITE_COMMANDS is None:
+        _WRITE_COMMANDS = frozenset(
+            name.decode() for name, info in get_all_commands_info().items() if b"write" in info[2]
+        )
+    return cmd in _WRITE_COMMANDS
+
+
 def get_categories() -> list[bytes]:
     _load_command_info()
     if _COMMAND_INFO is None:
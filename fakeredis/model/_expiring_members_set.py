@@ -4,7 +4,7 @@ from collections.abc import Iterable, Iterator
 from typing import Any
 
 from fakeredis import _msgs as msgs
-from fakeredis._helpers import current_time
+from fakeredis._helpers import ScanIndex, current_time
 from fakeredis._typing import Self
 
 from ._base_type import BaseModel
@@ -17,22 +17,30 @@ class ExpiringMembersSet(BaseModel):
     def __init__(self, values: dict[bytes, int | None] | None = None, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
         self._values: dict[bytes, int | None] = values or {}
+        # Created by the first SSCAN, then kept in sync with `_values`.
+        self._scan_index: ScanIndex | None = None
 
     def _expire_members(self) -> None:
         now = current_time()
         removed = [k for k in self._values if (self._values[k] or (now + 1)) < now]
         for k in removed:
             self._values.pop(k)
+            if self._scan_index is not None:
+                self._scan_index.discard(k)
 
     def set_member_expireat(self, key: bytes, when_ms: int) -> int:
         now = current_time()
         if when_ms <= now:
-            self._values.pop(key, None)
+            self.discard(key)
             return 2
         self._values[key] = when_ms
+        if self._scan_index is not None:
+            self._scan_index.add(key)
         return 1
 
     def clear_key_expireat(self, key: bytes) -> bool:
+        if self._scan_index is not None:
+            self._scan_index.discard(key)
         return self._values.pop(key, None) is not None
 
     def get_key_expireat(self, key: bytes) -> int | None:
@@ -44,7 +52,7 @@ class ExpiringMembersSet(BaseModel):
         return self._values.__contains__(key)
 
     def __delitem__(self, key: bytes) -> None:
-        self._values.pop(key, None)
+        self.discard(key)
 
     def __len__(self) -> int:
         self._expire_members()
@@ -78,19 +86,35 @@ class ExpiringMembersSet(BaseModel):
         self._expire_members()
         if isinstance(other, ExpiringMembersSet):
             self._values.update(other._values)
+            if self._scan_index is not None:
+                for value in other._values:
+                    self._scan_index.add(value)
             return self
         for value in other:
-            self._values[value] = None
+            self.add(value)
         return self
 
     def discard(self, key: bytes) -> None:
         self._values.pop(key, None)
+        if self._scan_index is not None:
+            self._scan_index.discard(key)
 
     def remove(self, key: bytes) -> None:
         self._values.pop(key)
+        if self._scan_index is not None:
+            self._scan_index.discard(key)
 
     def add(self, key: bytes) -> None:
         self._values[key] = None
+        if self._scan_index is not None:
+            self._scan_index.add(key)
+
+    def scan_index(self) -> ScanIndex:
+        """Return the index SSCAN cursors resume from, creating it on first use."""
+        self._expire_members()
+        if self._scan_index is None:
+            self._scan_index = ScanIndex(self._values)
+        return self._scan_index
 
     def copy(self) -> ExpiringMembersSet:
         return ExpiringMembersSet(self._values.copy())
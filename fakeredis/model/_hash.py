@@ -4,7 +4,7 @@ from collections.abc import Iterable, Iterator
 from typing import Any, AnyStr
 
 from fakeredis import _msgs as msgs
-from fakeredis._helpers import asbytes, current_time
+from fakeredis._helpers import ScanIndex, asbytes, current_time
 
 from ._base_type import BaseModel
 
@@ -19,6 +19,8 @@ class Hash(BaseModel):
         self._values: dict[bytes, bytes] = {}
         # Fields that expired lazily, pending an `hexpired` subkey notification.
         self._expired_fields: list[bytes] = []
+        # Created by the first HSCAN, then kept in sync with `_values`.
+        self._scan_index: ScanIndex | None = None
 
     def _expire_keys(self) -> None:
         now = current_time()
@@ -26,6 +28,8 @@ class Hash(BaseModel):
         for k in expired:
             del self._values[k]
             del self._expirations[k]
+            if self._scan_index is not None:
+                self._scan_index.discard(k)
         self._expired_fields.extend(expired)
 
     def take_expired_fields(self) -> list[bytes]:
@@ -39,6 +43,8 @@ class Hash(BaseModel):
         if when_ms <= now:
             self._values.pop(key_bytes, None)
             self._expirations.pop(key_bytes, None)
+            if self._scan_index is not None:
+                self._scan_index.discard(key_bytes)
             return 2
         self._expirations[key_bytes] = when_ms
         return 1
@@ -62,11 +68,15 @@ class Hash(BaseModel):
         key_bytes = asbytes(key)
         self._expirations.pop(key_bytes, None)
         self._values[key_bytes] = value
+        if self._scan_index is not None:
+            self._scan_index.add(key_bytes)
 
     def __delitem__(self, key: AnyStr) -> None:
         key_bytes = asbytes(key)
         self._values.pop(key_bytes, None)
         self._expirations.pop(key_bytes, None)
+        if self._scan_index is not None:
+            self._scan_index.discard(key_bytes)
 
     def __len__(self) -> int:
         self._expire_keys()
@@ -98,6 +108,8 @@ class Hash(BaseModel):
                 self.clear_key_expireat(k)
         for k, v in values.items():
             self._values[asbytes(k)] = v
+            if self._scan_index is not None:
+                self._scan_index.add(asbytes(k))
 
     def getall(self) -> dict[bytes, bytes]:
         self._expire_keys()
@@ -106,4 +118,13 @@ class Hash(BaseModel):
 
     def pop(self, key: AnyStr, d: Any = None) -> Any:
         self._expire_keys()
+        if self._scan_index is not None:
+            self._scan_index.discard(asbytes(key))
         return self._values.pop(asbytes(key), d)
+
+    def scan_index(self) -> ScanIndex:
+        """Return the index HSCAN cursors resume from, creating it on first use."""
+        self._expire_keys()
+        if self._scan_index is None:
+            self._scan_index = ScanIndex(self._values)
+        return self._scan_index
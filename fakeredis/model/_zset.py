@@ -6,6 +6,7 @@ from typing import Any, cast
 import sortedcontainers
 
 from fakeredis._commands import AfterAny, BeforeAny
+from fakeredis._helpers import ScanIndex
 
 from ._base_type import BaseModel
 
@@ -16,6 +17,8 @@ class ZSet(BaseModel):
     def __init__(self) -> None:
         self._bylex: dict[bytes, float] = {}  # Maps value to score
         self._byscore = sortedcontainers.SortedList()
+        # Created by the first ZSCAN, then kept in sync with `_bylex`.
+        self._scan_index: ScanIndex | None = None
 
     def __contains__(self, value: bytes) -> bool:
         return value in self._bylex
@@ -27,6 +30,8 @@ class ZSet(BaseModel):
             if score == old_score:
                 return False
             self._byscore.remove((old_score, value))
+        elif self._scan_index is not None:
+            self._scan_index.add(value)
         self._bylex[value] = score
         self._byscore.add((score, value))
         return True
@@ -57,6 +62,8 @@ class ZSet(BaseModel):
             return
         else:
             self._byscore.remove((score, key))
+            if self._scan_index is not None:
+                self._scan_index.discard(key)
 
     def zcount(self, _min: float, _max: float) -> int:
         pos1: int = self._byscore.bisect_left(_min)
@@ -106,3 +113,9 @@ class ZSet(BaseModel):
 
     def items(self) -> ItemsView[bytes, Any]:
         return self._bylex.items()
+
+    def scan_index(self) -> ScanIndex:
+        """Return the index ZSCAN cursors resume from, creating it on first use."""
+        if self._scan_index is None:
+            self._scan_index = ScanIndex(self._bylex)
+        return self._scan_index
@@ -12,11 +12,15 @@ import redis
 import valkey
 
 import fakeredis
+from fakeredis._basefakesocket import BaseFakeSocket
 from fakeredis._server import _create_version
 from fakeredis._tcp_server import TCP_SERVER_TEST_PORT, TcpFakeServer
 from fakeredis._typing import AsyncClientType, ClientType, ServerType, VersionType
 from test.testtools import REDIS_PY_VERSION
 
+# Check every response against the protocol; this is off by default since it costs an extra check per value.
+BaseFakeSocket.strict_responses = True
+
 
 @dataclass
 class ServerDetails:
@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+import pytest
+import redis
+
+import fakeredis
+
+
+def test_active_expire_cycle_removes_expired_keys():
+    server = fakeredis.FakeServer()
+    r = fakeredis.FakeStrictRedis(server=server)
+    for i in range(100):
+        r.set(f"key{i}", "value", px=1)
+    r.set("persistent", "value")
+    time.sleep(0.01)
+    assert server.active_expire_cycle() == 100
+    assert server.dbs[0]._dict.keys() == {b"persistent"}
+
+
+def test_active_expire_publishes_expired_events():
+    server = fakeredis.FakeServer(active_expire=True, config={b"hz": b"100"})
+    try:
+        r = fakeredis.FakeStrictRedis(server=server)
+        r.config_set("notify-keyspace-events", "KEx")
+        p = r.pubsub()
+        p.psubscribe("__key*__:*")
+        assert p.get_message(timeout=1)["type"] == "psubscribe"
+        r.set("foo", "bar", px=10)
+        messages = {(m["channel"], m["data"]) for m in iter(lambda: p.get_message(timeout=0.5), None)}
+        assert (b"__keyspace@0__:foo", b"expired") in messages
+        assert (b"__keyevent@0__:expired", b"foo") in messages
+    finally:
+        server.stop_active_expire()
+
+
+def test_config_set_hz(r):
+    r.config_set("hz", 50)
+    with pytest.raises(redis.ResponseError):
+        r.config_set("hz", "fast")
+    with pytest.raises(redis.ResponseError):
+        r.config_set("hz", -1)
+    r.config_set("hz", 10)
+
+
+@pytest.mark.asyncio
+async def test_active_expire_task():
+    server = fakeredis.FakeServer(config={b"hz": b"100"})
+    r = fakeredis.FakeAsyncRedis(server=server)
+    await r.set("foo", "bar", px=10)
+    task = asyncio.create_task(server.active_expire_task())
+    try:
+        await asyncio.sleep(0.1)
+        assert server.dbs[0]._dict == {}
+    finally:
+        task.cancel()
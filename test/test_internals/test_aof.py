@@ -0,0 +1,265 @@
+import asyncio
+import threading
+import time
+from typing import Any
+
+import pytest
+import redis
+
+import fakeredis
+import fakeredis.aioredis
+from fakeredis import _aof
+
+
+def _server(tmp_path: Any, fsync: bytes = b"always") -> fakeredis.FakeServer:
+    config = {b"dir": str(tmp_path).encode(), b"appendonly": b"yes", b"appendfsync": fsync}
+    return fakeredis.FakeServer(config=config)
+
+
+def _restart(server: fakeredis.FakeServer, tmp_path: Any) -> fakeredis.FakeRedis:
+    server.aof.close()
+    return fakeredis.FakeRedis(server=_server(tmp_path))
+
+
+def _wait_rewrite(server: fakeredis.FakeServer) -> None:
+    while server.aof_rewrite_thread is not None:
+        server.aof_rewrite_thread.join()
+
+
+def test_append_and_load(tmp_path):
+    server = _server(tmp_path)
+    r = fakeredis.FakeRedis(server=server)
+    r.set("foo", "bar")
+    r.get("foo")
+    r.rpush("list", 1, 2, 3)
+    r.select(2)
+    r.set("ttl", "value", ex=100)
+
+    with open(tmp_path / "appendonly.aof", "rb") as f:
+        data = f.read()
+    assert data.startswith(_aof.encode_command([b"SELECT", b"0"]) + _aof.encode_command([b"set", b"foo", b"bar"]))
+    assert b"get" not in data
+    # Relative expiry times are appended as absolute ones
+    assert b"PEXPIREAT" in data
+
+    r2 = _restart(server, tmp_path)
+    assert r2.get("foo") == b"bar"
+    assert r2.lrange("list", 0, -1) == [b"1", b"2", b"3"]
+    r2.select(2)
+    assert 0 < r2.ttl("ttl") <= 100
+
+
+def test_load_nondeterministic_commands(tmp_path):
+    server = _server(tmp_path)
+    r = fakeredis.FakeRedis(server=server)
+    r.sadd("set", *range(10))
+    popped = r.spop("set", 3)
+    stream_id = r.xadd("stream", {"field": "value"})
+
+    r2 = _restart(server, tmp_path)
+    assert r2.smembers("set") == {str(i).encode() for i in range(10)} - set(popped)
+    assert r2.xrange("stream") == [(stream_id, {b"field": b"value"})]
+
+
+def test_load_xadd_with_star_values(tmp_path):
+    server = _server(tmp_path)
+    r = fakeredis.FakeRedis(server=server)
+    r.xadd("stream", {"f": "*"}, id="1-1")
+    r.xadd("stream", {"*": "*"}, maxlen=10, approximate=True)
+    assert r.execute_command("XADD", "stream", "MAXLEN", "=", "10", "9999999999999-1", "*", "x") == b"9999999999999-1"
+
+    r2 = _restart(server, tmp_path)
+    assert r2.xrange("stream") == r.xrange("stream")
+    assert r2.xrange("stream")[0] == (b"1-1", {b"f": b"*"})
+
+
+def test_append_blocking_commands(tmp_path):
+    server = _server(tmp_path)
+    r = fakeredis.FakeRedis(server=server)
+    r.rpush("list", 1, 2, 3, 4, 5)
+    r.zadd("zset", {"a": 1, "b": 2, "c": 3})
+    assert r.blpop(["empty", "list"], 1) == (b"list", b"1")
+    assert r.brpop(["list"], 1) == (b"list", b"5")
+    assert r.brpoplpush("list", "other", 1) == b"4"
+    assert r.blmove("list", "other", 1, "LEFT", "RIGHT") == b"2"
+    assert r.blmpop(1, 2, "empty", "other", direction="RIGHT", count=5) == [b"other", [b"2", b"4"]]
+    assert r.bzpopmin(["zset"], 1) == (b"zset", b"a", 1.0)
+    assert r.bzmpop(1, 1, ["zset"], max=True) == [b"zset", [[b"c", b"3"]]]
+    assert r.blpop(["empty"], 0.01) is None
+
+    with open(tmp_path / "appendonly.aof", "rb") as f:
+        data = f.read()
+    # Blocking commands are appended as the non-blocking commands with their effect
+    for name in (b"blpop", b"brpop", b"brpoplpush", b"blmove", b"blmpop", b"bzpopmin", b"bzmpop", b"empty"):
+        assert name not in data
+    assert _aof.encode_command([b"lpop", b"list"]) in data
+    assert _aof.encode_command([b"rpoplpush", b"list", b"other"]) in data
+    assert _aof.encode_command([b"rpop", b"other", b"2"]) in data
+    assert _aof.encode_command([b"zpopmax", b"zset", b"1"]) in data
+
+    r2 = _restart(server, tmp_path)
+    assert r2.lrange("list", 0, -1) == [b"3"]
+    assert not r2.exists("other")
+    assert r2.zrange("zset", 0, -1) == [b"b"]
+
+
+def test_append_blocked_xreadgroup(tmp_path):
+    server = _server(tmp_path)
+    r = fakeredis.FakeRedis(server=server)
+    r.xgroup_create("stream", "group", id="$", mkstream=True)
+    assert r.xreadgroup("group", "consumer", {"stream": ">"}, block=10) == []
+    thread = threading.Thread(target=lambda: fakeredis.FakeRedis(server=server).xadd("stream", {"a": "b"}))
+    threading.Timer(0.05, thread.start).start()
+    [[_, [(entry_id, _)]]] = r.xreadgroup("group", "consumer", {"stream": ">"}, block=5000)
+
+    with open(tmp_path / "appendonly.aof", "rb") as f:
+        data = f.read()
+    assert data.count(b"xreadgroup") == 1
+    assert b"BLOCK" not in data
+
+    r2 = _restart(server, tmp_path)
+    assert r2.xpending("stream", "group")["min"] == entry_id
+
+
+@pytest.mark.asyncio
+async def test_append_async_blocking_command(tmp_path):
+    server = _server(tmp_path)
+    r = fakeredis.aioredis.FakeRedis(server=server)
+    task = asyncio.create_task(r.blpop(["empty", "list"], 5))
+    await asyncio.sleep(0.01)
+    await r.rpush("list", "a", "b")
+    assert await task == (b"list", b"a")
+    data = (tmp_path / "appendonly.aof").read_bytes()
+    assert b"blpop" not in data
+    assert data.endswith(_aof.encode_command([b"lpop", b"list"]))
+
+
+def test_load_truncated_file(tmp_path):
+    with open(tmp_path / "appendonly.aof", "wb") as f:
+        f.write(_aof.encode_command([b"SET", b"foo", b"bar"]) + _aof.encode_command([b"SET", b"foo", b"baz"])[:-3])
+    r = fakeredis.FakeRedis(server=_server(tmp_path))
+    assert r.get("foo") == b"bar"
+
+
+def test_load_ignores_rdb_file(tmp_path):
+    config = {b"dir": str(tmp_path).encode(), b"dbfilename": b"dump.rdb"}
+    r = fakeredis.FakeRedis(server=fakeredis.FakeServer(config=config))
+    r.set("foo", "bar")
+    r.save()
+    r2 = fakeredis.FakeRedis(server=_server(tmp_path))
+    assert r2.get("foo") is None
+
+
+@pytest.mark.parametrize("fsync", [b"everysec", b"no"])
+def test_writer_thread(tmp_path, fsync):
+    server = _server(tmp_path, fsync)
+    r = fakeredis.FakeRedis(server=server)
+    r.set("foo", "bar")
+    deadline = time.monotonic() + 5
+    while (tmp_path / "appendonly.aof").stat().st_size == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    r2 = _restart(server, tmp_path)
+    assert r2.get("foo") == b"bar"
+
+
+def test_bgrewriteaof(tmp_path):
+    server = _server(tmp_path)
+    r = fakeredis.FakeRedis(server=server)
+    for _ in range(100):
+        r.incr("counter")
+    r.zadd("zset", {"a": 1.5, "b": float("-inf")})
+    r.hset("hash", mapping={str(i): i for i in range(100)})
+    r.xadd("stream", {"field": "value"}, id="1-1")
+    r.set("ttl", "value", px=100000)
+    r.select(1)
+    r.sadd("set", "a")
+    assert r.bgrewriteaof()
+    _wait_rewrite(server)
+    assert server.aof_last_bgrewrite_status == "ok"
+    r.set("after", "rewrite")
+
+    with open(tmp_path / "appendonly.aof", "rb") as f:
+        data = f.read()
+    assert data.count(b"counter") == 1
+    r2 = _restart(server, tmp_path)
+    assert r2.get("counter") == b"100"
+    assert r2.zrange("zset", 0, -1, withscores=True) == [(b"b", float("-inf")), (b"a", 1.5)]
+    assert r2.hlen("hash") == 100
+    assert r2.xrange("stream") == [(b"1-1", {b"field": b"value"})]
+    assert 0 < r2.pttl("ttl") <= 100000
+    r2.select(1)
+    assert r2.smembers("set") == {b"a"}
+    assert r2.get("after") == b"rewrite"
+
+
+def _slow_rewrite(monkeypatch: Any) -> threading.Event:
+    """Make BGREWRITEAOF wait for the returned event before writing the keys of its snapshot."""
+    release = threading.Event()
+    rewrite_entry = _aof.rewrite_entry
+
+    def slow_rewrite_entry(*args: Any) -> bytes:
+        # Keys are encoded by the rewriting thread, or by commands accessing them before it did
+        if threading.current_thread().name == "fakeredis-bgrewriteaof":
+            release.wait()
+        return rewrite_entry(*args)
+
+    monkeypatch.setattr(_aof, "rewrite_entry", slow_rewrite_entry)
+    return release
+
+
+def test_bgrewriteaof_keeps_commands_run_meanwhile(tmp_path, monkeypatch):
+    release = _slow_rewrite(monkeypatch)
+    server = _server(tmp_path)
+    r = fakeredis.FakeRedis(server=server)
+    r.set("foo", "bar")
+    r.rpush("list", *range(100))
+    assert r.bgrewriteaof()
+    r.rpush("list", "new")
+    r.select(3)
+    r.set("foo", "db3")
+    release.set()
+    _wait_rewrite(server)
+
+    r2 = _restart(server, tmp_path)
+    assert r2.get("foo") == b"bar"
+    assert r2.llen("list") == 101
+    r2.select(3)
+    assert r2.get("foo") == b"db3"
+
+
+def test_bgrewriteaof_and_bgsave(tmp_path, monkeypatch):
+    release = _slow_rewrite(monkeypatch)
+    config = {b"dir": str(tmp_path).encode(), b"appendonly": b"yes", b"dbfilename": b"dump.rdb"}
+    server = fakeredis.FakeServer(config=config)
+    r = fakeredis.FakeRedis(server=server)
+    r.set("foo", "bar")
+    assert r.bgrewriteaof()
+    with pytest.raises(redis.ResponseError, match="rewriting already in progress"):
+        r.bgrewriteaof()
+    with pytest.raises(redis.ResponseError, match="Another child process is active"):
+        r.bgsave(schedule=False)
+    # The scheduled BGSAVE starts once the rewrite is done
+    assert r.bgsave(schedule=True)
+    assert server.bgsave_scheduled
+    release.set()
+    _wait_rewrite(server)
+    while server.bgsave_thread is not None:
+        server.bgsave_thread.join()
+    assert (tmp_path / "dump.rdb").exists()
+
+
+def test_bgrewriteaof_disabled(tmp_path):
+    server = fakeredis.FakeServer(config={b"dir": str(tmp_path).encode()})
+    r = fakeredis.FakeRedis(server=server)
+    r.set("foo", "bar")
+    assert r.bgrewriteaof()
+    _wait_rewrite(server)
+    assert server.aof is None
+    assert [path.name for path in tmp_path.iterdir()] == ["appendonly.aof"]
+    # Commands are not appended while the append-only file is disabled
+    r.set("baz", "qux")
+
+    server2 = fakeredis.FakeServer(config={b"dir": str(tmp_path).encode(), b"appendonly": b"yes"})
+    r2 = fakeredis.FakeRedis(server=server2)
+    assert r2.get("foo") == b"bar"
+    assert r2.get("baz") is None
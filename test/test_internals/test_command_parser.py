@@ -0,0 +1,60 @@
+import pytest
+import redis
+
+from fakeredis import FakeServer
+from fakeredis._fakesocket import FakeSocket
+from fakeredis._helpers import SimpleError
+
+
+def _socket() -> FakeSocket:
+    return FakeSocket(FakeServer(), db=0, client_class=redis.Redis)
+
+
+def _responses(sock: FakeSocket) -> list:
+    result = []
+    while not sock.responses.empty():
+        result.append(sock.responses.get_nowait())
+    return result
+
+
+def test_parse_pipeline_in_one_buffer():
+    sock = _socket()
+    value = b"x" * 100_000
+    data = b"".join(
+        b"*3\r\n$3\r\nSET\r\n$%d\r\nkey%d\r\n$%d\r\n%s\r\n" % (len(b"key%d" % i), i, len(value), value)
+        for i in range(20)
+    )
+    sock.sendall(data + b"*2\r\n$3\r\nGET\r\n$4\r\nkey7\r\n")
+    responses = _responses(sock)
+    assert responses[:20] == [b"OK"] * 20
+    assert responses[20] == value
+
+
+def test_parse_command_split_across_sends():
+    sock = _socket()
+    data = b"*3\r\n$3\r\nSET\r\n$3\r\nfoo\r\n$6\r\nb\r\nar\n\r\n*2\r\n$3\r\nGET\r\n$3\r\nfoo\r\n"
+    for i in range(len(data)):
+        sock.sendall(data[i : i + 1])
+    assert _responses(sock) == [b"OK", b"b\r\nar\n"]
+
+
+def test_pipeline_batch_queues_each_response():
+    sock = _socket()
+    sock.sendall(
+        b"*3\r\n$3\r\nSET\r\n$3\r\nfoo\r\n$1\r\n1\r\n"
+        b"*2\r\n$4\r\nINCR\r\n$3\r\nfoo\r\n"
+        b"*1\r\n$7\r\nUNKNOWN\r\n"
+        b"*2\r\n$3\r\nGET\r\n$3\r\nfoo\r\n"
+    )
+    responses = _responses(sock)
+    assert responses[:2] == [b"OK", 2]
+    assert isinstance(responses[2], redis.ResponseError)
+    assert responses[3] == b"2"
+
+
+def test_parse_error_releases_server_lock():
+    sock = _socket()
+    with pytest.raises(SimpleError):
+        sock.sendall(b"*2\r\n$4\r\nECHO\r\n$2\r\nhi\r\n+OK\r\n")
+    assert _responses(sock) == [b"hi"]
+    assert not sock._server.lock.locked()
@@ -0,0 +1,37 @@
+import pytest
+
+from fakeredis._commands import Int, Key, Signature
+from fakeredis._helpers import Database, SimpleError
+
+
+def test_apply_caches_plan_per_arity():
+    sig = Signature("mset", "mset", (), (Key(), bytes))
+    db = Database(None)
+    args, items = sig.apply([b"k1", b"v1", b"k2", b"v2"], db, (7,))
+    assert [item.key for item in items] == [b"k1", b"k2"]
+    assert args[1] == b"v1" and args[3] == b"v2"
+    assert 4 in sig._plans
+    with pytest.raises(SimpleError):
+        sig.apply([b"k1", b"v1", b"k2"], db, (7,))
+    assert 3 not in sig._plans
+
+
+def test_apply_short_circuits_before_later_conversions():
+    sig = Signature("getrange", "getrange", (Key(bytes, b""), Int))
+    db = Database(None)
+    assert sig.apply([b"missing", b"not-an-int"], db, (7,)) == (b"",)
+
+
+def test_apply_converts_arguments():
+    sig = Signature("expire", "expire", (Key(), Int))
+    db = Database(None)
+    with pytest.raises(SimpleError):
+        sig.apply([b"key", b"not-an-int"], db, (7,))
+    args, _ = sig.apply([b"key", b"10"], db, (7,))
+    assert args[1] == 10
+
+
+def test_dispatch_is_case_insensitive(r):
+    r.execute_command("SET", "foo", "bar")
+    assert r.execute_command("gEt", "foo") == b"bar"
+    assert r.execute_command("GET", "foo") == b"bar"
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import pickle
+import threading
+
+from fakeredis._commands import CommandItem, Item
+from fakeredis._helpers import Database, ScanIndex
+
+
+def _set(db: Database, key: bytes, value: bytes, expireat: float | None = None) -> None:
+    item = CommandItem(key, db, db.get(key))
+    item.value = value
+    if expireat is not None:
+        item.expireat = expireat
+    with db.condition:
+        item.writeback()
+
+
+def test_len_removes_only_expired_keys():
+    db = Database(threading.Lock())
+    db.time = 100.0
+    for i in range(10):
+        _set(db, b"key%d" % i, b"value", expireat=100.0 + i)
+    _set(db, b"persistent", b"value")
+    assert len(db) == 11
+    db.time = 104.5
+    assert len(db) == 6
+    assert sorted(db) == [b"key5", b"key6", b"key7", b"key8", b"key9", b"persistent"]
+
+
+def test_changed_expiry_is_respected():
+    db = Database(threading.Lock())
+    db.time = 100.0
+    _set(db, b"key", b"value", expireat=101.0)
+    item = CommandItem(b"key", db, db.get(b"key"))
+    item.expireat = 200.0
+    with db.condition:
+        item.writeback()
+    db.time = 150.0
+    assert len(db) == 1
+    _set(db, b"key", b"value")  # Drops the expiry
+    db.time = 300.0
+    assert list(db) == [b"key"]
+
+
+def test_expiry_index_is_compacted():
+    db = Database(threading.Lock())
+    db.time = 100.0
+    _set(db, b"key", b"value", expireat=1000.0)
+    for i in range(1000):
+        item = CommandItem(b"key", db, db.get(b"key"))
+        item.expireat = 1001.0 + i
+        with db.condition:
+            item.writeback()
+    assert len(db._expiry_heap) < 100
+
+
+def test_stored_item_expiry_is_tracked():
+    db1, db2 = Database(threading.Lock()), Database(threading.Lock())
+    db1.time = db2.time = 100.0
+    item = Item(b"value")
+    item.expireat = 101.0
+    db2[b"key"] = item
+    assert len(db2) == 1
+    db2.time = 102.0
+    assert len(db2) == 0
+    db1.swap(db2)
+    assert len(db1) == 0
+
+
+def test_scan_index_keeps_cursor_across_deletes():
+    index = ScanIndex([b"key%d" % i for i in range(100)])
+    cursor, page = index.scan(0, 10)
+    assert page == [b"key%d" % i for i in range(10)]
+    for i in range(80):
+        index.discard(b"key%d" % i)
+    index.add(b"new")
+    seen = list(page)
+    while cursor:
+        cursor, page = index.scan(cursor, 10)
+        seen.extend(page)
+    assert seen == [b"key%d" % i for i in range(10)] + [b"key%d" % i for i in range(80, 100)] + [b"new"]
+    assert len(index._keys) < 60
+
+
+def test_scan_index_follows_database():
+    db = Database(threading.Lock())
+    db.time = 100.0
+    for i in range(5):
+        _set(db, b"key%d" % i, b"value", expireat=101.0 if i % 2 else None)
+    db.time = 102.0
+    with db.condition:
+        db.remove_expired()
+    assert db.scan_index.scan(0, 10) == (0, [b"key0", b"key2", b"key4"])
+    with db.condition:
+        del db[b"key2"]
+        assert db.scan_index.random_key() in (b"key0", b"key4")
+        db.clear()
+    assert db.scan_index.scan(0, 10) == (0, [])
+
+
+def test_scan_index_pickles_live_keys():
+    index = ScanIndex([b"a", b"b", b"c"])
+    index.discard(b"b")
+    restored = pickle.loads(pickle.dumps(index))
+    assert restored.scan(0, 10) == (0, [b"a", b"c"])
+
+
+def test_writes_only_wake_clients_blocked_on_the_key():
+    db = Database(threading.Lock())
+    woken = []
+    db.add_blocked_client([b"a", b"b"], lambda: woken.append("ab"))
+    db.add_blocked_client([b"c"], lambda: woken.append("c"))
+    _set(db, b"b", b"value")
+    assert woken == ["ab"]
+    _set(db, b"d", b"value")
+    assert woken == ["ab"]
+    db.wake_all()
+    assert sorted(woken) == ["ab", "ab", "c"]
+
+
+def test_removed_blocked_client_is_not_woken():
+    db = Database(threading.Lock())
+    woken = []
+
+    def callback() -> None:
+        woken.append(True)
+
+    db.add_blocked_client([b"a"], callback)
+    db.remove_blocked_client([b"a"], callback)
+    _set(db, b"a", b"value")
+    assert woken == []
+    assert db._blocked_clients == {}
+
+
+def test_watch_versions_only_track_watched_keys():
+    db = Database(threading.Lock())
+    version = db.add_watch(b"watched")
+    _set(db, b"other", b"value")
+    assert db.watch_version(b"watched") == version
+    _set(db, b"watched", b"value")
+    assert db.watch_version(b"watched") != version
+    db.remove_watch(b"watched")
+    assert db._watched == {}
+
+
+def test_flush_modifies_only_existing_watched_keys():
+    db = Database(threading.Lock())
+    _set(db, b"present", b"value")
+    present, missing = db.add_watch(b"present"), db.add_watch(b"missing")
+    db.clear()
+    assert db.watch_version(b"present") != present
+    assert db.watch_version(b"missing") == missing
+
+
+def test_writeback_all_wakes_blocked_clients_once():
+    db = Database(threading.Lock())
+    woken = []
+    db.add_blocked_client([b"a", b"b"], lambda: woken.append(len(db)))
+    items = []
+    for key in (b"a", b"b", b"c"):
+        item = CommandItem(key, db, db.get(key))
+        item.value = b"value"
+        items.append(item)
+    with db.condition:
+        db.writeback_all(items)
+    assert woken == [3]  # Once, after all the items were written back
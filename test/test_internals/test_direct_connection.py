@@ -0,0 +1,56 @@
+import pytest
+import redis
+
+import fakeredis
+
+
+@pytest.fixture
+def r() -> fakeredis.FakeRedis:
+    return fakeredis.FakeRedis(connection_class=fakeredis.FakeDirectConnection)
+
+
+def test_direct_connection_commands(r: fakeredis.FakeRedis):
+    assert r.set("foo", "bar") is True
+    assert r.get("foo") == b"bar"
+    assert r.incrbyfloat("num", 1.5) == 1.5
+    assert r.client_setname("name") is True
+    assert r.client_getname() == "name"
+    with pytest.raises(redis.ResponseError):
+        r.lpush("foo", "x")
+
+
+def test_direct_connection_skips_resp_parser(r: fakeredis.FakeRedis, monkeypatch):
+    r.ping()
+    sock = r.connection_pool.get_connection().get_socket()
+
+    def fail(data):
+        raise AssertionError("RESP data was sent")
+
+    monkeypatch.setattr(sock, "sendall", fail)
+    assert r.set("foo", "bar") is True
+
+
+def test_direct_connection_pipeline(r: fakeredis.FakeRedis):
+    with r.pipeline() as p:
+        p.set("foo", "bar").incr("foo").get("foo")
+        res = p.execute(raise_on_error=False)
+    assert res[0] is True
+    assert isinstance(res[1], redis.ResponseError)
+    assert res[2] == b"bar"
+
+
+def test_direct_connection_shares_server():
+    server = fakeredis.FakeServer()
+    direct = fakeredis.FakeRedis(server=server, connection_class=fakeredis.FakeDirectConnection, decode_responses=True)
+    regular = fakeredis.FakeRedis(server=server)
+    direct.hset("h", mapping={"a": 1})
+    assert regular.hgetall("h") == {b"a": b"1"}
+    assert direct.hgetall("h") == {"a": "1"}
+
+
+def test_direct_connection_error():
+    server = fakeredis.FakeServer()
+    r = fakeredis.FakeRedis(server=server, connection_class=fakeredis.FakeDirectConnection)
+    server.connected = False
+    with pytest.raises(redis.ConnectionError):
+        r.set("foo", "bar")
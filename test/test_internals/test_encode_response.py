@@ -0,0 +1,49 @@
+import pytest
+import redis
+
+from fakeredis._basefakesocket import _VALID_RESPONSE_TYPES_RESP2, _VALID_RESPONSE_TYPES_RESP3, _encode_response
+from fakeredis._helpers import NoResponse, SimpleError, SimpleString
+
+
+def _decode_error(error: SimpleError) -> redis.ResponseError:
+    return redis.ResponseError(error.value)
+
+
+def test_encode_resp2_converts_nested_values():
+    result = _encode_response(
+        [b"a", 1, None, "s", 1.5, {b"k": [2.0, ("t",)]}, SimpleString(b"OK")], True, _decode_error, None
+    )
+    assert result == [b"a", 1, None, b"s", b"1.5", [b"k", [b"2", [b"t"]]], b"OK"]
+
+
+def test_encode_resp3_keeps_values():
+    value = {b"k": 1.5, b"s": "str"}
+    assert _encode_response(value, False, _decode_error, None) is value
+
+
+def test_encode_decodes_errors_in_one_pass():
+    result = _encode_response([SimpleError("ERR boom"), [SimpleString(b"QUEUED")]], True, _decode_error, None)
+    assert isinstance(result[0], redis.ResponseError)
+    assert str(result[0]) == "ERR boom"
+    assert result[1] == [b"QUEUED"]
+
+
+def test_encode_without_decoding_keeps_simple_types():
+    error = SimpleError("ERR boom")
+    result = _encode_response([error, SimpleString(b"OK")], True, None, None)
+    assert result[0] is error
+    assert isinstance(result[1], SimpleString)
+
+
+def test_encode_strict_rejects_invalid_types():
+    with pytest.raises(AssertionError):
+        _encode_response([b"a", object()], True, _decode_error, _VALID_RESPONSE_TYPES_RESP2)
+    with pytest.raises(AssertionError):
+        _encode_response([NoResponse()], False, _decode_error, _VALID_RESPONSE_TYPES_RESP3)
+    with pytest.raises(AssertionError):
+        _encode_response((b"a",), False, _decode_error, _VALID_RESPONSE_TYPES_RESP3)
+
+
+def test_encode_not_strict_skips_check():
+    value = object()
+    assert _encode_response([value], True, _decode_error, None) == [value]
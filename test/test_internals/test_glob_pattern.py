@@ -0,0 +1,45 @@
+import pytest
+
+from fakeredis._helpers import PatternIndex, compile_pattern, glob_literal_prefix, pattern_matcher
+
+
+@pytest.mark.parametrize(
+    "pattern,prefix",
+    [(b"user:*", b"user:"), (b"user:?0", b"user:"), (b"[ab]*", b""), (b"a\\*b", b"a"), (b"literal", b"literal")],
+)
+def test_glob_literal_prefix(pattern: bytes, prefix: bytes):
+    assert glob_literal_prefix(pattern) == prefix
+
+
+@pytest.mark.parametrize("pattern", [b"*", b"user:*", b"user:**", b"user:1", b"user:?", b"u*:[0-9]", b"u\\*"])
+@pytest.mark.parametrize("key", [b"", b"user:", b"user:1", b"user:12", b"u*", b"usr:5", b"user:\n"])
+def test_pattern_matcher_agrees_with_regex(pattern: bytes, key: bytes):
+    assert bool(pattern_matcher(pattern)(key)) == bool(compile_pattern(pattern).match(key))
+
+
+def test_compiled_patterns_are_cached():
+    assert compile_pattern(b"cached:*") is compile_pattern(b"cached:*")
+    assert pattern_matcher(b"cached:*") is pattern_matcher(b"cached:*")
+
+
+def test_pattern_index_matches_like_each_pattern():
+    patterns = [b"*", b"news.*", b"news.sport*", b"news.sport", b"n?ws.*", b"news.[st]*", b"other", b"", b"news.**"]
+    index = PatternIndex()
+    for pattern in patterns:
+        index.add(pattern)
+    for channel in [b"news.sport", b"news.sports", b"news.tech", b"nows.x", b"other", b"", b"news"]:
+        assert index.match(channel) == [p for p in patterns if pattern_matcher(p)(channel)]
+
+
+def test_pattern_index_discard():
+    index = PatternIndex()
+    for pattern in [b"a*", b"ab*", b"abc", b"a?c"]:
+        index.add(pattern)
+    index.discard(b"ab*")
+    index.discard(b"abc")
+    index.discard(b"missing")
+    assert index.match(b"abc") == [b"a*", b"a?c"]
+    index.discard(b"a*")
+    index.discard(b"a?c")
+    assert len(index) == 0
+    assert index._trie == [{}, []]
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import struct
+import threading
+import time
+from typing import Any
+
+import pytest
+import redis
+
+import fakeredis
+from fakeredis import _rdb, _value_codec
+
+
+def _server(tmp_path: Any) -> fakeredis.FakeServer:
+    return fakeredis.FakeServer(config={b"dir": str(tmp_path).encode(), b"dbfilename": b"dump.rdb"})
+
+
+def _wait_bgsave(server: fakeredis.FakeServer) -> None:
+    while server.bgsave_thread is not None:
+        server.bgsave_thread.join()
+
+
+def test_crc64():
+    assert _rdb.crc64(b"123456789") == 0xE9C6D914C4B8D9CA
+
+
+def test_save_load(tmp_path):
+    r = fakeredis.FakeRedis(server=_server(tmp_path))
+    r.set("string", "value")
+    r.set("int", 12345)
+    r.rpush("list", *range(100))
+    r.sadd("set", "a", "b")
+    r.hset("hash", mapping={"f1": "v1", "f2": "v2"})
+    r.zadd("zset", {"a": 1.5, "b": -2, "c": float("inf")})
+    r.set("ttl", "value", px=100000)
+    r.xadd("stream", {"field": "value"}, id="1-1")
+    r.select(3)
+    r.set("db3", "value")
+    assert r.save()
+
+    with open(tmp_path / "dump.rdb", "rb") as f:
+        data = f.read()
+    assert data.startswith(b"REDIS0009")
+    assert data[-9] == _rdb.RDB_OPCODE_EOF
+    assert struct.unpack("<Q", data[-8:])[0] == _rdb.crc64(data[:-8])
+
+    r2 = fakeredis.FakeRedis(server=_server(tmp_path))
+    assert r2.get("string") == b"value"
+    assert r2.get("int") == b"12345"
+    assert r2.lrange("list", 0, -1) == [str(i).encode() for i in range(100)]
+    assert r2.smembers("set") == {b"a", b"b"}
+    assert r2.hgetall("hash") == {b"f1": b"v1", b"f2": b"v2"}
+    assert r2.zrange("zset", 0, -1, withscores=True) == [(b"b", -2.0), (b"a", 1.5), (b"c", float("inf"))]
+    assert 0 < r2.pttl("ttl") <= 100000
+    assert r2.xrange("stream") == [(b"1-1", {b"field": b"value"})]
+    assert r2.dbsize() == 8
+    r2.select(3)
+    assert r2.get("db3") == b"value"
+
+
+def test_save_hash_with_expiring_fields(tmp_path):
+    r = fakeredis.FakeRedis(server=_server(tmp_path))
+    r.hset("hash", mapping={"f1": "v1", "f2": "v2"})
+    r.hpexpire("hash", 100000, "f1")
+    r.save()
+
+    r2 = fakeredis.FakeRedis(server=_server(tmp_path))
+    assert r2.hgetall("hash") == {b"f1": b"v1", b"f2": b"v2"}
+    assert 0 < r2.hpttl("hash", "f1")[0] <= 100000
+    assert r2.hpttl("hash", "f2") == [-1]
+
+
+def _write_rdb(path: Any, *entries: bytes) -> None:
+    data = b"REDIS0009\xfe\x00" + b"".join(entries) + b"\xff"
+    with open(path / "dump.rdb", "wb") as f:
+        f.write(data + struct.pack("<Q", _rdb.crc64(data)))
+
+
+def test_load_skips_expired_keys(tmp_path):
+    _write_rdb(tmp_path, b"\x00\x03foo\x03bar", b"\xfc" + struct.pack("<Q", 1000) + b"\x00\x07expired\x05value")
+    r = fakeredis.FakeRedis(server=_server(tmp_path))
+    assert r.keys() == [b"foo"]
+
+
+def test_load_wrong_checksum(tmp_path):
+    r = fakeredis.FakeRedis(server=_server(tmp_path))
+    r.set("foo", "bar")
+    r.save()
+    with open(tmp_path / "dump.rdb", "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes((last[0] ^ 1,)))
+    with pytest.raises(ValueError, match="checksum"):
+        _server(tmp_path)
+
+
+def test_load_encoded_strings(tmp_path):
+    # Strings as redis writes them: integers and LZF compressed strings
+    _write_rdb(
+        tmp_path,
+        b"\x00\x03int\xc0\x7f",
+        b"\x00\x04int2\xc1\x39\x30",
+        b"\x00\x04int4\xc2\x15\xcd\x5b\x07",
+        b"\x00\x03lzf\xc3\x06\x0b\x01aa\xe0\x00\x01",
+    )
+    r = fakeredis.FakeRedis(server=_server(tmp_path))
+    assert r.mget("int", "int2", "int4", "lzf") == [b"127", b"12345", b"123456789", b"a" * 11]
+
+
+def test_save_without_dbfilename(tmp_path):
+    server = fakeredis.FakeServer(config={b"dir": str(tmp_path).encode()})
+    r = fakeredis.FakeRedis(server=server)
+    r.set("foo", "bar")
+    assert r.save()
+    assert r.bgsave()
+    assert server.bgsave_thread is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_save_failure(tmp_path):
+    r = fakeredis.FakeRedis(server=_server(tmp_path / "missing"))
+    with pytest.raises(redis.ResponseError):
+        r.save()
+
+
+def test_bgsave_writes_snapshot(tmp_path):
+    server = _server(tmp_path)
+    r = fakeredis.FakeRedis(server=server)
+    r.rpush("list", *range(1000))
+    r.hset("hash", mapping={str(i): i for i in range(1000)})
+    r.set("string", "value")
+    assert r.bgsave()
+    # Writes made while the snapshot is written are not part of it
+    r.rpush("list", "new")
+    r.hset("hash", "new", "value")
+    r.delete("string")
+    r.set("new", "value")
+    _wait_bgsave(server)
+    assert server.rdb_last_bgsave_status == "ok"
+
+    r2 = fakeredis.FakeRedis(server=_server(tmp_path))
+    assert r2.llen("list") == 1000
+    assert r2.hlen("hash") == 1000
+    assert r2.get("string") == b"value"
+    assert r2.get("new") is None
+    assert all(db.snapshot is None for db in server.dbs.values())
+
+
+def test_bgsave_large_key_written_meanwhile(tmp_path):
+    server = _server(tmp_path)
+    r = fakeredis.FakeRedis(server=server)
+    r.hset("hash", mapping={str(i): i for i in range(300000)})
+    assert r.bgsave()
+    # Once the saving thread took the key, writing to it waits until the key is encoded
+    snapshot = server.dbs[0].snapshot
+    while b"hash" in snapshot._items:
+        time.sleep(0.001)
+    r.hset("hash", "new", "value")
+    _wait_bgsave(server)
+    assert server.rdb_last_bgsave_status == "ok"
+
+    r2 = fakeredis.FakeRedis(server=_server(tmp_path))
+    assert r2.hlen("hash") == 300000
+    assert r2.hget("hash", "new") is None
+
+
+def test_bgsave_in_progress(tmp_path, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    write_file = _rdb._write_file
+
+    def slow_write_file(*args: Any) -> None:
+        started.set()
+        release.wait()
+        write_file(*args)
+
+    monkeypatch.setattr(_rdb, "_write_file", slow_write_file)
+    server = _server(tmp_path)
+    r = fakeredis.FakeRedis(server=server)
+    r.set("foo", "bar")
+    assert r.bgsave()
+    started.wait()
+    for schedule in (False, True):
+        with pytest.raises(redis.ResponseError, match="Background save already in progress"):
+            r.bgsave(schedule=schedule)
+    with pytest.raises(redis.ResponseError, match="Background save already in progress"):
+        r.save()
+    r.set("foo", "baz")
+    release.set()
+    _wait_bgsave(server)
+
+    r2 = fakeredis.FakeRedis(server=_server(tmp_path))
+    assert r2.get("foo") == b"bar"
+
+
+def _listpack(*elements: bytes | int) -> bytes:
+    """A listpack of strings shorter than 64 bytes and integers between 0 and 127."""
+    body = b""
+    for element in elements:
+        entry = bytes((element,)) if isinstance(element, int) else bytes((0x80 | len(element),)) + element
+        body += entry + bytes((len(entry),))
+    return struct.pack("<IH", 7 + len(body), len(elements)) + body + b"\xff"
+
+
+def _ziplist(*elements: bytes | int) -> bytes:
+    """A ziplist of strings shorter than 64 bytes and integers between 0 and 12."""
+    body = b""
+    for element in elements:
+        body += b"\x00" + (bytes((0xF1 + element,)) if isinstance(element, int) else bytes((len(element),)) + element)
+    return struct.pack("<IIH", 11 + len(body), 0, len(elements)) + body + b"\xff"
+
+
+def _dump_payload(rdb_type: int, *strings: bytes, version: int = 11) -> bytes:
+    data = bytes((rdb_type,)) + b"".join(strings) + struct.pack("<H", version)
+    return data + struct.pack("<Q", _rdb.crc64(data))
+
+
+def _module_value(data: bytes) -> bytes:
+    encoded = _rdb._encode_length(_rdb.FAKEREDIS_MODULE_ID) + _rdb._encode_length(_rdb.RDB_MODULE_OPCODE_STRING)
+    return encoded + _rdb._encode_string(data) + _rdb._encode_length(_rdb.RDB_MODULE_OPCODE_EOF)
+
+
+def test_restore_compact_encodings():
+    r = fakeredis.FakeRedis()
+    # Values as DUMP returns them in redis 7
+    r.restore(
+        "hash", 0, _dump_payload(_rdb.RDB_TYPE_HASH_LISTPACK, _rdb._encode_string(_listpack(b"f", b"v", b"n", 12)))
+    )
+    r.restore(
+        "zset", 0, _dump_payload(_rdb.RDB_TYPE_ZSET_LISTPACK, _rdb._encode_string(_listpack(b"a", b"1.5", b"b", 2)))
+    )
+    r.restore("set", 0, _dump_payload(_rdb.RDB_TYPE_SET_LISTPACK, _rdb._encode_string(_listpack(b"a", 7))))
+    intset = struct.pack("<II3h", 2, 3, -1, 5, 300)
+    r.restore("intset", 0, _dump_payload(_rdb.RDB_TYPE_SET_INTSET, _rdb._encode_string(intset)))
+    nodes = [b"\x02", _rdb._encode_string(_listpack(b"a", 1)), b"\x01", _rdb._encode_string(b"big")]
+    r.restore("list", 0, _dump_payload(_rdb.RDB_TYPE_LIST_QUICKLIST_2, b"\x02", *nodes))
+    # Values as DUMP returns them in redis 6
+    r.restore(
+        "ziplist", 0, _dump_payload(_rdb.RDB_TYPE_HASH_ZIPLIST, _rdb._encode_string(_ziplist(b"f", 3)), version=9)
+    )
+    quicklist = [_rdb._encode_string(_ziplist(b"a", 0)), _rdb._encode_string(_ziplist(b"b"))]
+    r.restore("quicklist", 0, _dump_payload(_rdb.RDB_TYPE_LIST_QUICKLIST, b"\x02", *quicklist, version=9))
+
+    assert r.hgetall("hash") == {b"f": b"v", b"n": b"12"}
+    assert r.zrange("zset", 0, -1, withscores=True) == [(b"a", 1.5), (b"b", 2.0)]
+    assert r.smembers("set") == {b"a", b"7"}
+    assert r.smembers("intset") == {b"-1", b"5", b"300"}
+    assert r.lrange("list", 0, -1) == [b"a", b"1", b"big"]
+    assert r.hgetall("ziplist") == {b"f": b"3"}
+    assert r.lrange("quicklist", 0, -1) == [b"a", b"0", b"b"]
+
+
+def test_restore_rejects_unsupported_payloads():
+    r = fakeredis.FakeRedis()
+    data = pickle.dumps(b"bar")
+    with pytest.raises(redis.ResponseError, match="DUMP payload version or checksum are wrong"):
+        r.restore("pickle", 0, hashlib.sha1(data).digest() + data)
+    with pytest.raises(redis.ResponseError, match="DUMP payload version or checksum are wrong"):
+        r.restore("version", 0, _dump_payload(_rdb.RDB_TYPE_STRING, b"\x03bar", version=_rdb.RDB_MAX_VERSION + 1))
+    for payload in (
+        _dump_payload(_rdb.RDB_TYPE_STRING, b"\x03ba"),
+        _dump_payload(_rdb.RDB_TYPE_STRING, b"\x03barbaz"),
+        _dump_payload(_rdb.RDB_TYPE_MODULE_2, _module_value(b"\x63")),
+        _dump_payload(_rdb.RDB_TYPE_HASH_LISTPACK, _rdb._encode_string(_listpack(b"f"))),
+    ):
+        with pytest.raises(redis.ResponseError, match="Bad data format"):
+            r.restore("foo", 0, payload)
+    assert r.keys() == []
+
+
+def test_restore_invalid_module_value():
+    r = fakeredis.FakeRedis()
+    # A hash with an expiring field it does not hold, and a value that cannot be the value of a key
+    invalid_hash = bytes((_value_codec._OBJECT, 1)) + _value_codec.encode(({b"f": b"v"}, {b"missing": 1000}))
+    for data in (invalid_hash, _value_codec.encode({b"member"})):
+        with pytest.raises(redis.ResponseError, match="Bad data format"):
+            r.restore("foo", 0, _dump_payload(_rdb.RDB_TYPE_MODULE_2, _module_value(data)))
+    assert r.keys() == []
+
+
+def test_save_load_time_series_rules(tmp_path):
+    r = fakeredis.FakeRedis(server=_server(tmp_path))
+    # The source of the rule is written, and loaded, before its destination
+    r.ts().create("source")
+    r.ts().create("dest")
+    r.ts().createrule("source", "dest", "sum", 10)
+    r.ts().madd([("source", 1, 1), ("source", 2, 2), ("source", 11, 3)])
+    r.save()
+
+    server = _server(tmp_path)
+    r2 = fakeredis.FakeRedis(server=server)
+    assert r2.ts().range("dest", "-", "+") == [(0, 3.0)]
+    r2.ts().add("source", 21, 4)
+    assert r2.ts().range("dest", "-", "+") == [(0, 3.0), (10, 3.0)]
+    source, dest = server.dbs[0][b"source"].value, server.dbs[0][b"dest"].value
+    assert source.rules[0].dest_key is dest
+    assert dest.source_key == b"source"
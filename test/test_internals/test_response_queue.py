@@ -0,0 +1,55 @@
+import queue
+import threading
+import time
+
+import pytest
+
+from fakeredis._helpers import ResponseQueue
+
+
+def test_wait_times_out_on_empty_queue():
+    responses = ResponseQueue()
+    start = time.monotonic()
+    assert responses.wait(0.05) is False
+    assert time.monotonic() - start >= 0.05
+
+
+def test_put_wakes_every_waiter():
+    responses = ResponseQueue()
+    woken = []
+    waiters = [threading.Thread(target=lambda: woken.append(responses.wait(5))) for _ in range(2)]
+    for waiter in waiters:
+        waiter.start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    responses.put(b"OK")
+    for waiter in waiters:
+        waiter.join()
+    assert woken == [True, True]
+    assert time.monotonic() - start < 1
+    assert responses.get_nowait() == b"OK"
+
+
+def test_get_waits_for_put_from_other_thread():
+    responses = ResponseQueue()
+    putter = threading.Timer(0.05, responses.put, (b"OK",))
+    putter.start()
+    assert responses.get(timeout=5) == b"OK"
+    putter.join()
+
+
+def test_get_times_out():
+    responses = ResponseQueue()
+    with pytest.raises(queue.Empty):
+        responses.get(timeout=0.01)
+    with pytest.raises(queue.Empty):
+        responses.get_nowait()
+
+
+def test_put_many_keeps_order():
+    responses = ResponseQueue()
+    responses.put(1)
+    responses.put_many([2, 3])
+    assert responses.qsize() == 3
+    assert [responses.get_nowait() for _ in range(3)] == [1, 2, 3]
+    assert responses.empty()
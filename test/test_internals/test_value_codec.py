@@ -0,0 +1,100 @@
+import math
+from typing import Any
+
+import pytest
+
+from fakeredis import _value_codec
+from fakeredis._helpers import Database
+from fakeredis.model import Hash
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        None,
+        True,
+        0,
+        -1,
+        2**70,
+        -(2**70),
+        1.5,
+        math.inf,
+        b"\x00bytes",
+        "str\udcff",
+        [1, [b"nested"]],
+        (1, "a"),
+        {b"a", 3},
+        {"key": {b"nested": None}},
+    ],
+)
+def test_encode_decode(value):
+    assert _value_codec.decode(_value_codec.encode(value), Database(None)) == value
+
+
+def test_encode_decode_registered_class():
+    value = Hash()
+    value[b"field"] = b"value"
+    value._expirations[b"field"] = 1000
+    decoded = _value_codec.decode(_value_codec.encode([value]), Database(None))[0]
+    assert isinstance(decoded, Hash)
+    assert decoded._values == {b"field": b"value"}
+    assert decoded._expirations == {b"field": 1000}
+
+
+def test_encode_unregistered_class():
+    with pytest.raises(TypeError):
+        _value_codec.encode(object())
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"\x63",
+        b"\x05\x05abc",
+        b"\x04\x00",
+        b"\x0b\x7f\x00",
+        b"\x00\x00",
+        # A registered class with a state it cannot be built from
+        b"\x0b\x01\x00",
+    ],
+)
+def test_decode_malformed_data(data):
+    with pytest.raises(ValueError):
+        _value_codec.decode(data, Database(None))
+
+
+def _encoded_object(code: int, state: Any) -> bytes:
+    """An instance of the class registered with `code`, with any state."""
+    return bytes((_value_codec._OBJECT, code)) + _value_codec.encode(state)
+
+
+@pytest.mark.parametrize(
+    "code,state",
+    [
+        # Hash: the expiration of a missing field, an expiry which is not an integer, and a value which is not bytes
+        (1, ({b"field": b"value"}, {b"other": 1000})),
+        (1, ({b"field": b"value"}, {b"field": 1.5})),
+        (1, ({b"field": "value"}, {})),
+        (1, [{}, {}]),
+        # ExpiringMembersSet, StreamEntryKey
+        (2, {b"member": b"expiry"}),
+        (3, (b"1", 0)),
+        # StreamConsumerInfo: missing and unknown attributes
+        (5, {"name": b"consumer", "pending": 0}),
+        (5, {"name": b"consumer", "pending": 0, "last_attempt": 0, "last_success": 0, "extra": 0}),
+        # TDigest
+        (13, (100, [b"1"])),
+    ],
+)
+def test_decode_invalid_state(code, state):
+    with pytest.raises(ValueError, match="Invalid encoded state"):
+        _value_codec.decode(_encoded_object(code, state), Database(None))
+
+
+def test_is_key_value():
+    assert _value_codec.is_key_value(Hash())
+    assert _value_codec.is_key_value({"a": [1, 2.5, None, True, "b"]})
+    assert not _value_codec.is_key_value({b"a"})
+    assert not _value_codec.is_key_value([b"a"])
+    assert not _value_codec.is_key_value({1: "a"})
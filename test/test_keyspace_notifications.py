@@ -3,6 +3,8 @@ import time
 import redis
 from redis.client import PubSub
 
+import fakeredis
+
 
 def wait_for_message(pubsub: PubSub, timeout=0.5, ignore_subscribe_messages=False):
     now = time.time()
@@ -67,3 +69,72 @@ def test_keyspace_notifications_event(r: redis.Redis):
 
     assert keyevent_msg is not None
     assert keyevent_msg["data"] == b"foo"
+
+
+def test_keyspace_notifications_expired(r: redis.Redis):
+    r.config_set("notify-keyspace-events", "Ex")
+    r.set("foo", "bar", px=10)
+
+    p = r.pubsub()
+    p.psubscribe("__keyevent@*__:expired")
+    msg1 = wait_for_message(p)
+    assert msg1["type"] == "psubscribe"
+
+    time.sleep(0.05)
+    assert r.get("foo") is None
+    msg = wait_for_message(p, timeout=1.0)
+    assert msg is not None
+    assert msg["channel"] == b"__keyevent@2__:expired"
+    assert msg["data"] == b"foo"
+
+
+def test_keyspace_notifications_follow_event_classes(r: redis.Redis):
+    r.config_set("notify-keyspace-events", "K$")
+    p = r.pubsub()
+    p.psubscribe("__key*__:*")
+    assert wait_for_message(p)["type"] == "psubscribe"
+
+    r.lpush("list", "a")
+    r.set("foo", "bar")
+    msg = wait_for_message(p)
+    assert msg["channel"] == b"__keyspace@2__:foo"
+    assert msg["data"] == b"set"
+    assert wait_for_message(p, timeout=0.1) is None
+
+    r.config_set("notify-keyspace-events", "")
+    r.set("foo", "baz")
+    assert wait_for_message(p, timeout=0.1) is None
+
+
+def test_keyspace_listeners_follow_subscriptions():
+    server = fakeredis.FakeServer()
+    r = fakeredis.FakeRedis(server=server)
+    p = r.pubsub()
+    p.subscribe("news")
+    assert not server.keyspace_listeners
+    p.subscribe("__keyevent@0__:set")
+    assert server.keyspace_listeners
+    p.unsubscribe("__keyevent@0__:set")
+    assert not server.keyspace_listeners
+    p.psubscribe("*")
+    assert server.keyspace_listeners
+    p.punsubscribe()
+    assert not server.keyspace_listeners
+
+
+def test_keyspace_listeners_count_subscriptions():
+    server = fakeredis.FakeServer()
+    r = fakeredis.FakeRedis(server=server)
+    p1, p2 = r.pubsub(), r.pubsub()
+    p1.subscribe("__keyevent@0__:set")
+    p1.subscribe("__keyevent@0__:set")
+    p2.subscribe("__keyevent@0__:set")
+    p2.psubscribe("*")
+    p1.unsubscribe()
+    assert server.keyspace_listeners
+    p2.punsubscribe()
+    assert server.keyspace_listeners
+    # Subscriptions of a closed connection are dropped when the server cleans it up, before the next command
+    p2.close()
+    r.set("foo", "bar")
+    assert not server.keyspace_listeners
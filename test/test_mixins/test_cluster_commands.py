@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import pytest
+import redis
+import redis.crc
+
+import fakeredis
+from fakeredis._cluster import FakeCluster
+from fakeredis._hash_slot import key_hash_slot
+
+ADDRESSES = [("127.0.0.1", 17000), ("127.0.0.1", 17001), ("127.0.0.1", 17002)]
+
+
+@pytest.fixture
+def cluster() -> FakeCluster:
+    return FakeCluster(ADDRESSES)
+
+
+@pytest.fixture
+def rc(cluster: FakeCluster) -> fakeredis.FakeRedisCluster:
+    return fakeredis.FakeRedisCluster(cluster)
+
+
+def test_cluster_disabled(r: redis.Redis):
+    with pytest.raises(redis.ResponseError, match="cluster support disabled"):
+        r.execute_command("CLUSTER KEYSLOT", "foo")
+    with pytest.raises(redis.ResponseError, match="cluster support disabled"):
+        r.execute_command("CLUSTER SLOTS")
+
+
+@pytest.mark.parametrize("key", [b"", b"foo", b"{user1000}.following", b"{}foo", b"foo{}{bar}", b"{foo}{bar}", b"\xff"])
+def test_key_hash_slot(key: bytes):
+    assert key_hash_slot(key) == redis.crc.key_slot(key)
+
+
+def test_slots_are_split_between_shards(cluster: FakeCluster):
+    assert [(node.first_slot, node.last_slot) for node in cluster.nodes] == [(0, 5460), (5461, 10921), (10922, 16383)]
+    assert cluster.node_for_slot(5461) is cluster.nodes[1]
+    assert cluster.node_for_key(b"foo").first_slot <= key_hash_slot(b"foo") <= cluster.node_for_key(b"foo").last_slot
+
+
+def test_single_shard():
+    shard = FakeCluster(ADDRESSES, shard=1)
+    assert [node.server is not None for node in shard.nodes] == [False, True, False]
+    with pytest.raises(ValueError, match="served by another process"):
+        shard.tcp_server(0)
+    with pytest.raises(ValueError, match="No shard 3"):
+        FakeCluster(ADDRESSES, shard=3)
+    # The shard knows the layout of the whole cluster
+    r = fakeredis.FakeRedis(server=shard.nodes[1].server)
+    assert len(r.execute_command("CLUSTER SLOTS")) == 3
+    with pytest.raises(redis.exceptions.MovedError):
+        r.set("a", 1)
+
+
+def test_cluster_client(rc: fakeredis.FakeRedisCluster, cluster: FakeCluster):
+    keys = [f"key{i}" for i in range(20)]
+    for key in keys:
+        rc.set(key, key)
+    assert [rc.get(key) for key in keys] == [key.encode() for key in keys]
+    for node in cluster.nodes:
+        stored = list(node.server.dbs[0])
+        assert stored
+        assert all(node.first_slot <= key_hash_slot(key) <= node.last_slot for key in stored)
+    rc.mset_nonatomic({"a": 1, "b": 2, "c": 3})
+    assert rc.mget_nonatomic("a", "b", "c") == [b"1", b"2", b"3"]
+
+
+def test_cluster_hash_tags(rc: fakeredis.FakeRedisCluster):
+    rc.mset({"{user}.name": "x", "{user}.mail": "y"})
+    assert rc.mget("{user}.name", "{user}.mail") == [b"x", b"y"]
+    rc.rpush("{user}.list", 1, 2)
+    assert rc.lmove("{user}.list", "{user}.other") == b"1"
+
+
+def test_moved(cluster: FakeCluster):
+    r = fakeredis.FakeRedis(server=cluster.nodes[0].server)
+    slot = key_hash_slot(b"a")
+    owner = cluster.node_for_slot(slot)
+    assert owner is not cluster.nodes[0]
+    with pytest.raises(redis.exceptions.MovedError) as ctx:
+        r.set("a", 1)
+    assert (ctx.value.slot_id, ctx.value.host, ctx.value.port) == (slot, owner.host, owner.port)
+    r.set("b", 1)  # Served by the first shard
+
+
+def test_crossslot(cluster: FakeCluster):
+    r = fakeredis.FakeRedis(server=cluster.nodes[0].server)
+    for cmd in (
+        ("MSET", "b", 1, "{b}x", 2, "a", 3),
+        ("DEL", "b", "a"),
+        ("BLPOP", "b", "a", 0),
+        ("ZUNIONSTORE", "b", 2, "{b}1", "a"),
+        ("XREAD", "STREAMS", "b", "a", 0, 0),
+    ):
+        with pytest.raises(redis.exceptions.ClusterCrossSlotError):
+            r.execute_command(*cmd)
+    assert r.mset({"b": 1, "{b}x": 2}) is True
+
+
+def test_crossslot_in_transaction(cluster: FakeCluster):
+    r = fakeredis.FakeRedis(server=cluster.nodes[0].server)
+    with r.pipeline() as p:
+        p.set("b", 1).delete("b", "a")
+        with pytest.raises(redis.exceptions.ClusterCrossSlotError):
+            p.execute()
+    assert r.get("b") is None
+
+
+def test_cluster_keyslot(rc: fakeredis.FakeRedisCluster):
+    assert rc.cluster_keyslot("foo") == 12182
+    assert rc.cluster_keyslot("{foo}bar") == 12182
+
+
+def test_cluster_slots(rc: fakeredis.FakeRedisCluster):
+    assert rc.cluster_slots() == {
+        (0, 5460): {"primary": ("127.0.0.1", 17000), "replicas": []},
+        (5461, 10921): {"primary": ("127.0.0.1", 17001), "replicas": []},
+        (10922, 16383): {"primary": ("127.0.0.1", 17002), "replicas": []},
+    }
+
+
+def test_cluster_shards(rc: fakeredis.FakeRedisCluster, cluster: FakeCluster):
+    shards = rc.cluster_shards()
+    assert len(shards) == 3
+    assert shards[2]["slots"] == [10922, 16383]
+    assert shards[2]["nodes"][0][b"port"] == 17002
+    assert shards[2]["nodes"][0][b"id"] == cluster.nodes[2].node_id.encode()
+
+
+def test_cluster_nodes_and_myid(rc: fakeredis.FakeRedisCluster, cluster: FakeCluster):
+    node = rc.get_node("127.0.0.1", 17001)
+    assert rc.cluster_myid(node) == cluster.nodes[1].node_id.encode()
+    nodes = rc.execute_command("CLUSTER NODES", target_nodes=node)
+    assert nodes["127.0.0.1:17001"]["flags"] == "myself,master"
+    assert nodes["127.0.0.1:17002"]["slots"] == [["10922", "16383"]]
+    assert len(cluster.nodes[0].node_id) == 40
+
+
+def test_cluster_info(rc: fakeredis.FakeRedisCluster):
+    info = rc.cluster_info(target_nodes=rc.get_node("127.0.0.1", 17002))
+    assert info["cluster_state"] == "ok"
+    assert info["cluster_known_nodes"] == "3"
+    assert info["cluster_my_epoch"] == "3"
+
+
+def test_cluster_keys_in_slot(rc: fakeredis.FakeRedisCluster):
+    rc.mset({"b": 1, "{b}1": 2, "{b}2": 3})
+    slot = key_hash_slot(b"b")
+    assert rc.cluster_countkeysinslot(slot) == 3
+    assert rc.cluster_countkeysinslot(slot + 1) == 0
+    assert sorted(rc.cluster_get_keys_in_slot(slot, 10)) == ["b", "{b}1", "{b}2"]
+    assert len(rc.cluster_get_keys_in_slot(slot, 2)) == 2
+    with pytest.raises(redis.ResponseError, match="Invalid slot"):
+        rc.execute_command("CLUSTER COUNTKEYSINSLOT", 16384, target_nodes=rc.get_default_node())
+    with pytest.raises(redis.ResponseError, match="Invalid slot or number of keys"):
+        rc.execute_command("CLUSTER GETKEYSINSLOT", slot, -1, target_nodes=rc.get_default_node())
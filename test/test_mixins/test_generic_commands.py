@@ -1,3 +1,4 @@
+import struct
 from datetime import datetime, timedelta
 from time import sleep, time
 
@@ -7,6 +8,7 @@ import valkey
 
 from fakeredis import _msgs as msgs
 from fakeredis._helpers import current_time
+from fakeredis._rdb import crc64
 from fakeredis._typing import ClientType
 from test.testtools import raw_command
 
@@ -348,6 +350,38 @@ def test_restore_invalid_ttl(r: ClientType):
     assert isinstance(ctx.value, (redis.ResponseError, valkey.ResponseError))
 
 
+def test_dump_payload_format(r: ClientType):
+    r.set("foo", "bar")
+    dump = r.dump("foo")
+    # The RDB type and encoding of the value, followed by the RDB version and a CRC64 checksum
+    assert dump[:-10] == b"\x00\x03bar"
+    assert struct.unpack("<Q", dump[-8:])[0] == crc64(dump[:-8])
+
+
+def test_dump_restore_collections(r: ClientType):
+    r.rpush("list", "a", "b", 1)
+    r.sadd("set", "a", "b")
+    r.hset("hash", mapping={"f1": "v1", "f2": "v2"})
+    r.zadd("zset", {"a": 1.5, "b": float("-inf")})
+    for key in ("list", "set", "hash", "zset"):
+        r.restore(f"{key}2", 0, r.dump(key))
+    assert r.lrange("list2", 0, -1) == [b"a", b"b", b"1"]
+    assert r.smembers("set2") == {b"a", b"b"}
+    assert r.hgetall("hash2") == {b"f1": b"v1", b"f2": b"v2"}
+    assert r.zrange("zset2", 0, -1, withscores=True) == r.zrange("zset", 0, -1, withscores=True)
+
+
+def test_restore_bad_data_format(r: ClientType):
+    # A payload with a valid version and checksum, but of an unknown RDB type
+    data = b"\x63\x03bar\x09\x00"
+    with pytest.raises(Exception) as ctx:
+        r.restore("foo", 0, data + struct.pack("<Q", crc64(data)))
+
+    assert isinstance(ctx.value, (redis.ResponseError, valkey.ResponseError))
+    assert str(ctx.value) == "Bad data format"
+    assert r.exists("foo") == 0
+
+
 def test_set_then_get(r: ClientType):
     assert r.set("foo", "bar") is True
     assert r.get("foo") == b"bar"
@@ -67,7 +67,6 @@ def test_scan_delete_unseen_key_while_scanning_should_not_returns_it_in_scan(r:
     assert key_to_remove not in keys
 
 
-@pytest.mark.xfail  # todo
 def test_scan_delete_seen_key_while_scanning_should_return_all_keys(r: ClientType):
     size = 30
     all_keys_dict = key_val_dict(size=size)
@@ -215,3 +214,33 @@ def test_scan_family_count_not_positive(r: ClientType):
             raw_command(r, "hscan", "hash", 0, "COUNT", count)
         with pytest.raises(Exception, match="syntax error"):
             raw_command(r, "zscan", "zset", 0, "COUNT", count)
+
+
+def test_collection_scan_delete_seen_members_while_scanning_should_return_all_members(r: ClientType):
+    size = 300
+    members = [f"member{i}".encode() for i in range(size)]
+    r.sadd("set", *members)
+    r.hset("hash", mapping={m: b"v" for m in members})
+    r.zadd("zset", {m: i for i, m in enumerate(members)})
+
+    cursor, seen_set = r.sscan("set", 0, count=50)
+    r.srem("set", *seen_set[:10])
+    while cursor != 0:
+        cursor, data = r.sscan("set", cursor, count=50)
+        seen_set.extend(data)
+    assert set(seen_set) == set(members)
+
+    cursor, seen_hash = r.hscan("hash", 0, count=50)
+    r.hdel("hash", *list(seen_hash)[:10])
+    while cursor != 0:
+        cursor, data = r.hscan("hash", cursor, count=50)
+        seen_hash.update(data)
+    assert set(seen_hash) == set(members)
+
+    cursor, seen_zset = r.zscan("zset", 0, count=50)
+    r.zrem("zset", *[m for m, _ in seen_zset[:10]])
+    r.zadd("zset", {members[-1]: -1})  # Changing a score keeps the member's cursor position
+    while cursor != 0:
+        cursor, data = r.zscan("zset", cursor, count=50)
+        seen_zset.extend(data)
+    assert {m for m, _ in seen_zset} == set(members)
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Generator
+
+import pytest
+import redis
+
+import fakeredis
+from test.testtools import raw_command
+
+
+@pytest.fixture
+def primary() -> fakeredis.FakeServer:
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def replica(primary: fakeredis.FakeServer) -> Generator[fakeredis.FakeServer, None, None]:
+    server = fakeredis.FakeServer()
+    server.replicaof(primary)
+    yield server
+    server.replicaof(None)
+
+
+@pytest.fixture
+def pr(primary: fakeredis.FakeServer) -> fakeredis.FakeRedis:
+    return fakeredis.FakeRedis(server=primary)
+
+
+@pytest.fixture
+def rr(replica: fakeredis.FakeServer) -> fakeredis.FakeRedis:
+    return fakeredis.FakeRedis(server=replica)
+
+
+def test_replica_applies_writes(pr: fakeredis.FakeRedis, rr: fakeredis.FakeRedis, primary: fakeredis.FakeServer):
+    pr.set("foo", "bar")
+    pr.hset("hash", mapping={"a": 1, "b": 2})
+    pr.rpush("list", 1, 2, 3)
+    pr.lpop("list")
+    other_db = fakeredis.FakeRedis(server=primary, db=2)
+    other_db.set("foo", "db2")
+    assert pr.wait(1, 5000) == 1
+    assert rr.get("foo") == b"bar"
+    assert rr.hgetall("hash") == {b"a": b"1", b"b": b"2"}
+    assert rr.lrange("list", 0, -1) == [b"2", b"3"]
+    assert fakeredis.FakeRedis(server=rr.connection_pool.connection_kwargs["server"], db=2).get("foo") == b"db2"
+
+
+def test_replica_full_sync(primary: fakeredis.FakeServer):
+    pr = fakeredis.FakeRedis(server=primary)
+    pr.set("foo", "bar", ex=100)
+    pr.zadd("zset", {"a": 1.5})
+    replica = fakeredis.FakeServer()
+    rr = fakeredis.FakeRedis(server=replica)
+    rr.set("stale", "value")
+    replica.replicaof(primary)
+    try:
+        assert pr.wait(1, 5000) == 1
+        assert rr.get("foo") == b"bar"
+        assert 99 <= rr.ttl("foo") <= 100
+        assert rr.zrange("zset", 0, -1, withscores=True) == [(b"a", 1.5)]
+        assert rr.get("stale") is None
+    finally:
+        replica.replicaof(None)
+
+
+def test_replica_applies_effects(pr: fakeredis.FakeRedis, rr: fakeredis.FakeRedis):
+    pr.sadd("set", *range(20))
+    popped = pr.spop("set", 5)
+    stream_id = pr.xadd("stream", {"field": "value"})
+    pr.eval("redis.call('set', KEYS[1], ARGV[1])", 1, "scripted", "value")
+    assert pr.wait(1, 5000) == 1
+    assert rr.smembers("set") == pr.smembers("set")
+    assert not set(popped) & rr.smembers("set")
+    assert rr.xrange("stream") == [(stream_id, {b"field": b"value"})]
+    assert rr.get("scripted") == b"value"
+
+
+def test_replica_applies_xadd_with_star_values(pr: fakeredis.FakeRedis, rr: fakeredis.FakeRedis):
+    raw_command(pr, "XADD", "stream", "1-1", "f", "*")
+    generated = raw_command(pr, "XADD", "stream", "NOMKSTREAM", "MAXLEN", "~", "10", "LIMIT", "5", "*", "*", "*")
+    raw_command(pr, "XADD", "stream", "MINID", "=", "0", "*", "g", "*")
+    assert pr.wait(1, 5000) == 1
+    assert rr.xrange("stream") == pr.xrange("stream")
+    assert rr.xrange("stream")[:2] == [(b"1-1", {b"f": b"*"}), (generated, {b"*": b"*"})]
+
+
+def test_replica_applies_served_blocking_commands(
+    pr: fakeredis.FakeRedis, rr: fakeredis.FakeRedis, primary: fakeredis.FakeServer
+):
+    threading.Timer(0.05, lambda: fakeredis.FakeRedis(server=primary).rpush("list", "a", "b")).start()
+    assert pr.blpop(["empty", "list"], 5) == (b"list", b"a")
+    assert pr.blpop(["empty"], 0.01) is None
+    # The replica pops from the key served, and does not block on the keys which were empty
+    pr.rpush("empty", "y")
+    assert pr.wait(1, 5000) == 1
+    assert rr.lrange("list", 0, -1) == [b"b"]
+    assert rr.lrange("empty", 0, -1) == [b"y"]
+
+
+def test_replica_is_read_only(pr: fakeredis.FakeRedis, rr: fakeredis.FakeRedis):
+    pr.set("foo", "bar")
+    pr.wait(1, 5000)
+    assert rr.get("foo") == b"bar"
+    with pytest.raises(redis.ReadOnlyError):
+        rr.set("foo", "baz")
+    with pytest.raises(redis.ResponseError, match="WAIT cannot be used with replica instances"):
+        rr.wait(1, 0)
+
+
+def test_wait(pr: fakeredis.FakeRedis, rr: fakeredis.FakeRedis):
+    pr.set("foo", "bar")
+    assert pr.wait(0, 0) >= 0
+    assert pr.wait(1, 0) == 1
+    start = time.monotonic()
+    assert pr.wait(2, 200) == 1
+    assert time.monotonic() - start >= 0.2
+    with pytest.raises(redis.ResponseError, match="timeout is negative"):
+        pr.wait(1, -1)
+
+
+def test_wait_without_replicas(r: redis.Redis):
+    assert r.wait(1, 100) == 0
+    assert r.wait(0, 0) == 0
+
+
+def test_role(pr: fakeredis.FakeRedis, rr: fakeredis.FakeRedis, primary: fakeredis.FakeServer):
+    pr.set("foo", "bar")
+    pr.wait(1, 5000)
+    role, offset, replicas = pr.role()
+    assert (role, offset) == (b"master", primary.repl_offset)
+    assert len(replicas) == 1
+    assert replicas[0][2] == str(offset).encode()
+    role, _host, _port, state, replica_offset = rr.role()
+    assert (role, state, replica_offset) == (b"slave", b"connected", offset)
+
+
+def test_replicaof_no_one(pr: fakeredis.FakeRedis, rr: fakeredis.FakeRedis):
+    pr.set("foo", "bar")
+    pr.wait(1, 5000)
+    assert raw_command(rr, "REPLICAOF", "NO", "ONE") == b"OK"
+    assert rr.role()[0] == b"master"
+    rr.set("foo", "replica")
+    pr.set("foo", "primary")
+    time.sleep(0.1)
+    assert rr.get("foo") == b"replica"
+
+
+def test_replicaof_address():
+    pr = fakeredis.FakeRedis(host="replication-primary", port=7777)
+    pr.set("foo", "bar")
+    rr = fakeredis.FakeRedis()
+    assert rr.replicaof("replication-primary", 7777) == b"OK"
+    try:
+        assert pr.wait(1, 5000) == 1
+        assert rr.get("foo") == b"bar"
+    finally:
+        rr.replicaof("NO", "ONE")
+
+
+def test_chained_replicas(pr: fakeredis.FakeRedis, replica: fakeredis.FakeServer):
+    sub_replica = fakeredis.FakeServer()
+    sub_replica.replicaof(replica)
+    try:
+        pr.set("foo", "bar")
+        sr = fakeredis.FakeRedis(server=sub_replica)
+        deadline = time.monotonic() + 5
+        while sr.get("foo") is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert sr.get("foo") == b"bar"
+        with pytest.raises(redis.ReadOnlyError):
+            sr.set("foo", "baz")
+    finally:
+        sub_replica.replicaof(None)
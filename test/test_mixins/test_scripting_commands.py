@@ -624,7 +624,6 @@ def test_hscan_cursors_are_bytes(r: ClientType):
     assert isinstance(result, bytes)
 
 
-@pytest.mark.xfail  # TODO
 def test_deleting_while_scan(r: ClientType):
     for i in range(100):
         r.set(f"key-{i}", i)
@@ -1021,3 +1021,19 @@ def test_xinfo_groups_pending(r: ClientType):
     r.xreadgroup(group_name, consumer_name, {stream_name: ">"}, count=1)
     assert r.xpending(stream_name, group_name)["pending"] == 1
     assert r.xinfo_groups(stream_name)[0]["pending"] == 1
+
+
+def test_dump_restore_stream(r: ClientType):
+    r.xadd("stream", {"field": "value"}, id="1-1")
+    r.xadd("stream", {"field": "other"}, id="2-1")
+    r.xgroup_create("stream", "group", id="0")
+    r.xreadgroup("group", "consumer", {"stream": ">"}, count=1)
+    r.restore("stream2", 0, r.dump("stream"))
+
+    assert r.xrange("stream2") == r.xrange("stream")
+    assert r.xpending("stream2", "group")["pending"] == 1
+    # The restored group reads from its own stream
+    r.xreadgroup("group", "consumer", {"stream2": ">"})
+    pending = r.xpending_range("stream2", "group", "-", "+", 10)
+    assert [entry["message_id"] for entry in pending] == [b"1-1", b"2-1"]
+    assert r.xpending("stream", "group")["pending"] == 1
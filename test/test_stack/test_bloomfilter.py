@@ -313,3 +313,11 @@ def test_cf_scandump_and_loadchunk(r: redis.Redis):
 
     for x in range(100):
         assert r.cf().exists("myCuckoo2", x), f"{x} not in filter"
+
+
+def test_bf_dump_restore(r: redis.Redis):
+    assert r.bf().create("bloom", 0.01, 1000)
+    r.bf().madd("bloom", "foo", "bar")
+    r.restore("bloom2", 0, r.dump("bloom"))
+    assert r.type("bloom2") == b"MBbloom--"
+    assert intlist(r.bf().mexists("bloom2", "foo", "bar", "baz")) == [1, 1, 0]
@@ -159,3 +159,13 @@ def test_cms_merge_fail(r: redis.Redis):
     assert info.width == 1000
     assert info.depth == 5
     assert info.count == 52
+
+
+def test_cms_dump_restore(r: redis.Redis):
+    assert r.cms().initbydim("cmsDim", 100, 5)
+    r.cms().incrby("cmsDim", ["foo", "bar"], [3, 1])
+    r.restore("cmsDim2", 0, r.dump("cmsDim"))
+    assert r.type("cmsDim2") == b"CMSk-TYPE"
+    assert r.cms().query("cmsDim2", "foo", "bar") == [3, 1]
+    info = r.cms().info("cmsDim2")
+    assert (info.width if get_protocol_version(r) == 2 else info[b"width"]) == 100
@@ -144,3 +144,14 @@ def test_cf_scandump_and_loadchunk(r: redis.Redis):
         r.execute_command("CF.LOADCHUNK", "dst", chunk[0], chunk[1])
     assert r.cf().exists("dst", "item1") == 1
     assert r.cf().exists("dst", "item2") == 1
+
+
+@pytest.mark.supported_server_versions(min_redis_ver="7")
+def test_cf_dump_restore(r: redis.Redis):
+    assert r.cf().create("cuckoo", 1000)
+    r.cf().add("cuckoo", "foo")
+    r.cf().add("cuckoo", "foo")
+    r.restore("cuckoo2", 0, r.dump("cuckoo"))
+    assert r.type("cuckoo2") == b"MBbloomCF"
+    assert r.cf().count("cuckoo2", "foo") == 2
+    assert not r.cf().exists("cuckoo2", "bar")
@@ -619,3 +619,10 @@ def test_mset(r: redis.Redis):
 
     assert r.json().mget(["1"], Path.root_path()) == [1]
     assert r.json().mget(["1", "2"], Path.root_path()) == [1, 2]
+
+
+def test_json_dump_restore(r: redis.Redis):
+    data = {"x": "bar", "y": [1, 2.5, None, True], "z": {}}
+    r.json().set("foo", Path.root_path(), data)
+    r.restore("foo2", 0, r.dump("foo"))
+    assert r.json().get("foo2") == data
@@ -310,3 +310,14 @@ def test_tdigest_cdf_boundary_values(r: redis.Redis):
     res = r.tdigest().cdf("td", 1.0, 20.0)
     assert res[0] == pytest.approx(0.0)
     assert res[1] == pytest.approx(1.0)
+
+
+@pytest.mark.supported_server_versions(min_redis_ver="7")
+def test_tdigest_dump_restore(r: redis.Redis):
+    assert r.tdigest().create("tDigest", 100)
+    assert r.tdigest().add("tDigest", list(range(1, 11)))
+    r.restore("tDigest2", 0, r.dump("tDigest"))
+    assert r.type("tDigest2") == b"TDIS-TYPE"
+    assert r.tdigest().min("tDigest2") == 1
+    assert r.tdigest().max("tDigest2") == 10
+    assert r.tdigest().quantile("tDigest2", 0.5) == r.tdigest().quantile("tDigest", 0.5)
@@ -1108,3 +1108,14 @@ def test_ts_madd_nonexistent_key(r: redis.Redis):
     result = r.ts().madd([("ts1", 1000, 1.0), ("nokey", 2000, 2.0)])
     assert result[0] == 1000
     assert isinstance(result[1], redis.ResponseError)
+
+
+def test_dump_restore(r: redis.Redis):
+    r.ts().create("ts", retention_msecs=100000, labels={"sensor": "1"})
+    r.ts().madd([("ts", 1, 1.5), ("ts", 2, 2.5)])
+    r.restore("ts2", 0, r.dump("ts"))
+    assert r.type("ts2") == b"TSDB-TYPE"
+    assert r.ts().range("ts2", "-", "+") == resp_conversion(r, [[1, 1.5], [2, 2.5]], [(1, 1.5), (2, 2.5)])
+    info = InfoClass(r, r.ts().info("ts2"))
+    assert info.retention_msecs == 100000
+    assert info.labels == {"sensor": "1"}
@@ -109,3 +109,12 @@ def test_topk_incrby_odd_args(r: redis.Redis):
     with pytest.raises(Exception) as ctx:
         r.execute_command("TOPK.INCRBY", "topk", "item1", "3", "item2")
     assert isinstance(ctx.value, (redis.ResponseError, valkey.ResponseError))
+
+
+def test_topk_dump_restore(r: redis.Redis):
+    assert r.topk().reserve("topk", 3, 50, 4, 0.9)
+    r.topk().add("topk", "A", "B", "C", "A")
+    r.restore("topk2", 0, r.dump("topk"))
+    assert r.type("topk2") == b"TopK-TYPE"
+    assert r.topk().list("topk2") == r.topk().list("topk")
+    assert r.topk().query("topk2", "A", "D") == [1, 0]
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import socket
+import time
+
+import pytest
+import redis
+from redis.cluster import RedisCluster
+
+from fakeredis._cluster import launch_shards
+
+pytestmark = [pytest.mark.tcp_server]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return int(s.getsockname()[1])
+
+
+def _wait_until_listening(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def test_cluster_one_process_per_shard():
+    addresses = [f"127.0.0.1:{_free_port()}" for _ in range(3)]
+    processes = launch_shards(addresses)
+    try:
+        for address in addresses:
+            _wait_until_listening(int(address.rsplit(":", 1)[1]))
+        rc = RedisCluster(host="127.0.0.1", port=int(addresses[0].rsplit(":", 1)[1]))
+        keys = [f"key{i}" for i in range(30)]
+        for key in keys:
+            rc.set(key, key)
+        assert [rc.get(key) for key in keys] == [key.encode() for key in keys]
+        assert len(rc.get_primaries()) == 3
+
+        # Every process only holds the keys of its own slots
+        shard = redis.Redis(host="127.0.0.1", port=int(addresses[0].rsplit(":", 1)[1]))
+        assert 0 < shard.dbsize() < len(keys)
+        with pytest.raises(redis.exceptions.ClusterCrossSlotError):
+            shard.execute_command("DEL", "key1", "key2")
+        rc.close()
+        shard.close()
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=30)
@@ -78,3 +78,52 @@ def test_tcp_server_clean_shutdown():
     for ht in handler_threads:
         ht.join(timeout=2.0)
         assert not ht.is_alive(), f"Handler thread {ht.name} is still alive after shutdown"
+
+
+def test_tcp_server_blocking_command(tcp_server_address: tuple[str, int]):
+    results = []
+    with redis.Redis(*tcp_server_address) as r1, redis.Redis(*tcp_server_address) as r2:
+        r1.delete("queue")
+        t = Thread(target=lambda: results.append(r1.blpop(["queue"], 5)))
+        t.start()
+        time.sleep(0.1)
+        r2.rpush("queue", b"item")
+        t.join()
+        assert results == [(b"queue", b"item")]
+        assert r1.blpop(["queue"], 0.1) is None
+
+
+def test_tcp_server_keeps_connection_after_error(tcp_server_address: tuple[str, int]):
+    with redis.Redis(*tcp_server_address) as r:
+        r.set("foo", "bar")
+        with pytest.raises(redis.ResponseError):
+            r.lpush("foo", "x")
+        assert r.get("foo") == b"bar"
+
+
+def test_tcp_server_many_idle_connections(tcp_server_address: tuple[str, int]):
+    import socket
+
+    connections = [socket.create_connection(tcp_server_address) for _ in range(200)]
+    try:
+        start = time.process_time()
+        time.sleep(0.2)
+        assert time.process_time() - start < 0.1
+        with redis.Redis(*tcp_server_address) as r:
+            assert r.ping()
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def test_tcp_server_large_response_and_pipeline(tcp_server_address: tuple[str, int]):
+    with redis.Redis(*tcp_server_address) as r:
+        r.delete("big")
+        values = [str(i).encode() * 10 for i in range(20000)]
+        r.rpush("big", *values)
+        assert r.lrange("big", 0, -1) == values
+        r.delete("counter")
+        with r.pipeline(transaction=False) as p:
+            for _ in range(1000):
+                p.incr("counter")
+            assert p.execute() == list(range(1, 1001))
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Generator
+
+import pytest
+import redis
+
+from fakeredis._tcp_server import TcpFakeServer
+
+pytestmark = [pytest.mark.tcp_server]
+
+
+@pytest.fixture
+def servers() -> Generator[tuple[TcpFakeServer, TcpFakeServer], None, None]:
+    primary = TcpFakeServer(("127.0.0.1", 0))
+    replica = TcpFakeServer(("127.0.0.1", 0))
+    threads = [threading.Thread(target=server.serve_forever, daemon=True) for server in (primary, replica)]
+    for thread in threads:
+        thread.start()
+    yield primary, replica
+    replica.fake_server.replicaof(None)
+    for server in (primary, replica):
+        server.shutdown()
+        server.server_close()
+    for thread in threads:
+        thread.join()
+
+
+def test_tcp_replica(servers: tuple[TcpFakeServer, TcpFakeServer]):
+    primary, replica = servers
+    with redis.Redis(*primary.server_address) as pr, redis.Redis(*replica.server_address) as rr:
+        pr.set("before", "sync")
+        assert rr.replicaof(*primary.server_address) == b"OK"
+        for i in range(100):
+            pr.incr("counter")
+        assert pr.wait(1, 5000) == 1
+        assert rr.mget("before", "counter") == [b"sync", b"100"]
+        assert rr.role()[3] == b"connected"
+        assert pr.role()[1] == primary.fake_server.repl_offset
+        with pytest.raises(redis.ReadOnlyError):
+            rr.set("counter", 0)
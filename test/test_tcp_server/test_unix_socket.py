@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import socket
+import subprocess
+import sys
+import time
+from collections.abc import Generator
+from threading import Thread
+from typing import Any
+
+import pytest
+import redis
+
+import fakeredis
+
+pytestmark = []
+pytestmark.extend(
+    [
+        pytest.mark.tcp_server,
+        pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix domain sockets are not supported"),
+    ]
+)
+
+
+@pytest.fixture
+def unix_server(tmp_path) -> Generator[Any, Any, None]:
+    server = fakeredis.UnixFakeServer(str(tmp_path / "fakeredis.sock"))
+    t = Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    time.sleep(0.1)
+    yield server
+    server.shutdown()
+    server.server_close()
+    t.join()
+
+
+def test_unix_server(unix_server):
+    with redis.Redis(unix_socket_path=unix_server.server_address) as r:
+        r.set("foo", "bar")
+        assert r.get("foo") == b"bar"
+        assert r.client_info()["addr"] == f"{unix_server.server_address}:0"
+
+
+def test_unix_server_shares_fake_server(unix_server):
+    local = fakeredis.FakeRedis(server=unix_server.fake_server)
+    local.set("foo", "bar")
+    with redis.Redis(unix_socket_path=unix_server.server_address) as r:
+        assert r.get("foo") == b"bar"
+
+
+def test_unix_server_other_process(unix_server):
+    code = f"import redis; redis.Redis(unix_socket_path={unix_server.server_address!r}).set('foo', 'from child')"
+    subprocess.run([sys.executable, "-c", code], check=True, timeout=30)
+    assert fakeredis.FakeRedis(server=unix_server.fake_server).get("foo") == b"from child"
+
+
+def test_unix_server_removes_socket_file(tmp_path):
+    path = tmp_path / "fakeredis.sock"
+    server = fakeredis.UnixFakeServer(str(path))
+    assert path.exists()
+    server.server_close()
+    assert not path.exists()
+    # A stale socket file is replaced
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(str(path))
+    stale.close()
+    server = fakeredis.UnixFakeServer(str(path))
+    server.server_close()
+    assert not path.exists()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from fakeredis._tcp_server import WRITE_CHUNK_SIZE, Resp2Writer, Resp3Writer
+
+pytestmark = []
+pytestmark.extend(
+    [
+        pytest.mark.tcp_server,
+    ]
+)
+
+
+class _Stream:
+    def __init__(self) -> None:
+        self.calls: list[list[bytes]] = []
+
+    def writelines(self, data: Any) -> None:
+        self.calls.append(list(data))
+
+    @property
+    def data(self) -> bytes:
+        return b"".join(b"".join(call) for call in self.calls)
+
+
+class _Handler:
+    shutdown_request = False
+
+
+@pytest.mark.parametrize("writer_class", [Resp2Writer, Resp3Writer])
+def test_writer_buffers_until_flush(writer_class):
+    stream = _Stream()
+    writer = writer_class(("127.0.0.1", 0), stream, _Handler())
+    writer.dump([b"a", 1, None])
+    writer.dump(b"OK")
+    assert stream.calls == []
+    writer.flush()
+    assert len(stream.calls) == 1
+    null = b"$-1\r\n" if writer_class is Resp2Writer else b"_\r\n"
+    assert stream.data == b"*3\r\n$1\r\na\r\n:1\r\n" + null + b"+OK\r\n"
+    writer.flush()
+    assert len(stream.calls) == 1
+
+
+def test_writer_streams_large_responses_in_chunks():
+    stream = _Stream()
+    writer = Resp3Writer(("127.0.0.1", 0), stream, _Handler())
+    items = [b"x" * 100] * 5000
+    writer.dump(items)
+    writer.flush()
+    assert len(stream.calls) > 1
+    assert all(sum(len(piece) for piece in call) < WRITE_CHUNK_SIZE + 200 for call in stream.calls)
+    assert stream.data == b"*5000\r\n" + (b"$100\r\n" + b"x" * 100 + b"\r\n") * 5000